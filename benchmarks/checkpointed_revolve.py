@@ -0,0 +1,98 @@
+"""Compares the number of recomputed steps (and the run time) of backpropagating through
+`equinox.internal.checkpointed_while_loop`, between the offline `revolve` schedule (used
+when the number of steps is known in advance) and the online schedule (used otherwise).
+
+(If `steps <= (checkpoints + 1) * (checkpoints + 2) / 2` then the online schedule is
+already optimal, and is used in both cases.)
+
+Run as `python benchmarks/checkpointed_revolve.py`.
+"""
+
+import time
+
+import equinox.internal as eqxi
+import jax
+import jax.numpy as jnp
+
+
+_num_calls = 0
+
+
+def _count():
+    global _num_calls
+    _num_calls += 1
+
+
+def _make_grad(num_steps, checkpoints, known_steps, count):
+    if known_steps:
+        cond_fun = lambda _: True
+    else:
+        cond_fun = lambda carry: carry[0] < num_steps
+
+    def body_fun(carry):
+        step, val = carry
+        if count:
+            jax.debug.callback(_count)
+        return step + 1, jnp.tanh(val @ val.T) @ val
+
+    @jax.jit
+    @jax.grad
+    def grad(x):
+        _, final_val = eqxi.while_loop(
+            cond_fun,
+            body_fun,
+            (0, x),
+            max_steps=num_steps,
+            kind="checkpointed",
+            checkpoints=checkpoints,
+        )
+        return jnp.sum(final_val)
+
+    return grad
+
+
+def _run(num_steps, checkpoints, known_steps, repeats=3):
+    global _num_calls
+    x = jnp.eye(64) / 8
+    # Count the steps with a callback...
+    grad = _make_grad(num_steps, checkpoints, known_steps, count=True)
+    _num_calls = 0
+    jax.block_until_ready(grad(x))
+    jax.effects_barrier()
+    # One call per step on the forward pass, and one per step for each vjp.
+    recomputed_steps = _num_calls - 2 * num_steps
+    # ...but time without it, as the callback is slow.
+    grad = _make_grad(num_steps, checkpoints, known_steps, count=False)
+    jax.block_until_ready(grad(x))  # compile
+    best_time = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        jax.block_until_ready(grad(x))
+        best_time = min(best_time, time.perf_counter() - start)
+    return recomputed_steps, best_time
+
+
+def main():
+    print(
+        f"{'steps':>6} {'checkpoints':>11} {'online':>8} {'revolve':>8} {'ratio':>6} "
+        f"{'online ms':>10} {'revolve ms':>10}"
+    )
+    for num_steps, checkpoints in (
+        (100, 4),
+        (100, 13),
+        (1000, 8),
+        (1000, 20),
+        (1000, 44),
+        (4000, 16),
+    ):
+        online, online_time = _run(num_steps, checkpoints, known_steps=False)
+        revolve, revolve_time = _run(num_steps, checkpoints, known_steps=True)
+        ratio = online / max(revolve, 1)
+        print(
+            f"{num_steps:>6} {checkpoints:>11} {online:>8} {revolve:>8} {ratio:>6.2f} "
+            f"{1000 * online_time:>10.1f} {1000 * revolve_time:>10.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
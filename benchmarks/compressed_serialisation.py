@@ -0,0 +1,56 @@
+"""Reports the compression ratio and throughput of
+`equinox.compressed_serialise_filter_spec`, relative to the default uncompressed
+format.
+
+Run as `python benchmarks/compressed_serialisation.py`.
+"""
+
+import functools as ft
+import io
+import os
+import time
+
+import equinox as eqx
+import jax.random as jr
+
+
+def _run(model, filter_spec, repeats=3):
+    best_save = best_load = float("inf")
+    for _ in range(repeats):
+        f = io.BytesIO()
+        start = time.perf_counter()
+        eqx.tree_serialise_leaves(f, model, filter_spec=filter_spec)
+        best_save = min(best_save, time.perf_counter() - start)
+        f.seek(0)
+        start = time.perf_counter()
+        eqx.tree_deserialise_leaves(f, model)
+        best_load = min(best_load, time.perf_counter() - start)
+    return len(f.getvalue()), best_save, best_load
+
+
+def main():
+    model = eqx.nn.MLP(512, 512, 1024, 4, key=jr.PRNGKey(0))
+    specs = {
+        "uncompressed": eqx.default_serialise_filter_spec,
+        "zlib": ft.partial(eqx.compressed_serialise_filter_spec, codec="zlib"),
+        "zlib level=1": ft.partial(
+            eqx.compressed_serialise_filter_spec, codec="zlib", level=1
+        ),
+        "lzma": ft.partial(eqx.compressed_serialise_filter_spec, codec="lzma"),
+    }
+    print(f"Using {os.cpu_count()} CPU(s).")
+    baseline = None
+    print(f"{'format':>14} {'MB':>8} {'ratio':>7} {'save MB/s':>10} {'load MB/s':>10}")
+    for name, filter_spec in specs.items():
+        nbytes, save_time, load_time = _run(model, filter_spec)
+        if baseline is None:
+            baseline = nbytes
+        size = baseline / 2**20
+        print(
+            f"{name:>14} {nbytes / 2**20:8.2f} {baseline / nbytes:7.3f} "
+            f"{size / save_time:10.1f} {size / load_time:10.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
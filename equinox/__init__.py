@@ -2,12 +2,17 @@ import importlib.metadata
 
 from . import debug as debug, internal as internal, nn as nn
 from ._ad import (
+    checkpoint_name as checkpoint_name,
+    checkpoint_policy as checkpoint_policy,
     filter_checkpoint as filter_checkpoint,
     filter_closure_convert as filter_closure_convert,
     filter_custom_jvp as filter_custom_jvp,
     filter_custom_vjp as filter_custom_vjp,
+    filter_fisher_vp as filter_fisher_vp,
+    filter_ggn_vp as filter_ggn_vp,
     filter_grad as filter_grad,
     filter_hessian as filter_hessian,
+    filter_hvp as filter_hvp,
     filter_jacfwd as filter_jacfwd,
     filter_jacrev as filter_jacrev,
     filter_jvp as filter_jvp,
@@ -20,6 +25,7 @@ from ._better_abstract import (
 )
 from ._caches import clear_caches as clear_caches
 from ._callback import filter_pure_callback as filter_pure_callback
+from ._data_parallel import make_data_parallel_step as make_data_parallel_step
 from ._enum import Enumeration as Enumeration
 from ._errors import (
     branched_error_if as branched_error_if,
@@ -46,14 +52,24 @@ from ._module import (
     static_field as static_field,
     StrictConfig as StrictConfig,
 )
+from ._per_example_grad import filter_per_example_grad as filter_per_example_grad
 from ._pretty_print import tree_pformat as tree_pformat, tree_pprint as tree_pprint
 from ._serialisation import (
+    compressed_serialise_filter_spec as compressed_serialise_filter_spec,
     default_deserialise_filter_spec as default_deserialise_filter_spec,
     default_serialise_filter_spec as default_serialise_filter_spec,
+    sharded_serialise_filter_spec as sharded_serialise_filter_spec,
     tree_deserialise_leaves as tree_deserialise_leaves,
+    tree_deserialise_safetensors as tree_deserialise_safetensors,
     tree_serialise_leaves as tree_serialise_leaves,
+    tree_serialise_safetensors as tree_serialise_safetensors,
+)
+from ._sharding import (
+    filter_shard as filter_shard,
+    filter_shard_map as filter_shard_map,
+    shard_by_rules as shard_by_rules,
+    tree_psum_bucketed as tree_psum_bucketed,
 )
-from ._sharding import filter_shard as filter_shard
 from ._tree import (
     tree_at as tree_at,
     tree_check as tree_check,
@@ -1,4 +1,7 @@
+import contextvars
 import functools as ft
+import itertools as it
+import math
 import types
 import typing
 import warnings
@@ -17,11 +20,14 @@ from typing_extensions import ParamSpec
 
 import jax
 import jax._src.traceback_util as traceback_util
+import jax.ad_checkpoint
 import jax.core
 import jax.extend.core
 import jax.interpreters.ad as ad
+import jax.interpreters.partial_eval as pe
 import jax.numpy as jnp
 import jax.tree_util as jtu
+import numpy as np
 from jaxtyping import Array, ArrayLike, Complex, Float, PyTree, PyTreeDef
 
 from ._custom_types import sentinel
@@ -30,6 +36,7 @@ from ._doc_utils import doc_remove_args
 from ._eval_shape import cached_filter_eval_shape
 from ._filters import (
     combine,
+    filter,
     is_array,
     is_inexact_array,
     partition,
@@ -37,6 +44,7 @@ from ._filters import (
 from ._make_jaxpr import filter_make_jaxpr
 from ._module import field, Module, module_update_wrapper, Partial, Static
 from ._pretty_print import tree_pformat
+from ._sparsity import colour_columns, jacobian_sparsity, SparsityPattern
 from ._tree import tree_equal
 
 
@@ -52,6 +60,9 @@ class _ValueAndGradWrapper(Module):
     _fun: Callable
     _has_aux: bool
     _gradkwargs: dict[str, Any]
+    _microbatches: Optional[int] = field(default=None, static=True)
+    _microbatch_argnums: tuple[int, ...] = field(default=(1,), static=True)
+    _accumulate_dtype: Any = field(default=None, static=True)
 
     @property
     def __wrapped__(self):
@@ -78,7 +89,20 @@ class _ValueAndGradWrapper(Module):
                 )
         x, *args = args
         diff_x, nondiff_x = partition(x, is_inexact_array)
-        return fun_value_and_grad(diff_x, nondiff_x, *args, **kwargs)
+        if self._microbatches is None:
+            return fun_value_and_grad(diff_x, nondiff_x, *args, **kwargs)
+        else:
+            return _accumulate_value_and_grad(
+                fun_value_and_grad,
+                self._has_aux,
+                self._microbatches,
+                self._microbatch_argnums,
+                self._accumulate_dtype,
+                diff_x,
+                nondiff_x,
+                args,
+                kwargs,
+            )
 
     def __get__(self, instance, owner):
         if instance is None:
@@ -86,6 +110,64 @@ class _ValueAndGradWrapper(Module):
         return Partial(self, instance)
 
 
+def _accumulate_value_and_grad(
+    fun_value_and_grad,
+    has_aux: bool,
+    microbatches: int,
+    microbatch_argnums: tuple[int, ...],
+    accumulate_dtype,
+    diff_x,
+    nondiff_x,
+    args,
+    kwargs,
+):
+    # `args` excludes the differentiated argument, so argument `i` is `args[i - 1]`.
+    for argnum in microbatch_argnums:
+        if argnum > len(args):
+            raise ValueError(
+                f"`microbatch_argnums` includes {argnum}, but the function was only "
+                f"called with {len(args) + 1} positional arguments."
+            )
+    filter_spec = [
+        jtu.tree_map(is_array, arg) if i + 1 in microbatch_argnums else False
+        for i, arg in enumerate(args)
+    ]
+    batched, unbatched = partition((args, kwargs), (filter_spec, False))
+
+    def _split(y):
+        if y.ndim == 0 or y.shape[0] % microbatches != 0:
+            raise ValueError(
+                f"Cannot split an array of shape {y.shape} into {microbatches} "
+                "microbatches along its leading axis. (Arrays are split if they are "
+                "in an argument selected by `microbatch_argnums`.)"
+            )
+        return y.reshape(microbatches, y.shape[0] // microbatches, *y.shape[1:])
+
+    batched = jtu.tree_map(_split, batched)
+
+    def _zeros(p):
+        dtype = p.dtype if accumulate_dtype is None else accumulate_dtype
+        return jnp.zeros(p.shape, dtype)
+
+    def _body(grad_sum, batch):
+        _args, _kwargs = combine(batch, unbatched)
+        value, grad = fun_value_and_grad(diff_x, nondiff_x, *_args, **_kwargs)
+        grad_sum = jtu.tree_map(lambda s, g: s + g.astype(s.dtype), grad_sum, grad)
+        return grad_sum, value
+
+    # The accumulator is the `scan` carry, so it is updated in-place.
+    grad_sum = jtu.tree_map(_zeros, diff_x)
+    grad_sum, values = jax.lax.scan(_body, grad_sum, batched)
+    grad = jtu.tree_map(
+        lambda s, p: (s / microbatches).astype(p.dtype), grad_sum, diff_x
+    )
+    if has_aux:
+        values, aux = values
+        return (jnp.mean(values, axis=0), aux), grad
+    else:
+        return jnp.mean(values, axis=0), grad
+
+
 class _GradWrapper(Module):
     _fun_value_and_grad: _ValueAndGradWrapper
     _has_aux: bool
@@ -116,12 +198,20 @@ _ScalarTy = TypeVar("_ScalarTy", bound=_Scalar)
 def filter_value_and_grad(
     *,
     has_aux: Literal[False] = False,
+    microbatches: Optional[int] = None,
+    microbatch_argnums: Union[int, Sequence[int]] = 1,
+    accumulate_dtype: Any = None,
 ) -> Callable[[Callable[_P, _ScalarTy]], Callable[_P, tuple[_ScalarTy, PyTree]]]: ...
 
 
 @overload
 def filter_value_and_grad(
-    fun: Callable[_P, _ScalarTy], *, has_aux: Literal[False] = False
+    fun: Callable[_P, _ScalarTy],
+    *,
+    has_aux: Literal[False] = False,
+    microbatches: Optional[int] = None,
+    microbatch_argnums: Union[int, Sequence[int]] = 1,
+    accumulate_dtype: Any = None,
 ) -> Callable[_P, tuple[_ScalarTy, PyTree]]: ...
 
 
@@ -129,6 +219,9 @@ def filter_value_and_grad(
 def filter_value_and_grad(
     *,
     has_aux: Literal[True] = True,
+    microbatches: Optional[int] = None,
+    microbatch_argnums: Union[int, Sequence[int]] = 1,
+    accumulate_dtype: Any = None,
 ) -> Callable[
     [Callable[_P, tuple[_ScalarTy, _T]]],
     Callable[_P, tuple[tuple[_ScalarTy, _T], PyTree]],
@@ -137,19 +230,35 @@ def filter_value_and_grad(
 
 @overload
 def filter_value_and_grad(
-    fun: Callable[_P, tuple[_ScalarTy, _T]], *, has_aux: Literal[True] = True
+    fun: Callable[_P, tuple[_ScalarTy, _T]],
+    *,
+    has_aux: Literal[True] = True,
+    microbatches: Optional[int] = None,
+    microbatch_argnums: Union[int, Sequence[int]] = 1,
+    accumulate_dtype: Any = None,
 ) -> Callable[_P, tuple[tuple[_ScalarTy, _T], PyTree]]: ...
 
 
 @overload
 def filter_value_and_grad(
-    fun: Callable[_P, _T], *, has_aux: bool = False
+    fun: Callable[_P, _T],
+    *,
+    has_aux: bool = False,
+    microbatches: Optional[int] = None,
+    microbatch_argnums: Union[int, Sequence[int]] = 1,
+    accumulate_dtype: Any = None,
 ) -> Callable[_P, tuple[_T, PyTree]]: ...
 
 
 @doc_remove_args("gradkwargs")
 def filter_value_and_grad(
-    fun=sentinel, *, has_aux: bool = False, **gradkwargs
+    fun=sentinel,
+    *,
+    has_aux: bool = False,
+    microbatches: Optional[int] = None,
+    microbatch_argnums: Union[int, Sequence[int]] = 1,
+    accumulate_dtype: Any = None,
+    **gradkwargs,
 ) -> Callable:
     """Creates a function that evaluates both `fun` and the gradient of `fun`.
 
@@ -163,6 +272,22 @@ def filter_value_and_grad(
     - `fun` is a pure function to differentiate.
     - `has_aux`: if `True` then `fun` should return a pair; the first element is the
         output to be differentiated and the second element is auxiliary data.
+    - `microbatches`: if passed an integer `k`, then the computation is split into `k`
+        sequential pieces, to reduce peak memory usage. Every JAX/NumPy array in the
+        arguments selected by `microbatch_argnums` is split into `k` equal pieces along
+        its leading (batch) axis, `fun` is evaluated and differentiated on each piece in
+        turn (in a `jax.lax.scan`), and the mean value and gradient are returned. All
+        other arguments are passed unchanged to every piece. This is
+        equivalent to not splitting, provided `fun` computes a mean over the batch.
+        Peak activation memory is reduced by a factor of about `k`. If `has_aux=True`
+        then the auxiliary outputs of each piece are stacked along a new leading axis.
+    - `microbatch_argnums`: if `microbatches` is passed, then the positional
+        argument(s) which hold the batch, and which should be split. Defaults to `1`,
+        i.e. the argument immediately after the differentiated one. Keyword arguments
+        are never split.
+    - `accumulate_dtype`: if `microbatches` is passed, then the dtype in which to
+        accumulate gradients across microbatches. Defaults to the dtype of each
+        parameter. The returned gradient is always in the dtype of each parameter.
 
     **Returns:**
 
@@ -175,7 +300,14 @@ def filter_value_and_grad(
     """
 
     if fun is sentinel:
-        return ft.partial(filter_value_and_grad, has_aux=has_aux, **gradkwargs)
+        return ft.partial(
+            filter_value_and_grad,
+            has_aux=has_aux,
+            microbatches=microbatches,
+            microbatch_argnums=microbatch_argnums,
+            accumulate_dtype=accumulate_dtype,
+            **gradkwargs,
+        )
 
     deprecated_0_10(gradkwargs, "arg")
     deprecated_0_10(gradkwargs, "filter_spec")
@@ -187,19 +319,46 @@ def filter_value_and_grad(
             "as the first argument."
         )
 
-    return module_update_wrapper(_ValueAndGradWrapper(fun, has_aux, gradkwargs))
+    if microbatches is not None and microbatches < 1:
+        raise ValueError("`microbatches` must be a positive integer.")
+    if isinstance(microbatch_argnums, int):
+        microbatch_argnums = (microbatch_argnums,)
+    microbatch_argnums = tuple(microbatch_argnums)
+    if any(argnum < 1 for argnum in microbatch_argnums):
+        raise ValueError(
+            "`microbatch_argnums` must be positive: the first argument is the one "
+            "being differentiated, and cannot be split."
+        )
+    return module_update_wrapper(
+        _ValueAndGradWrapper(
+            fun,
+            has_aux,
+            gradkwargs,
+            microbatches,
+            microbatch_argnums,
+            accumulate_dtype,
+        )
+    )
 
 
 @overload
 def filter_grad(
     *,
     has_aux: Literal[False] = False,
+    microbatches: Optional[int] = None,
+    microbatch_argnums: Union[int, Sequence[int]] = 1,
+    accumulate_dtype: Any = None,
 ) -> Callable[[Callable[_P, _Scalar]], Callable[_P, PyTree[Float[Array, "..."]]]]: ...
 
 
 @overload
 def filter_grad(
-    fun: Callable[_P, _Scalar], *, has_aux: Literal[False] = False
+    fun: Callable[_P, _Scalar],
+    *,
+    has_aux: Literal[False] = False,
+    microbatches: Optional[int] = None,
+    microbatch_argnums: Union[int, Sequence[int]] = 1,
+    accumulate_dtype: Any = None,
 ) -> Callable[_P, PyTree[Float[Array, "..."]]]: ...
 
 
@@ -207,6 +366,9 @@ def filter_grad(
 def filter_grad(
     *,
     has_aux: Literal[True] = True,
+    microbatches: Optional[int] = None,
+    microbatch_argnums: Union[int, Sequence[int]] = 1,
+    accumulate_dtype: Any = None,
 ) -> Callable[
     [Callable[_P, tuple[_Scalar, _T]]],
     Callable[_P, tuple[PyTree[Float[Array, "..."]], _T]],
@@ -215,18 +377,36 @@ def filter_grad(
 
 @overload
 def filter_grad(
-    fun: Callable[_P, tuple[_Scalar, _T]], *, has_aux: Literal[True] = True
+    fun: Callable[_P, tuple[_Scalar, _T]],
+    *,
+    has_aux: Literal[True] = True,
+    microbatches: Optional[int] = None,
+    microbatch_argnums: Union[int, Sequence[int]] = 1,
+    accumulate_dtype: Any = None,
 ) -> Callable[_P, tuple[PyTree[Float[Array, "..."]], _T]]: ...
 
 
 @overload
 def filter_grad(
-    fun: Callable[_P, Any], *, has_aux: bool = False
+    fun: Callable[_P, Any],
+    *,
+    has_aux: bool = False,
+    microbatches: Optional[int] = None,
+    microbatch_argnums: Union[int, Sequence[int]] = 1,
+    accumulate_dtype: Any = None,
 ) -> Callable[_P, Any]: ...
 
 
 @doc_remove_args("gradkwargs")
-def filter_grad(fun=sentinel, *, has_aux: bool = False, **gradkwargs):
+def filter_grad(
+    fun=sentinel,
+    *,
+    has_aux: bool = False,
+    microbatches: Optional[int] = None,
+    microbatch_argnums: Union[int, Sequence[int]] = 1,
+    accumulate_dtype: Any = None,
+    **gradkwargs,
+):
     """Creates a function that computes the gradient of `fun`.
 
     The gradient will be computed with respect to all floating-point JAX/NumPy arrays
@@ -239,6 +419,8 @@ def filter_grad(fun=sentinel, *, has_aux: bool = False, **gradkwargs):
     - `fun` is a pure function to differentiate.
     - `has_aux`: if `True` then `fun` should return a pair; the first element is the
         output to be differentiated and the second element is auxiliary data.
+    - `microbatches`, `microbatch_argnums`, `accumulate_dtype`: as
+        [`equinox.filter_value_and_grad`][].
 
     **Returns:**
 
@@ -272,9 +454,23 @@ def filter_grad(fun=sentinel, *, has_aux: bool = False, **gradkwargs):
     """
 
     if fun is sentinel:
-        return ft.partial(filter_grad, has_aux=has_aux, **gradkwargs)
+        return ft.partial(
+            filter_grad,
+            has_aux=has_aux,
+            microbatches=microbatches,
+            microbatch_argnums=microbatch_argnums,
+            accumulate_dtype=accumulate_dtype,
+            **gradkwargs,
+        )
 
-    fun_value_and_grad = filter_value_and_grad(fun, has_aux=has_aux, **gradkwargs)
+    fun_value_and_grad = filter_value_and_grad(
+        fun,
+        has_aux=has_aux,
+        microbatches=microbatches,
+        microbatch_argnums=microbatch_argnums,
+        accumulate_dtype=accumulate_dtype,
+        **gradkwargs,
+    )
     fun_value_and_grad = cast(_ValueAndGradWrapper, fun_value_and_grad)
     return module_update_wrapper(_GradWrapper(fun_value_and_grad, has_aux))
 
@@ -419,10 +615,153 @@ def filter_vjp(fun, *primals, has_aux: bool = False):
         return out, vjp_fn
 
 
+def _one_hot_leaves(index, leaves):
+    # The `index`-th basis vector of the space of `leaves`, all flattened together.
+    out = []
+    offset = 0
+    for leaf in leaves:
+        size = math.prod(leaf.shape)
+        hot = jnp.arange(offset, offset + size) == index
+        out.append(hot.astype(leaf.dtype).reshape(leaf.shape))
+        offset += size
+    return out
+
+
+def _split_last_axis(x, shapes):
+    # Splits the trailing axis of `x` into pieces of the given (flattened) `shapes`.
+    out = []
+    offset = 0
+    for shape in shapes:
+        size = math.prod(shape)
+        piece = x[..., offset : offset + size]
+        out.append(piece.reshape(x.shape[:-1] + shape))
+        offset += size
+    return out
+
+
+def _chunked_jacfwd(fun, x, chunk_size: int):
+    x_leaves, x_treedef = jtu.tree_flatten(x)
+    num_inputs = sum(math.prod(leaf.shape) for leaf in x_leaves)
+    out, jvp_fn, aux = jax.linearize(fun, x, has_aux=True)
+
+    def _pushforward(index):
+        tangent = jtu.tree_unflatten(x_treedef, _one_hot_leaves(index, x_leaves))
+        return jvp_fn(tangent)
+
+    # Shape `(num_inputs, *out_shape)` for each output leaf.
+    jac = jax.lax.map(_pushforward, jnp.arange(num_inputs), batch_size=chunk_size)
+    x_shapes = [leaf.shape for leaf in x_leaves]
+
+    def _unravel(jac_leaf):
+        jac_leaf = jnp.moveaxis(jac_leaf, 0, -1)
+        return jtu.tree_unflatten(x_treedef, _split_last_axis(jac_leaf, x_shapes))
+
+    return jtu.tree_map(_unravel, jac), aux
+
+
+def _chunked_jacrev(fun, x, chunk_size: int):
+    x_leaves, x_treedef = jtu.tree_flatten(x)
+    out, vjp_fn, aux = jax.vjp(fun, x, has_aux=True)
+    out_leaves, out_treedef = jtu.tree_flatten(out)
+    num_outputs = sum(math.prod(leaf.shape) for leaf in out_leaves)
+
+    def _pullback(index):
+        cotangent = jtu.tree_unflatten(out_treedef, _one_hot_leaves(index, out_leaves))
+        (x_cotangent,) = vjp_fn(cotangent)
+        return jtu.tree_leaves(x_cotangent)
+
+    # Shape `(num_outputs, *in_shape)` for each input leaf.
+    jac = jax.lax.map(_pullback, jnp.arange(num_outputs), batch_size=chunk_size)
+    jac = [jnp.moveaxis(jac_leaf, 0, -1) for jac_leaf in jac]
+    out_shapes = [leaf.shape for leaf in out_leaves]
+    # For each input leaf, a list of its Jacobians against each output leaf.
+    jac = [_split_last_axis(jac_leaf, out_shapes) for jac_leaf in jac]
+    in_ndims = [leaf.ndim for leaf in x_leaves]
+    jac_leaves = []
+    for i, out_leaf in enumerate(out_leaves):
+        pieces = []
+        for jac_leaf, ndim in zip(jac, in_ndims):
+            # `(*in_shape, *out_shape)` -> `(*out_shape, *in_shape)`
+            piece = jac_leaf[i]
+            perm = tuple(range(ndim, piece.ndim)) + tuple(range(ndim))
+            pieces.append(jnp.transpose(piece, perm))
+        jac_leaves.append(jtu.tree_unflatten(x_treedef, pieces))
+    return jtu.tree_unflatten(out_treedef, jac_leaves), aux
+
+
+def _sparse_jacfwd(fun, x, sparsity, chunk_size: Optional[int]):
+    x_leaves, x_treedef = jtu.tree_flatten(x)
+    x_shapes = [leaf.shape for leaf in x_leaves]
+    num_inputs = sum(math.prod(shape) for shape in x_shapes)
+    if sparsity == "auto":
+
+        def _flat_fun(*_x_leaves):
+            _out, _ = fun(jtu.tree_unflatten(x_treedef, _x_leaves))
+            return jtu.tree_leaves(_out)
+
+        structs = [jax.ShapeDtypeStruct(leaf.shape, leaf.dtype) for leaf in x_leaves]
+        pattern = jacobian_sparsity(_flat_fun, *structs)
+    else:
+        shape, packed = sparsity
+        pattern = np.unpackbits(np.frombuffer(packed, dtype=np.uint8))
+        pattern = pattern[: math.prod(shape)].reshape(shape)
+        pattern = SparsityPattern.from_dense(pattern)
+    out, jvp_fn, aux = jax.linearize(fun, x, has_aux=True)
+    out_leaves, out_treedef = jtu.tree_flatten(out)
+    num_outputs = sum(math.prod(leaf.shape) for leaf in out_leaves)
+    if pattern.shape != (num_outputs, num_inputs):
+        raise ValueError(
+            f"`sparsity` has shape {pattern.shape}, but the Jacobian has shape "
+            f"{(num_outputs, num_inputs)} (after flattening and concatenating all "
+            "outputs and all floating-point inputs)."
+        )
+    colours, num_colours = colour_columns(pattern)
+    colour_leaves = _split_last_axis(colours, x_shapes)
+
+    # Each JVP computes the sum of all Jacobian columns of a single colour. As no two
+    # such columns share a nonzero row, these can be separated again afterwards.
+    def _pushforward(colour):
+        tangent = [
+            (jnp.asarray(c) == colour).astype(leaf.dtype)
+            for c, leaf in zip(colour_leaves, x_leaves)
+        ]
+        return jtu.tree_leaves(jvp_fn(jtu.tree_unflatten(x_treedef, tangent)))
+
+    if num_colours == 0:
+        compressed = [jnp.zeros((0,) + leaf.shape, leaf.dtype) for leaf in out_leaves]
+    elif chunk_size is None:
+        compressed = jax.vmap(_pushforward)(jnp.arange(num_colours))
+    else:
+        compressed = jax.lax.map(
+            _pushforward, jnp.arange(num_colours), batch_size=chunk_size
+        )
+    rows, columns = pattern.rows, pattern.columns
+    jac_leaves = []
+    offset = 0
+    for out_leaf, compressed_leaf in zip(out_leaves, compressed):
+        size = math.prod(out_leaf.shape)
+        keep = (rows >= offset) & (rows < offset + size)
+        leaf_rows = rows[keep] - offset
+        leaf_columns = columns[keep]
+        compressed_leaf = compressed_leaf.reshape(num_colours, size)
+        values = compressed_leaf[colours[leaf_columns], leaf_rows]
+        jac_leaf = jnp.zeros((size, num_inputs), compressed_leaf.dtype)
+        jac_leaf = jac_leaf.at[leaf_rows, leaf_columns].set(values)
+        jac_leaf = jac_leaf.reshape(out_leaf.shape + (num_inputs,))
+        jac_leaf = _split_last_axis(jac_leaf, x_shapes)
+        jac_leaves.append(jtu.tree_unflatten(x_treedef, jac_leaf))
+        offset += size
+    return jtu.tree_unflatten(out_treedef, jac_leaves), aux
+
+
 class _Jac(Module):
     fun: Callable
     has_aux: bool
     rev: bool
+    chunk_size: Optional[int] = None
+    # Either `None`, `"auto"`, or a `(shape, packed bits)` pair. Stored in this hashable
+    # form so that `_Jac` can be passed across `filter_jit` etc.
+    sparsity: Any = field(static=True, default=None)
 
     def __call__(self, x, /, *args, **kwargs):
         diff_x, static_x = partition(x, is_inexact_array)
@@ -436,18 +775,31 @@ class _Jac(Module):
                 _aux = None
             return _out, _aux
 
-        if self.rev:
-            jacobian = jax.jacrev
+        if self.sparsity is not None:
+            out, aux = _sparse_jacfwd(_fun, diff_x, self.sparsity, self.chunk_size)
+        elif self.chunk_size is None:
+            if self.rev:
+                jacobian = jax.jacrev
+            else:
+                jacobian = jax.jacfwd
+            out, aux = jacobian(_fun, has_aux=True)(diff_x)
         else:
-            jacobian = jax.jacfwd
-        out, aux = jacobian(_fun, has_aux=True)(diff_x)
+            if self.rev:
+                out, aux = _chunked_jacrev(_fun, diff_x, self.chunk_size)
+            else:
+                out, aux = _chunked_jacfwd(_fun, diff_x, self.chunk_size)
         if self.has_aux:
             return out, aux
         else:
             return out
 
 
-def filter_jacfwd(fun, has_aux: bool = False):
+def filter_jacfwd(
+    fun,
+    has_aux: bool = False,
+    chunk_size: Optional[int] = None,
+    sparsity: Union[None, Literal["auto"], ArrayLike] = None,
+):
     """Computes the Jacobian of `fun`, evaluated using forward-mode AD. The inputs and
     outputs may be arbitrary PyTrees.
 
@@ -456,6 +808,26 @@ def filter_jacfwd(fun, has_aux: bool = False):
     - `fun`: The function to be differentiated.
     - `has_aux`: Indicates whether `fun` returns a pair, with the first element the
         output to be differentiated, and the latter auxiliary data. Defaults to `False`.
+    - `chunk_size`: If `None` (the default) then every column of the Jacobian is
+        computed at once, in a single `jax.vmap`. This is fastest, but uses memory
+        proportional to the full Jacobian for every intermediate value. If an integer
+        then the columns are instead computed `chunk_size` at a time, in a loop.
+        This trades off runtime against peak memory.
+    - `sparsity`: If `None` (the default) then the Jacobian is treated as dense. Else
+        the Jacobian is computed using only one JVP per colour of a column colouring
+        of its sparsity pattern, which for e.g. banded Jacobians is far fewer than one
+        JVP per input. This may be either:
+        - a boolean array of shape `(num_outputs, num_inputs)`, in which all
+            outputs, and all floating-point inputs, have been flattened and
+            concatenated (in the order given by `jax.tree_util.tree_leaves`). This
+            must be `True` wherever the Jacobian may be nonzero, else the result will
+            be incorrect;
+        - the string `"auto"`, in which case a conservative pattern is detected by
+            tracing `fun` and analysing the dependencies between the elements of its
+            inputs and outputs. Any unrecognised operation is assumed to be dense.
+
+        The result is returned with the same (dense) structure as when
+        `sparsity=None`.
 
     **Returns:**
 
@@ -472,10 +844,20 @@ def filter_jacfwd(fun, has_aux: bool = False):
     If `has_aux is True` then it returns a pair `(jacobian, aux)`, where `aux` is the
     auxiliary data returned from `fun`.
     """
-    return _Jac(fun, has_aux, rev=False)
+    if sparsity is not None and not isinstance(sparsity, str):
+        pattern = np.asarray(sparsity, dtype=bool)
+        if pattern.ndim != 2:
+            raise ValueError(
+                "`sparsity` must be a two-dimensional boolean array of shape "
+                "`(num_outputs, num_inputs)`."
+            )
+        sparsity = (pattern.shape, np.packbits(pattern).tobytes())
+    elif isinstance(sparsity, str) and sparsity != "auto":
+        raise ValueError("`sparsity` must be either `None`, `'auto'`, or an array.")
+    return _Jac(fun, has_aux, rev=False, chunk_size=chunk_size, sparsity=sparsity)
 
 
-def filter_jacrev(fun, has_aux: bool = False):
+def filter_jacrev(fun, has_aux: bool = False, chunk_size: Optional[int] = None):
     """Computes the Jacobian of `fun`, evaluated using reverse-mode AD. The inputs and
     outputs may be arbitrary PyTrees.
 
@@ -484,6 +866,11 @@ def filter_jacrev(fun, has_aux: bool = False):
     - `fun`: The function to be differentiated.
     - `has_aux`: Indicates whether `fun` returns a pair, with the first element the
         output to be differentiated, and the latter auxiliary data. Defaults to `False`.
+    - `chunk_size`: If `None` (the default) then every column of the Jacobian is
+        computed at once, in a single `jax.vmap`. This is fastest, but uses memory
+        proportional to the full Jacobian for every intermediate value. If an integer
+        then the columns are instead computed `chunk_size` at a time, in a loop.
+        This trades off runtime against peak memory.
 
     **Returns:**
 
@@ -500,7 +887,7 @@ def filter_jacrev(fun, has_aux: bool = False):
     If `has_aux is True` then it returns a pair `(jacobian, aux)`, where `aux` is the
     auxiliary data returned from `fun`.
     """
-    return _Jac(fun, has_aux, rev=True)
+    return _Jac(fun, has_aux, rev=True, chunk_size=chunk_size)
 
 
 def filter_hessian(fun, has_aux: bool = False):
@@ -528,6 +915,136 @@ def filter_hessian(fun, has_aux: bool = False):
     return filter_jacfwd(filter_jacrev(fun, has_aux=has_aux), has_aux=has_aux)
 
 
+def _split_tangent(x, v):
+    diff_x, static_x = partition(x, is_inexact_array)
+    v = filter(v, is_inexact_array)
+    return diff_x, static_x, v
+
+
+def filter_hvp(fun: Callable[..., _Scalar], x: PyTree, v: PyTree, /, *args, **kwargs):
+    """Computes the Hessian-vector product of `fun`, without materialising the Hessian.
+    This uses forward-over-reverse autodifferentiation.
+
+    The Hessian is computed with respect to all floating-point JAX/NumPy arrays in the
+    first argument, as with [`equinox.filter_grad`][].
+
+    **Arguments:**
+
+    - `fun`: The function to be differentiated. Should return a scalar.
+    - `x`: The point at which the Hessian should be evaluated. Can be any PyTree.
+    - `v`: The vector to multiply against. Should have the same structure as the
+        gradient of `fun`, i.e. as `eqx.filter(x, eqx.is_inexact_array)`. (Any
+        non-floating-point leaves are ignored.)
+    - `*args`, `**kwargs`: Any additional arguments to pass to `fun`. These are not
+        differentiated.
+
+    **Returns:**
+
+    The Hessian-vector product, with the same structure as `v`.
+    """
+    diff_x, static_x, v = _split_tangent(x, v)
+
+    def _grad(_diff_x):
+        def _fun(__diff_x):
+            return fun(combine(__diff_x, static_x), *args, **kwargs)
+
+        return jax.grad(_fun)(_diff_x)
+
+    _, hvp = jax.jvp(_grad, (diff_x,), (v,))
+    return hvp
+
+
+def filter_ggn_vp(
+    fun: Callable,
+    loss: Callable[[Any], _Scalar],
+    x: PyTree,
+    v: PyTree,
+    /,
+    *args,
+    **kwargs,
+):
+    """Computes the product of the generalised Gauss-Newton matrix `Jᵀ H J` with a
+    vector, without materialising either `J` or `H`.
+
+    Here `J` is the Jacobian of `fun` with respect to the floating-point arrays in its
+    first argument, and `H` is the Hessian of `loss` with respect to the output of
+    `fun`. This is a positive semidefinite approximation to the Hessian of
+    `loss(fun(x))` whenever `loss` is convex.
+
+    `fun` is only evaluated once: it is linearised, and the same linearisation is used
+    for both the `J` and the `Jᵀ` products.
+
+    **Arguments:**
+
+    - `fun`: The model. Should return a PyTree of floating-point arrays.
+    - `loss`: The loss applied to the output of `fun`. Should return a scalar.
+    - `x`: The point at which to evaluate. Can be any PyTree.
+    - `v`: The vector to multiply against. Should have the same structure as
+        `eqx.filter(x, eqx.is_inexact_array)`.
+    - `*args`, `**kwargs`: Any additional arguments to pass to `fun`. These are not
+        differentiated.
+
+    **Returns:**
+
+    The product `Jᵀ H J v`, with the same structure as `v`.
+    """
+    diff_x, static_x, v = _split_tangent(x, v)
+
+    def _fun(_diff_x):
+        return fun(combine(_diff_x, static_x), *args, **kwargs)
+
+    out, fun_jvp = jax.linearize(_fun, diff_x)
+    _, hjv = jax.jvp(jax.grad(loss), (out,), (fun_jvp(v),))
+    (ggn_vp,) = jax.linear_transpose(fun_jvp, diff_x)(hjv)
+    return ggn_vp
+
+
+def filter_fisher_vp(
+    fun: Callable[..., Array], x: PyTree, v: PyTree, /, *args, **kwargs
+):
+    """Computes the product of the empirical Fisher information matrix with a vector,
+    without materialising the matrix.
+
+    Given per-example losses `ℓᵢ` (typically negative log-likelihoods), the empirical
+    Fisher is `F = (1/N) Σᵢ ∇ℓᵢ ∇ℓᵢᵀ`. Writing `J` for the Jacobian of the vector of
+    per-example losses, this is computed as `F v = (1/N) Jᵀ (J v)`, in a single
+    linearisation of `fun`.
+
+    **Arguments:**
+
+    - `fun`: The function computing per-example losses. Should return an array of
+        shape `(N,)`.
+    - `x`: The point at which to evaluate. Can be any PyTree.
+    - `v`: The vector to multiply against. Should have the same structure as
+        `eqx.filter(x, eqx.is_inexact_array)`.
+    - `*args`, `**kwargs`: Any additional arguments to pass to `fun`. These are not
+        differentiated.
+
+    **Returns:**
+
+    The product `F v`, with the same structure as `v`.
+
+    !!! info
+
+        For a negative log-likelihood of an exponential family, the (true) Fisher
+        information matrix is equal to the generalised Gauss-Newton matrix, and can be
+        computed with [`equinox.filter_ggn_vp`][].
+    """
+    diff_x, static_x, v = _split_tangent(x, v)
+
+    def _fun(_diff_x):
+        return fun(combine(_diff_x, static_x), *args, **kwargs)
+
+    losses, fun_jvp = jax.linearize(_fun, diff_x)
+    if jnp.ndim(losses) != 1:
+        raise ValueError(
+            "`fun` must return a one-dimensional array of per-example losses."
+        )
+    jv = fun_jvp(v)
+    (fisher_vp,) = jax.linear_transpose(fun_jvp, diff_x)(jv / losses.shape[0])
+    return fisher_vp
+
+
 def _is_struct(x):
     return is_array(x) or isinstance(x, jax.ShapeDtypeStruct)
 
@@ -947,16 +1464,45 @@ class filter_custom_vjp:
         If you need gradients with respect to multiple arguments, then just pack them
         together as a tuple via the first argument `vjp_arg`. (See also
         [`equinox.filter_grad`][] for a similar trick.)
+
+    !!! tip
+
+        The residuals saved for the backward pass can be reduced by passing extra
+        arguments to `def_fwd`:
+        ```python
+        @fn.def_fwd(recompute=..., drop_unused_residuals=True)
+        def fn_fwd(perturbed, vjp_arg, *args, **kwargs):
+            ...
+        ```
+
+        - `recompute` is a filter specification (a bool, a callable `leaf -> bool`, or
+            a PyTree prefix of `residuals` with such values) indicating which arrays in
+            `residuals` should not be saved. Instead, `fn_fwd` will be called again on
+            the backward pass to recompute them. This trades compute for memory.
+        - `drop_unused_residuals=True` will trace `fn_bwd` during the forward pass, and
+            only save those arrays (in `residuals`, `vjp_arg`, `args`, and `kwargs`)
+            that it actually reads. In this case `fn_bwd` is always passed an array
+            (rather than `None`) as the cotangent of every differentiable output.
     """
 
     def __init__(self, fn):
         self.fn = fn
         self.fn_fwd: Optional[Callable] = None
         self.fn_bwd: Optional[Callable] = None
+        self.recompute: Union[bool, Callable[[Any], bool], PyTree] = False
+        self.drop_unused_residuals = False
         self.fn_wrapped = None
 
-    def def_fwd(self, fn_fwd):
+    def def_fwd(self, fn_fwd=sentinel, *, recompute=False, drop_unused_residuals=False):
+        if fn_fwd is sentinel:
+            return ft.partial(
+                self.def_fwd,
+                recompute=recompute,
+                drop_unused_residuals=drop_unused_residuals,
+            )
         self.fn_fwd = fn_fwd
+        self.recompute = recompute
+        self.drop_unused_residuals = drop_unused_residuals
         if self.fn_bwd is not None:
             self._defvjp()
 
@@ -1017,6 +1563,46 @@ class filter_custom_vjp:
             diff_array_out, nondiff_array_out = partition(array_out, is_inexact_array)
             return diff_array_out, nondiff_array_out, Static(nonarray_out)
 
+        def _bwd(
+            nonarray_vjp_arg,
+            nonarray_args_kwargs,
+            nonarray_residuals,
+            perturbed,
+            saved,
+            grad_diff_array_out,
+        ):
+            assert self.fn_fwd is not None
+            assert self.fn_bwd is not None
+            (
+                array_residuals,
+                diff_array_vjp_arg,
+                nondiff_array_vjp_arg,
+                array_args_kwargs,
+            ) = saved
+            vjp_arg = combine(
+                nonarray_vjp_arg, diff_array_vjp_arg, nondiff_array_vjp_arg
+            )
+            args, kwargs = combine(nonarray_args_kwargs, array_args_kwargs)
+            if self.recompute is not False:
+                _, recomputed = self.fn_fwd(perturbed, vjp_arg, *args, **kwargs)
+                recomputed = filter(filter(recomputed, is_array), self.recompute)
+                array_residuals = combine(array_residuals, recomputed)
+            residuals = combine(array_residuals, nonarray_residuals)
+            out = self.fn_bwd(
+                residuals, grad_diff_array_out, perturbed, vjp_arg, *args, **kwargs
+            )
+            if jtu.tree_structure(out, is_leaf=_is_none) != jtu.tree_structure(
+                diff_array_vjp_arg, is_leaf=_is_none
+            ):
+                raise RuntimeError(
+                    "custom_vjp gradients must have the same structure as "
+                    "`equinox.filter(vjp_arg, equinox.is_inexact_array)`, where "
+                    "`vjp_arg` is the first argument used in the forward pass."
+                )
+            return jtu.tree_map(
+                _none_to_zero, out, diff_array_vjp_arg, is_leaf=_is_none
+            )
+
         def fn_fwd_wrapped(
             nonarray_vjp_arg,
             nonarray_args_kwargs,
@@ -1047,46 +1633,81 @@ class filter_custom_vjp:
             out, residuals = self.fn_fwd(perturbed, vjp_arg, *args, **kwargs)
             array_out, nonarray_out = partition(out, is_array)
             array_residuals, nonarray_residuals = partition(residuals, is_array)
+            # Residuals marked for recomputation are not saved: they are recomputed by
+            # running `fn_fwd` again on the backward pass.
+            array_residuals = filter(array_residuals, self.recompute, inverse=True)
             diff_array_out, nondiff_array_out = partition(array_out, is_inexact_array)
             out = diff_array_out, nondiff_array_out, Static(nonarray_out)
-            return out, (
+            saved = (
                 array_residuals,
-                Static(nonarray_residuals),
                 diff_array_vjp_arg,
                 nondiff_array_vjp_arg,
                 array_args_kwargs,
-                perturbed,
             )
+            if not self.drop_unused_residuals:
+                return out, (saved, Static((nonarray_residuals, perturbed, None)))
+            # Trace `fn_bwd` now, so that we only need to save those arrays that it
+            # actually reads. (As determined by DCE of its jaxpr.)
+            saved_leaves, saved_treedef = jtu.tree_flatten(saved)
+            grad_leaves, grad_treedef = jtu.tree_flatten(diff_array_out)
+            out_treedef = None
+
+            def _bwd_flat(_saved_leaves, _grad_leaves):
+                nonlocal out_treedef
+                _out = _bwd(
+                    nonarray_vjp_arg,
+                    nonarray_args_kwargs,
+                    nonarray_residuals,
+                    perturbed,
+                    jtu.tree_unflatten(saved_treedef, _saved_leaves),
+                    jtu.tree_unflatten(grad_treedef, _grad_leaves),
+                )
+                _out_leaves, out_treedef = jtu.tree_flatten(_out)
+                return _out_leaves
 
-        def fn_bwd_wrapped(nonarray_vjp_arg, nonarray_args_kwargs, residuals, grad_out):
-            assert self.fn_bwd is not None
-            (
-                array_residuals,
-                nonarray_residuals,
-                diff_array_vjp_arg,
-                nondiff_array_vjp_arg,
-                array_args_kwargs,
-                perturbed,
-            ) = residuals
-            residuals = combine(array_residuals, nonarray_residuals.value)
-            vjp_arg = combine(
-                nonarray_vjp_arg, diff_array_vjp_arg, nondiff_array_vjp_arg
+            to_struct = lambda x: jax.ShapeDtypeStruct(x.shape, x.dtype)
+            grad_structs = tuple(to_struct(x) for x in grad_leaves)
+            bwd_jaxpr = jax.make_jaxpr(_bwd_flat)(
+                [to_struct(x) for x in saved_leaves], list(grad_structs)
             )
-            args, kwargs = combine(nonarray_args_kwargs, array_args_kwargs)
-            grad_diff_array_out, _, _ = grad_out
-            grad_diff_array_out = jtu.tree_map(_zero_to_none, grad_diff_array_out)
-            out = self.fn_bwd(
-                residuals, grad_diff_array_out, perturbed, vjp_arg, *args, **kwargs
+            bwd_consts = bwd_jaxpr.consts
+            bwd_jaxpr, used = pe.dce_jaxpr(
+                pe.convert_constvars_jaxpr(bwd_jaxpr.jaxpr),
+                [True] * len(bwd_jaxpr.jaxpr.outvars),
             )
-            if jtu.tree_structure(out, is_leaf=_is_none) != jtu.tree_structure(
-                diff_array_vjp_arg, is_leaf=_is_none
-            ):
-                raise RuntimeError(
-                    "custom_vjp gradients must have the same structure as "
-                    "`equinox.filter(vjp_arg, equinox.is_inexact_array)`, where "
-                    "`vjp_arg` is the first argument used in the forward pass."
+            used_inputs = list(it.chain(bwd_consts, saved_leaves))
+            used_inputs = [x for x, u in zip(used_inputs, used) if u]
+            used_grads = tuple(used[len(bwd_consts) + len(saved_leaves) :])
+            bwd = (bwd_jaxpr, used_grads, grad_structs, out_treedef)
+            return out, (used_inputs, Static((nonarray_residuals, perturbed, bwd)))
+
+        def fn_bwd_wrapped(nonarray_vjp_arg, nonarray_args_kwargs, residuals, grad_out):
+            saved, static = residuals
+            nonarray_residuals, perturbed, bwd = static.value
+            grad_diff_array_out, _, _ = grad_out
+            if bwd is None:
+                grad_diff_array_out = jtu.tree_map(_zero_to_none, grad_diff_array_out)
+                out = _bwd(
+                    nonarray_vjp_arg,
+                    nonarray_args_kwargs,
+                    nonarray_residuals,
+                    perturbed,
+                    saved,
+                    grad_diff_array_out,
                 )
-            out = jtu.tree_map(_none_to_zero, out, diff_array_vjp_arg, is_leaf=_is_none)
+            else:
+                bwd_jaxpr, used_grads, grad_structs, out_treedef = bwd
+                # `fn_bwd` was traced assuming that every output has a nonzero
+                # cotangent, so materialise any symbolic zeros.
+                grad_leaves = [
+                    jnp.zeros(s.shape, s.dtype)
+                    if isinstance(ct, jax.custom_derivatives.SymbolicZero)
+                    else ct
+                    for ct, s in zip(jtu.tree_leaves(grad_diff_array_out), grad_structs)
+                ]
+                grad_leaves = [x for x, u in zip(grad_leaves, used_grads) if u]
+                out = jax.core.eval_jaxpr(bwd_jaxpr, [], *saved, *grad_leaves)
+                out = jtu.tree_unflatten(out_treedef, out)
             # None is the gradient through nondiff_array_vjp_arg and array_args_kwargs
             return out, None, None
 
@@ -1147,6 +1768,140 @@ if getattr(typing, "GENERATING_DOCUMENTATION", False) and not TYPE_CHECKING:
     filter_custom_vjp.__doc__ = _filter_custom_vjp_doc
 
 
+def checkpoint_name(x: PyTree, name: str) -> PyTree:
+    """Tags every array in a PyTree with a name, which can then be referred to by a
+    rematerialisation policy. This is a PyTree-aware version of
+    `jax.ad_checkpoint.checkpoint_name`.
+
+    **Arguments:**
+
+    - `x`: any PyTree.
+    - `name`: the name to tag the arrays of `x` with.
+
+    **Returns:**
+
+    `x`, with each array tagged.
+
+    !!! Example
+
+        ```python
+        @eqx.filter_checkpoint(policy=eqx.checkpoint_policy(save_names=["attn"]))
+        def f(x):
+            x = eqx.checkpoint_name(attention(x), "attn")
+            return mlp(x)
+        ```
+    """
+    return jtu.tree_map(
+        lambda y: jax.ad_checkpoint.checkpoint_name(y, name) if is_array(y) else y, x
+    )
+
+
+class _NamedPolicy(Module):
+    save_scopes: tuple[str, ...] = field(static=True)
+    save_names: tuple[str, ...] = field(static=True)
+
+    def __call__(self, prim, *avals, **params) -> bool:
+        policy = jax.checkpoint_policies.save_only_these_names(
+            *self.save_scopes, *self.save_names
+        )
+        return policy(prim, *avals, **params)
+
+
+def checkpoint_policy(
+    *, save_scopes: Sequence[str] = (), save_names: Sequence[str] = ()
+) -> Callable[..., bool]:
+    """Creates a rematerialisation policy for [`equinox.filter_checkpoint`][], which
+    saves only certain values for the backward pass, and recomputes everything else.
+
+    **Arguments:**
+
+    - `save_scopes`: the outputs of the layers of `equinox.nn` with these names are
+        saved. Every layer sets a scope named after itself: for example
+        `save_scopes=["eqx.nn.Linear"]` will save the output of every
+        [`equinox.nn.Linear`][], whilst recomputing e.g. normalisation layers and
+        activation functions. This includes layers called inside `jax.lax.scan`,
+        `jax.lax.cond` etc. A `ValueError` is raised if no layer with one of these
+        names is called.
+    - `save_names`: any values tagged with one of these names, via
+        [`equinox.checkpoint_name`][], are saved.
+
+    **Returns:**
+
+    A policy, which should be passed as `eqx.filter_checkpoint(..., policy=...)`.
+
+    !!! Info
+
+        Only the return value of each such layer is saved, not any intermediate values
+        computed inside it. Scopes created directly with `jax.named_scope` are not
+        detected: instead, tag such values with [`equinox.checkpoint_name`][] and pass
+        `save_names`.
+    """
+    if isinstance(save_scopes, str) or isinstance(save_names, str):
+        raise ValueError("`save_scopes` and `save_names` must be sequences of strings.")
+    return _NamedPolicy(tuple(save_scopes), tuple(save_names))
+
+
+class _ScopeTags:
+    """The scopes whose outputs are being tagged, whilst tracing a function wrapped in
+    [`equinox.filter_checkpoint`][] with a `save_scopes` policy.
+    """
+
+    def __init__(self, scopes: tuple[str, ...]):
+        self.scopes = frozenset(scopes)
+        self.seen = set()
+
+
+_scope_tags: contextvars.ContextVar[Optional[_ScopeTags]] = contextvars.ContextVar(
+    "_scope_tags", default=None
+)
+
+
+def named_scope(name: str) -> Callable[[Callable[_P, _T]], Callable[_P, _T]]:
+    """As `jax.named_scope`, used as a decorator. Additionally, if the scope is selected
+    by an enclosing `eqx.filter_checkpoint(..., policy=eqx.checkpoint_policy(
+    save_scopes=...))`, then the output of the function is tagged with `name` at trace
+    time, so that the policy saves it. This is how the layers of `equinox.nn` set their
+    scope.
+    """
+
+    def _decorator(fn: Callable[_P, _T]) -> Callable[_P, _T]:
+        scoped_fn = jax.named_scope(name)(fn)
+
+        @ft.wraps(fn)
+        def _wrapper(*args: _P.args, **kwargs: _P.kwargs) -> _T:
+            out = scoped_fn(*args, **kwargs)
+            tags = _scope_tags.get()
+            if tags is not None and name in tags.scopes:
+                tags.seen.add(name)
+                out = checkpoint_name(out, name)
+            return out
+
+        return _wrapper
+
+    return _decorator
+
+
+def _tag_scope_outputs(fun, scopes, args, kwargs):
+    # Call `fun` whilst the outputs of each scope are tagged with `checkpoint_name`, so
+    # that they can be picked out by the policy.
+    tags = _ScopeTags(scopes)
+    token = _scope_tags.set(tags)
+    try:
+        out = fun(*args, **kwargs)
+    finally:
+        _scope_tags.reset(token)
+    missing = tags.scopes - tags.seen
+    if len(missing) > 0:
+        raise ValueError(
+            f"`eqx.checkpoint_policy(save_scopes=...)` got the scopes {sorted(missing)}"
+            ", which were not entered whilst tracing the checkpointed function. (Only "
+            "the layers of `equinox.nn`, which are named e.g. `'eqx.nn.Linear'`, set a "
+            "scope. Other values can be tagged with `eqx.checkpoint_name` and saved "
+            "with `save_names`.)"
+        )
+    return out
+
+
 def filter_checkpoint(
     fun: Callable[_P, _T] = sentinel,
     *,
@@ -1167,7 +1922,8 @@ def filter_checkpoint(
     subexpression elimination. Please see the documentation for `jax.checkpoint
     ` for more details.
     - `policy`: Callable for controlling which intermediate values should be
-    rematerialized. It should be one of the attributes of `jax.checkpoint_policies`.
+    rematerialized. It should be either one of the attributes of
+    `jax.checkpoint_policies`, or a policy created by [`equinox.checkpoint_policy`][].
     """
 
     if fun is sentinel:
@@ -1211,7 +1967,12 @@ class _CheckpointWrapper(Module):
         )
         def fun_checkpoint(_static, _dynamic):
             _args, _kwargs = combine(_static, _dynamic)
-            out = self._fun(*_args, **_kwargs)
+            if isinstance(self._policy, _NamedPolicy) and self._policy.save_scopes:
+                out = _tag_scope_outputs(
+                    self._fun, self._policy.save_scopes, _args, _kwargs
+                )
+            else:
+                out = self._fun(*_args, **_kwargs)
             _dynamic_out, _static_out = partition(out, is_array)
             return _dynamic_out, Static(_static_out)
 
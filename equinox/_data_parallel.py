@@ -0,0 +1,134 @@
+from collections.abc import Callable, Hashable
+from typing import Any, Optional
+
+import jax.tree_util as jtu
+from jax.sharding import Mesh, NamedSharding, PartitionSpec
+from jaxtyping import PyTree
+
+from ._ad import filter_value_and_grad
+from ._filters import filter, is_array, is_inexact_array
+from ._jit import filter_jit
+from ._sharding import filter_shard
+from ._update import apply_updates
+
+
+def _zero_sharding(x: Any, mesh: Mesh, axis_name: Hashable) -> Optional[NamedSharding]:
+    # ZeRO-1: split each array of optimiser state along its first axis that is divisible
+    # by the number of data-parallel replicas. Replicate it if there is no such axis.
+    if not is_array(x):
+        return None
+    num_replicas = mesh.shape[axis_name]
+    for i, size in enumerate(x.shape):
+        if size % num_replicas == 0:
+            spec = (None,) * i + (axis_name,)
+            return NamedSharding(mesh, PartitionSpec(*spec))
+    return NamedSharding(mesh, PartitionSpec())
+
+
+def make_data_parallel_step(
+    loss_fn: Callable[..., Any],
+    optimizer_update: Callable[[PyTree, PyTree, PyTree], tuple[PyTree, PyTree]],
+    mesh: Mesh,
+    *,
+    axis_name: Optional[Hashable] = None,
+    has_aux: bool = False,
+    shard_optimizer_state: bool = False,
+) -> Callable[..., tuple[PyTree, PyTree, Any]]:
+    """Builds a JIT-compiled data-parallel training step.
+
+    Each step: shards the batch across the devices of `mesh`, replicates the model,
+    computes the loss and its gradients (with the gradients all-reduced across
+    devices), and then updates the model and optimiser state. The buffers of the input
+    model and optimiser state are donated, so that they can be updated in-place.
+
+    **Arguments:**
+
+    - `loss_fn`: the loss function. Will be called as `loss_fn(model, *batch)`, and
+        should return a scalar (or a 2-tuple of scalar and auxiliary data, if
+        `has_aux=True`). It is differentiated with respect to all floating-point arrays
+        in `model`. It should average (not sum) over the batch, so that the result is
+        independent of the number of devices.
+    - `optimizer_update`: called as
+        `optimizer_update(grads, opt_state, eqx.filter(model, eqx.is_inexact_array))`,
+        and should return a 2-tuple of `(updates, new_opt_state)`. For example the
+        `update` method of an [Optax](https://github.com/deepmind/optax) optimiser.
+    - `mesh`: the `jax.sharding.Mesh` of devices to parallelise over.
+    - `axis_name`: the axis of `mesh` to split the batch along. May be omitted if
+        `mesh` only has a single axis.
+    - `has_aux`: whether `loss_fn` returns auxiliary data.
+    - `shard_optimizer_state`: if `True`, then the optimiser state is not replicated
+        but instead split across the data-parallel devices (as in ZeRO stage 1), which
+        reduces its memory usage by a factor of the number of devices. Each array is
+        split along its first axis that is divisible by the number of devices, and
+        replicated if there is no such axis.
+
+    **Returns:**
+
+    A function `step(model, opt_state, *batch) -> (model, opt_state, loss)`. (Where
+    `loss` is a 2-tuple of `(loss, aux)` if `has_aux=True`.) Every JAX array in `batch`
+    is split across devices along its leading axis, whose size must be divisible by the
+    number of devices. The input `model` and `opt_state` should not be used again after
+    the call, as their buffers are donated.
+
+    !!! Example
+
+        ```python
+        import optax
+        from jax.sharding import Mesh
+
+        mesh = Mesh(jax.devices(), ("data",))
+        optim = optax.adam(1e-3)
+        opt_state = optim.init(eqx.filter(model, eqx.is_inexact_array))
+
+        def loss_fn(model, x, y):
+            return jnp.mean((jax.vmap(model)(x) - y) ** 2)
+
+        step = eqx.make_data_parallel_step(loss_fn, optim.update, mesh)
+        for x, y in dataloader:
+            model, opt_state, loss = step(model, opt_state, x, y)
+        ```
+    """
+    if axis_name is None:
+        if len(mesh.axis_names) != 1:
+            raise ValueError(
+                "`axis_name` must be passed if `mesh` has more than one axis."
+            )
+        [axis_name] = mesh.axis_names
+    replicated = NamedSharding(mesh, PartitionSpec())
+    data_sharding = NamedSharding(mesh, PartitionSpec(axis_name))
+
+    def _shard_opt_state(opt_state):
+        if shard_optimizer_state:
+            shardings = jtu.tree_map(
+                lambda x: _zero_sharding(x, mesh, axis_name), opt_state
+            )
+            return filter_shard(opt_state, shardings)
+        else:
+            return filter_shard(opt_state, replicated)
+
+    # Everything except the batch (the first argument) is donated.
+    @filter_jit(donate="all-except-first")
+    def _step(batch, model, opt_state):
+        batch = filter_shard(batch, data_sharding)
+        model = filter_shard(model, replicated)
+        opt_state = _shard_opt_state(opt_state)
+        loss, grads = filter_value_and_grad(loss_fn, has_aux=has_aux)(model, *batch)
+        grads = filter_shard(grads, replicated)
+        params = filter(model, is_inexact_array)
+        updates, opt_state = optimizer_update(grads, opt_state, params)
+        model = apply_updates(model, updates)
+        model = filter_shard(model, replicated)
+        opt_state = _shard_opt_state(opt_state)
+        return model, opt_state, loss
+
+    def step(model, opt_state, *batch):
+        num_replicas = mesh.shape[axis_name]
+        for x in jtu.tree_leaves(batch):
+            if is_array(x) and (x.ndim == 0 or x.shape[0] % num_replicas != 0):
+                raise ValueError(
+                    "Every array in the batch must have a leading axis whose size is "
+                    f"divisible by the number of devices ({num_replicas})."
+                )
+        return _step(batch, model, opt_state)
+
+    return step
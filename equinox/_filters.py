@@ -77,6 +77,25 @@ def _make_filter_tree(is_leaf):
     return _filter_tree
 
 
+_leaf_treedef = jtu.tree_structure(0)
+
+
+def _flat_mask(
+    pytree: PyTree, filter_spec: PyTree[AxisSpec], is_leaf
+) -> Optional[tuple[list[Any], list[bool], Any]]:
+    # Fast path for the common case of a single boolean or callable `filter_spec`
+    # (e.g. `eqx.is_array`): flatten `pytree` once and evaluate the mask over its
+    # leaves, rather than performing several `tree_map`s over the full structure.
+    # Returns `None` if `filter_spec` is itself a nontrivial PyTree.
+    if isinstance(filter_spec, bool):
+        leaves, treedef = jtu.tree_flatten(pytree, is_leaf=is_leaf)
+        return leaves, [filter_spec] * len(leaves), treedef
+    if callable(filter_spec) and jtu.tree_structure(filter_spec) == _leaf_treedef:
+        leaves, treedef = jtu.tree_flatten(pytree, is_leaf=is_leaf)
+        return leaves, [filter_spec(x) for x in leaves], treedef
+    return None
+
+
 def filter(
     pytree: PyTree,
     filter_spec: PyTree[AxisSpec],
@@ -126,6 +145,13 @@ def filter(
     """
 
     inverse = bool(inverse)  # just in case, to make the != trick below work reliably
+    flat = _flat_mask(pytree, filter_spec, is_leaf)
+    if flat is not None:
+        leaves, mask, treedef = flat
+        return jtu.tree_unflatten(
+            treedef,
+            [x if bool(m) != inverse else replace for m, x in zip(mask, leaves)],
+        )
     filter_tree = jtu.tree_map(_make_filter_tree(is_leaf), filter_spec, pytree)
     return jtu.tree_map(
         lambda mask, x: x if bool(mask) != inverse else replace, filter_tree, pytree
@@ -146,6 +172,12 @@ def partition(
         See also [`equinox.combine`][] to reconstitute the PyTree again.
     """
 
+    flat = _flat_mask(pytree, filter_spec, is_leaf)
+    if flat is not None:
+        leaves, mask, treedef = flat
+        left = [x if m else replace for m, x in zip(mask, leaves)]
+        right = [replace if m else x for m, x in zip(mask, leaves)]
+        return jtu.tree_unflatten(treedef, left), jtu.tree_unflatten(treedef, right)
     filter_tree = jtu.tree_map(_make_filter_tree(is_leaf), filter_spec, pytree)
     left = jtu.tree_map(lambda mask, x: x if mask else replace, filter_tree, pytree)
     right = jtu.tree_map(lambda mask, x: replace if mask else x, filter_tree, pytree)
@@ -26,7 +26,7 @@ from ._compile_utils import (
 from ._custom_types import sentinel
 from ._deprecate import deprecated_0_10
 from ._doc_utils import doc_remove_args
-from ._filters import combine, is_array, partition
+from ._filters import is_array
 from ._misc import currently_jitting
 from ._module import field, Module, module_update_wrapper, Partial, Static
 
@@ -53,7 +53,7 @@ def _filter_jit_cache(fun_names, jitkwargs):
         *args, dummy_arg = (first_arg,) + rest_args
         assert dummy_arg is None
         out = fun(*args, **kwargs)
-        dynamic_out, static_out = partition(out, is_array)
+        dynamic_out, static_out = hashable_partition(out, is_array)
         marker = jnp.array(0)
         return marker, dynamic_out, Static(static_out)
 
@@ -105,7 +105,7 @@ def _preprocess(info, args, kwargs, return_static: bool = False):
 
 def _postprocess(out):
     _, dynamic_out, static_out = out
-    return combine(dynamic_out, static_out.value)
+    return hashable_combine(dynamic_out, static_out.value)
 
 
 try:
@@ -0,0 +1,294 @@
+from collections.abc import Callable
+from typing import Any, Optional, Union
+
+import jax
+import jax.numpy as jnp
+import jax.tree_util as jtu
+from jaxtyping import Array, PyTree
+
+from ._ad import filter_grad
+from ._eval_shape import filter_eval_shape
+from ._filters import combine, is_array, is_inexact_array, partition
+from ._module import field, Module
+from ._tree import tree_at
+from .nn import Conv, Embedding, Linear
+
+
+_known_layers = (Linear, Embedding, Conv)
+
+
+def _is_known_layer(x):
+    return isinstance(x, _known_layers)
+
+
+class _TapContext:
+    """Records the calls made to every tapped layer, whilst `fun` is traced for a single
+    example. A fresh context is created for each trace, and is passed explicitly to
+    every `_Tap`.
+    """
+
+    def __init__(self, outer_trace, probes):
+        # Used to tell whether a layer is called directly within `fun`, or inside some
+        # inner transform (e.g. a `jax.vmap` or `jax.lax.scan`).
+        self.outer_trace = outer_trace
+        # `probes[index]` is a list with one entry per call to that layer.
+        self.probes = probes
+        self.inputs: dict[int, list[Array]] = {}
+        self.output_structs: dict[int, list[jax.ShapeDtypeStruct]] = {}
+        self.direct: dict[int, bool] = {}
+
+
+class _Tap(Module):
+    # Wraps a layer whose per-example gradients we know how to compute from its inputs
+    # and output cotangents. When called, it records its input, and adds a zero-valued
+    # "probe" to its output: the gradient with respect to the probe is the cotangent.
+    layer: Module
+    index: int = field(static=True)
+    context: _TapContext = field(static=True)
+
+    def __call__(self, x, *, key=None):
+        out = self.layer(x, key=key)  # pyright: ignore
+        context = self.context
+        direct = jax.core.find_top_trace((x,)) is context.outer_trace
+        context.direct[self.index] = context.direct.get(self.index, True) and direct
+        inputs = context.inputs.setdefault(self.index, [])
+        structs = context.output_structs.setdefault(self.index, [])
+        call = len(inputs)
+        inputs.append(x)
+        structs.append(jax.ShapeDtypeStruct(jnp.shape(out), jnp.result_type(out)))
+        if context.probes is not None:
+            out = out + context.probes[self.index][call]
+        return out
+
+
+def _known_layers_of(model) -> list:
+    leaves = jtu.tree_leaves(model, is_leaf=_is_known_layer)
+    return [x for x in leaves if _is_known_layer(x)]
+
+
+def _tap_layers(model, indices, context):
+    # Replaces the known layers numbered `indices` (in the order of their leaves) with
+    # taps recording into `context`.
+    indices = sorted(indices)
+    if len(indices) == 0:
+        return model
+    layers = _known_layers_of(model)
+    return tree_at(
+        lambda m: [_known_layers_of(m)[i] for i in indices],
+        model,
+        [_Tap(layers[i], i, context) for i in indices],
+    )
+
+
+def _is_tap(x):
+    return isinstance(x, _Tap)
+
+
+def _sum_squares(x) -> Array:
+    return jnp.sum(x**2, axis=tuple(range(1, x.ndim)))
+
+
+def _linear_norm2(layer: Linear, inputs: Array, cotangents: Array) -> Array:
+    # `inputs` has shape `(calls, batch, in)`, `cotangents` has shape
+    # `(calls, batch, out)`. The per-example weight gradient is
+    # `sum_t cotangents[t] inputs[t]^T`, whose squared Frobenius norm is computed
+    # without materialising it.
+    calls, batch = inputs.shape[:2]
+    inputs = inputs.reshape(calls, batch, -1)
+    cotangents = cotangents.reshape(calls, batch, -1)
+    input_gram = jnp.einsum("tbi,sbi->bts", inputs, inputs)
+    cotangent_gram = jnp.einsum("tbo,sbo->bts", cotangents, cotangents)
+    norm2 = jnp.sum(input_gram * cotangent_gram, axis=(1, 2))
+    if layer.use_bias:
+        norm2 = norm2 + _sum_squares(jnp.sum(cotangents, axis=0))
+    return norm2
+
+
+def _embedding_norm2(layer: Embedding, inputs: Array, cotangents: Array) -> Array:
+    # The per-example gradient is `sum_t onehot(inputs[t]) cotangents[t]^T`.
+    del layer
+    same_index = inputs[:, None] == inputs[None, :]  # (calls, calls, batch)
+    cotangent_gram = jnp.einsum("tbo,sbo->tsb", cotangents, cotangents)
+    return jnp.sum(jnp.where(same_index, cotangent_gram, 0), axis=(0, 1))
+
+
+def _conv_norm2(layer: Conv, inputs: Array, cotangents: Array) -> Array:
+    # No outer-product trick here: instead compute each example's weight gradient in
+    # turn, from the stored inputs and cotangents, so that only one is ever in memory.
+    def _norm2(inputs_i, cotangents_i):
+        def _apply(weight):
+            _layer = tree_at(lambda l: l.weight, layer, weight)
+            return jax.vmap(_layer)(inputs_i)
+
+        _, vjp_fn = jax.vjp(_apply, layer.weight)
+        (weight_grad,) = vjp_fn(cotangents_i)
+        norm2 = jnp.sum(weight_grad**2)
+        if layer.use_bias:
+            spatial = tuple(range(2, cotangents_i.ndim))
+            norm2 = norm2 + jnp.sum(jnp.sum(cotangents_i, axis=(0,) + spatial) ** 2)
+        return norm2
+
+    inputs = jnp.swapaxes(inputs, 0, 1)
+    cotangents = jnp.swapaxes(cotangents, 0, 1)
+    return jax.lax.map(lambda ic: _norm2(*ic), (inputs, cotangents))
+
+
+def _layer_norm2(layer, inputs, cotangents):
+    if isinstance(layer, Linear):
+        return _linear_norm2(layer, inputs, cotangents)
+    elif isinstance(layer, Embedding):
+        return _embedding_norm2(layer, inputs, cotangents)
+    else:
+        assert isinstance(layer, Conv)
+        return _conv_norm2(layer, inputs, cotangents)
+
+
+def _split_batch(args, kwargs):
+    batched, unbatched = partition((args, kwargs), is_array)
+    batch_sizes = {x.shape[0] for x in jtu.tree_leaves(batched) if x.ndim > 0}
+    if any(x.ndim == 0 for x in jtu.tree_leaves(batched)) or len(batch_sizes) != 1:
+        raise ValueError(
+            "All arrays in the arguments after the first must have the same size "
+            "leading (batch) axis."
+        )
+    return batched, unbatched
+
+
+def _tapped_norms(fun, model, batched, unbatched):
+    num_layers = len(_known_layers_of(model))
+
+    def _single(_model, _indices, _probes, _batched):
+        _args, _kwargs = combine(_batched, unbatched)
+        _outer_trace = jax.core.find_top_trace(jtu.tree_leaves(_batched))
+        context = _TapContext(_outer_trace, _probes)
+        _model = _tap_layers(_model, _indices, context)
+        _loss = fun(_model, *_args, **_kwargs)
+        return _loss, context
+
+    # First pass: find which known layers are called directly, rather than inside an
+    # inner transform, and the output shape of every such call. Only these are tapped;
+    # the parameters of all other layers are handled with `vmap`, below.
+    example = jtu.tree_map(
+        lambda x: jax.ShapeDtypeStruct(x.shape[1:], x.dtype), batched
+    )
+    context = None
+
+    def _find_calls(_model, _batched):
+        nonlocal context
+        _loss, context = _single(_model, range(num_layers), None, _batched)
+        return _loss
+
+    filter_eval_shape(_find_calls, model, example)
+    assert context is not None
+    indices = [i for i, direct in context.direct.items() if direct]
+    probes = {
+        i: [jnp.zeros(s.shape, s.dtype) for s in context.output_structs[i]]
+        for i in indices
+    }
+    tapped = _tap_layers(model, indices, None)
+    filter_spec = jtu.tree_map(
+        lambda x: False if _is_tap(x) else is_inexact_array(x), tapped, is_leaf=_is_tap
+    )
+    other_params, rest = partition(model, filter_spec)
+
+    # Second pass: a single `vmap`-of-`grad`, giving per-example gradients for the
+    # other parameters, and per-example cotangents for each tapped layer. The inputs to
+    # each tapped layer are returned as auxiliary data.
+    def _loss_and_inputs(_other_params, _probes, _batched):
+        _model = combine(_other_params, rest)
+        _loss, _context = _single(_model, indices, _probes, _batched)
+        return _loss, _context.inputs
+
+    (other_grads, cotangents), inputs = jax.vmap(
+        jax.grad(_loss_and_inputs, argnums=(0, 1), has_aux=True),
+        in_axes=(None, None, 0),
+    )(other_params, probes, batched)
+    norm2 = sum(
+        (_sum_squares(g) for g in jtu.tree_leaves(other_grads)),
+        start=jnp.zeros(()),
+    )
+    taps = [x for x in jtu.tree_leaves(tapped, is_leaf=_is_tap) if _is_tap(x)]
+    for tap in taps:
+        layer_inputs = jnp.stack(inputs[tap.index])
+        layer_cotangents = jnp.stack(cotangents[tap.index])
+        norm2 = norm2 + _layer_norm2(tap.layer, layer_inputs, layer_cotangents)
+    return norm2
+
+
+class _PerExampleGrad(Module):
+    fun: Callable
+    clip_norm: Optional[float]
+
+    @property
+    def __wrapped__(self):
+        return self.fun
+
+    def __call__(self, model, /, *args, **kwargs):
+        batched, unbatched = _split_batch(args, kwargs)
+        norm2 = _tapped_norms(self.fun, model, batched, unbatched)
+        norms = jnp.sqrt(norm2)
+        if self.clip_norm is None:
+            scale = jnp.ones_like(norms)
+        else:
+            scale = jnp.minimum(1, self.clip_norm / jnp.maximum(norms, 1e-12))
+        scale = jax.lax.stop_gradient(scale)
+
+        def _total_loss(_model):
+            def _loss(_batched):
+                _args, _kwargs = combine(_batched, unbatched)
+                return self.fun(_model, *_args, **_kwargs)
+
+            return jnp.sum(scale * jax.vmap(_loss)(batched))
+
+        return norms, filter_grad(_total_loss)(model)
+
+
+def filter_per_example_grad(
+    fun: Callable[..., Any], *, clip_norm: Union[None, float] = None
+) -> Callable[..., tuple[Array, PyTree]]:
+    """Computes the norms of per-example gradients, and the (optionally clipped) sum of
+    the per-example gradients. This is the main computation of e.g. differentially
+    private stochastic gradient descent.
+
+    This is equivalent to, but much more memory efficient than, computing every
+    per-example gradient with `eqx.filter_vmap(eqx.filter_grad(fun))`. Instead:
+
+    - For [`equinox.nn.Linear`][] and [`equinox.nn.Embedding`][] layers, per-example
+        gradient norms are computed from the layer inputs and output cotangents
+        (the "outer-product trick"), without ever materialising a per-example gradient.
+    - For [`equinox.nn.Conv`][] layers, each example's gradient is computed in turn from
+        the layer inputs and output cotangents, so only one is in memory at a time.
+    - For all other parameters, per-example gradients are computed with `jax.vmap`.
+
+    The (clipped) sum is then computed with a second backward pass, with each example
+    reweighted by its clipping factor.
+
+    **Arguments:**
+
+    - `fun`: The loss function for a single example. Will be called as
+        `fun(model, *args, **kwargs)`, and should return a scalar.
+    - `clip_norm`: If not `None`, then each per-example gradient is scaled down to have
+        norm at most `clip_norm` before summing.
+
+    **Returns:**
+
+    A function `(model, *args, **kwargs) -> (norms, grads)`. Every JAX/NumPy array in
+    `args` and `kwargs` should have a leading batch axis of the same size `B`, which is
+    vectorised over. `norms` is an array of shape `(B,)` of per-example gradient norms.
+    `grads` is the sum of the (clipped) per-example gradients, with the same structure
+    as `eqx.filter_grad(fun)(model, ...)`.
+
+    !!! Info
+
+        For the efficient computation, known layers should be called directly on a
+        single example, as in `fun`. If a known layer is instead called inside another
+        transform (e.g. a `jax.vmap` over a sequence, or a `jax.lax.scan`) within `fun`,
+        then the per-example gradients of just that layer are computed with `jax.vmap`.
+        This is decided whilst tracing `fun`, before any gradients are computed.
+
+        Inside `fun`, each layer that is handled efficiently is replaced by a wrapper
+        that records its inputs. So these layers should only be called: other uses,
+        such as `isinstance` checks or reading `model.linear.weight`, will see the
+        wrapper rather than the layer.
+    """
+    return _PerExampleGrad(fun, clip_norm)
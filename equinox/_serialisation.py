@@ -1,6 +1,14 @@
+import concurrent.futures
 import functools as ft
+import json
+import lzma
+import math
+import mmap
+import os
 import pathlib
-from collections.abc import Callable
+import struct
+import zlib
+from collections.abc import Callable, Mapping
 from contextlib import contextmanager
 from typing import Any, BinaryIO, Optional, Union
 
@@ -47,6 +55,346 @@ def _ordered_tree_map(
     return treedef.unflatten(_f(*xs) for xs in zip(*all_leaves))
 
 
+# Besides plain `.npy` data, individual leaves may be stored in one of our own record
+# formats. Each such record starts with its own magic string, which has the same length
+# as the `.npy` magic string, so that we can dispatch on it when loading.
+_NPY_MAGIC = b"\x93NUMPY"
+_SHARDED_MAGIC = b"\x93EQXSH"
+_COMPRESSED_MAGIC = b"\x93EQXCZ"
+
+
+def _peek_magic(f: BinaryIO) -> Optional[bytes]:
+    seekable = getattr(f, "seekable", None)
+    if seekable is None or not seekable():
+        return None
+    magic = f.read(len(_NPY_MAGIC))
+    f.seek(-len(magic), 1)
+    return magic
+
+
+def _write_header(f: BinaryIO, magic: bytes, header: dict) -> None:
+    encoded = json.dumps(header).encode("utf-8")
+    f.write(magic)
+    f.write(struct.pack("<Q", len(encoded)))
+    f.write(encoded)
+
+
+def _read_header(f: BinaryIO, magic: bytes) -> dict:
+    if f.read(len(magic)) != magic:
+        raise ValueError("Corrupt file: unexpected record header.")
+    (length,) = struct.unpack("<Q", f.read(8))
+    return json.loads(f.read(length).decode("utf-8"))
+
+
+def _normalise_index(index: tuple, shape: tuple[int, ...]) -> tuple:
+    # Converts a tuple of slices (as used by `jax.Array.addressable_shards` and
+    # `jax.make_array_from_callback`) into a tuple of `(start, stop)` pairs.
+    out = []
+    for slc, size in zip(index, shape):
+        start, stop, step = slc.indices(size)
+        assert step == 1
+        out.append((start, stop))
+    return tuple(out)
+
+
+# The amount of data that is read from disk at a time, when converting dtypes whilst
+# loading.
+_CHUNK_BYTES = 2**24
+
+
+def _write_bytes(f: BinaryIO, x: np.ndarray) -> None:
+    f.write(np.ascontiguousarray(x).reshape(-1).view(np.uint8).data)
+
+
+def _save_shards(f: BinaryIO, x: jax.Array) -> None:
+    # Only the shards addressable from this process are saved, and each distinct
+    # region of the array is saved only once (even if it is replicated across multiple
+    # devices).
+    shards = {}
+    for shard in x.addressable_shards:
+        index = _normalise_index(shard.index, x.shape)
+        if index not in shards:
+            shards[index] = shard
+    header = dict(
+        shape=list(x.shape),
+        dtype=jnp.dtype(x.dtype).name,
+        shards=[[list(bounds) for bounds in index] for index in shards.keys()],
+    )
+    _write_header(f, _SHARDED_MAGIC, header)
+    for shard in shards.values():
+        _write_bytes(f, np.asarray(shard.data))
+
+
+def _read_region(
+    f: BinaryIO, offset: int, shape: list[int], dtype, index: tuple, out: np.ndarray
+) -> None:
+    """Reads `data[index]` into `out` (converting its dtype), where `data` is the
+    C-contiguous array of shape `shape` and dtype `dtype` stored at `offset`. At most
+    `_CHUNK_BYTES` (or one element) is read from disk at a time.
+    """
+    nbytes = math.prod(shape) * dtype.itemsize
+    if len(shape) == 0 or nbytes <= _CHUNK_BYTES:
+        f.seek(offset)
+        data = np.frombuffer(f.read(nbytes), dtype).reshape(shape)
+        out[...] = data[index]
+        return
+    first, *rest = index
+    start, stop, _ = first.indices(shape[0])
+    row_shape = shape[1:]
+    row_bytes = math.prod(row_shape) * dtype.itemsize
+    if row_bytes <= _CHUNK_BYTES:
+        # Read as many rows (of the leading dimension) as fit in a chunk at a time.
+        num_rows = _CHUNK_BYTES // row_bytes
+        for lo in range(start, stop, num_rows):
+            hi = min(lo + num_rows, stop)
+            f.seek(offset + lo * row_bytes)
+            data = np.frombuffer(f.read((hi - lo) * row_bytes), dtype)
+            data = data.reshape([hi - lo] + row_shape)
+            out[lo - start : hi - start] = data[(slice(None),) + tuple(rest)]
+    else:
+        # Each row is itself too large, so recurse into it.
+        for i in range(start, stop):
+            _read_region(
+                f, offset + i * row_bytes, row_shape, dtype, tuple(rest), out[i - start]
+            )
+
+
+def _load_block(
+    f: BinaryIO, offset: int, header: dict, index: tuple, dtype, out_dtype
+) -> np.ndarray:
+    """Loads the region `index` of a sharded record, by reading just those saved shards
+    that overlap with it. Data is converted to `out_dtype` in chunks as it is read.
+    """
+    block = np.empty([stop - start for start, stop in index], out_dtype)
+    filled = 0
+    for saved in header["shards"]:
+        saved_shape = [stop - start for start, stop in saved]
+        nbytes = math.prod(saved_shape) * dtype.itemsize
+        overlap = [
+            (max(start, saved_start), min(stop, saved_stop))
+            for (start, stop), (saved_start, saved_stop) in zip(index, saved)
+        ]
+        if all(lo < hi for lo, hi in overlap):
+            block_index = tuple(
+                slice(lo - start, hi - start)
+                for (lo, hi), (start, _) in zip(overlap, index)
+            )
+            saved_index = tuple(
+                slice(lo - saved_start, hi - saved_start)
+                for (lo, hi), (saved_start, _) in zip(overlap, saved)
+            )
+            _read_region(
+                f, offset, saved_shape, dtype, saved_index, block[block_index + (...,)]
+            )
+            filled += math.prod(hi - lo for lo, hi in overlap)
+        offset += nbytes
+    if filled != block.size:
+        raise RuntimeError(
+            f"Region {index} of a sharded array is not available in this file. (Was it "
+            "saved by a different process?)"
+        )
+    return block
+
+
+def _load_shards(
+    f: BinaryIO, sharding: Optional[jax.sharding.Sharding], out_dtype=None
+) -> Union[np.ndarray, jax.Array]:
+    header = _read_header(f, _SHARDED_MAGIC)
+    offset = f.tell()
+    shape = tuple(header["shape"])
+    dtype = jnp.dtype(header["dtype"])
+    if out_dtype is None:
+        out_dtype = dtype
+    end = offset + sum(
+        math.prod(stop - start for start, stop in saved) * dtype.itemsize
+        for saved in header["shards"]
+    )
+    full_index = tuple((0, size) for size in shape)
+    if sharding is None:
+        out = _load_block(f, offset, header, full_index, dtype, out_dtype)
+    else:
+        # Each device reads just its own region directly from the file. We cache by
+        # index, to avoid reading replicated regions more than once.
+        blocks = {}
+
+        def _callback(index):
+            index = _normalise_index(index, shape)
+            try:
+                block = blocks[index]
+            except KeyError:
+                block = blocks[index] = _load_block(
+                    f, offset, header, index, dtype, out_dtype
+                )
+            return block
+
+        out = jax.make_array_from_callback(shape, sharding, _callback)
+    f.seek(end)
+    return out
+
+
+_CODECS = {
+    "zlib": (
+        lambda data, level: zlib.compress(data, -1 if level is None else level),
+        zlib.decompress,
+    ),
+    "lzma": (
+        lambda data, level: lzma.compress(data, preset=level),
+        lzma.decompress,
+    ),
+}
+
+
+def _thread_map(fn: Callable, items: list, max_workers: Optional[int]) -> list:
+    # Both `zlib` and `lzma` release the GIL, so threads give a real speedup.
+    if len(items) <= 1 or max_workers == 1:
+        return [fn(item) for item in items]
+    with concurrent.futures.ThreadPoolExecutor(max_workers) as executor:
+        return list(executor.map(fn, items))
+
+
+def _shuffle(data: np.ndarray) -> bytes:
+    # Byte-shuffling groups together the first byte of every element, then the second
+    # byte of every element, etc. For floating-point data this places the (highly
+    # compressible) sign and exponent bytes next to each other.
+    return data.reshape(-1).view(np.uint8).reshape(-1, data.itemsize).T.tobytes()
+
+
+def _unshuffle(data: bytes, dtype) -> np.ndarray:
+    itemsize = dtype.itemsize
+    array = np.frombuffer(data, np.uint8).reshape(itemsize, -1).T
+    return np.ascontiguousarray(array).view(dtype).reshape(-1)
+
+
+def _save_compressed(
+    f: BinaryIO,
+    x: np.ndarray,
+    codec: str,
+    level: Optional[int],
+    chunk_bytes: int,
+    max_workers: Optional[int],
+) -> None:
+    compress, _ = _CODECS[codec]
+    flat = np.ascontiguousarray(x).reshape(-1)
+    chunk_size = max(1, chunk_bytes // flat.itemsize)
+    chunks = [flat[i : i + chunk_size] for i in range(0, flat.size, chunk_size)]
+    compressed = _thread_map(
+        lambda chunk: compress(_shuffle(chunk), level), chunks, max_workers
+    )
+    header = dict(
+        shape=list(x.shape),
+        dtype=jnp.dtype(x.dtype).name,
+        codec=codec,
+        chunk_size=chunk_size,
+        chunks=[len(data) for data in compressed],
+    )
+    _write_header(f, _COMPRESSED_MAGIC, header)
+    for data in compressed:
+        f.write(data)
+
+
+class _CompressedRecord:
+    """A compressed array in a file. Every chunk may be decompressed independently, so
+    that any range of elements may be read without decompressing the whole array.
+    """
+
+    def __init__(self, f: BinaryIO, max_workers: Optional[int] = None):
+        header = _read_header(f, _COMPRESSED_MAGIC)
+        self.f = f
+        self.shape = tuple(header["shape"])
+        self.dtype = jnp.dtype(header["dtype"])
+        _, self.decompress = _CODECS[header["codec"]]
+        self.chunk_size = header["chunk_size"]
+        self.chunk_nbytes = header["chunks"]
+        self.offsets = [f.tell()]
+        for nbytes in self.chunk_nbytes:
+            self.offsets.append(self.offsets[-1] + nbytes)
+        self.max_workers = max_workers
+
+    @property
+    def end(self) -> int:
+        return self.offsets[-1]
+
+    def read(self, start: int, stop: int, out_dtype) -> np.ndarray:
+        """Returns the flattened elements `start:stop`, with dtype `out_dtype`."""
+        out = np.empty(stop - start, out_dtype)
+        if start == stop:
+            return out
+        first = start // self.chunk_size
+        last = (stop - 1) // self.chunk_size
+        # Decompress `max_workers` chunks at a time, to bound the memory used.
+        batch_size = self.max_workers or os.cpu_count() or 1
+        for batch_start in range(first, last + 1, batch_size):
+            batch = range(batch_start, min(batch_start + batch_size, last + 1))
+            compressed = []
+            for i in batch:
+                self.f.seek(self.offsets[i])
+                compressed.append(self.f.read(self.chunk_nbytes[i]))
+            chunks = _thread_map(
+                lambda data: _unshuffle(self.decompress(data), self.dtype),
+                compressed,
+                self.max_workers,
+            )
+            for i, chunk in zip(batch, chunks):
+                chunk_start = i * self.chunk_size
+                lo = max(start, chunk_start)
+                hi = min(stop, chunk_start + chunk.size)
+                out[lo - start : hi - start] = chunk[
+                    lo - chunk_start : hi - chunk_start
+                ]
+        return out
+
+    def read_block(self, index: tuple, out_dtype) -> np.ndarray:
+        """Returns the region `index` (a tuple of `(start, stop)` pairs)."""
+        if len(self.shape) == 0:
+            return self.read(0, 1, out_dtype).reshape(())
+        # Decompress just those chunks covering the rows of the leading dimension.
+        (start, stop), *rest = index
+        row_size = math.prod(self.shape[1:])
+        rows = self.read(start * row_size, stop * row_size, out_dtype)
+        rows = rows.reshape((stop - start,) + self.shape[1:])
+        return rows[(slice(None),) + tuple(slice(lo, hi) for lo, hi in rest)]
+
+
+def _load_compressed(
+    f: BinaryIO, sharding: Optional[jax.sharding.Sharding], out_dtype=None
+) -> Union[np.ndarray, jax.Array]:
+    record = _CompressedRecord(f)
+    if out_dtype is None:
+        out_dtype = record.dtype
+    if sharding is None:
+        out = record.read(0, math.prod(record.shape), out_dtype)
+        out = out.reshape(record.shape)
+    else:
+        # As in `_load_shards`, cache by index so that replicated regions are only
+        # decompressed once.
+        blocks = {}
+
+        def _callback(index):
+            index = _normalise_index(index, record.shape)
+            try:
+                block = blocks[index]
+            except KeyError:
+                block = blocks[index] = record.read_block(index, out_dtype)
+            return block
+
+        out = jax.make_array_from_callback(record.shape, sharding, _callback)
+    f.seek(record.end)
+    return out
+
+
+def _load_record(
+    f: BinaryIO, sharding: Optional[jax.sharding.Sharding], out_dtype
+) -> Union[np.ndarray, jax.Array]:
+    """Loads an array, converting it to `out_dtype` as it is read."""
+    magic = _peek_magic(f)
+    if magic == _SHARDED_MAGIC:
+        return _load_shards(f, sharding, out_dtype)
+    elif magic == _COMPRESSED_MAGIC:
+        return _load_compressed(f, sharding, out_dtype)
+    else:
+        return _load_npy_as(f, out_dtype)
+
+
 def default_serialise_filter_spec(f: BinaryIO, x: Any) -> None:
     """Default filter specification for serialising a leaf.
 
@@ -91,6 +439,115 @@ def default_serialise_filter_spec(f: BinaryIO, x: Any) -> None:
         pass
 
 
+def sharded_serialise_filter_spec(f: BinaryIO, x: Any) -> None:
+    """Filter specification for serialising a leaf, which saves JAX arrays shard by
+    shard.
+
+    Unlike [`equinox.default_serialise_filter_spec`][], which gathers every JAX array
+    onto a single host before saving it, this saves only those shards of each array
+    that are addressable from the current process, together with metadata describing
+    which region of the array each shard covers. Regions that are replicated across
+    several devices are only saved once. All other leaves are saved as in
+    [`equinox.default_serialise_filter_spec`][].
+
+    **Arguments**
+
+    -   `f`: file-like object
+    -   `x`: The leaf to be saved on the disk.
+
+    **Returns**
+
+    Nothing.
+
+    !!! example
+
+        ```python
+        model = eqx.filter_shard(model, shardings)
+        eqx.tree_serialise_leaves(
+            f"model.{jax.process_index()}.eqx",
+            model,
+            filter_spec=eqx.sharded_serialise_filter_spec,
+        )
+        ...
+        like = eqx.filter_eval_shape(Model, ...)
+        model = eqx.tree_deserialise_leaves(
+            f"model.{jax.process_index()}.eqx", like, shardings=shardings
+        )
+        ```
+
+    !!! info
+
+        In a multi-process setting, each process should save to its own file. When
+        loading, each process then reads from its own file, so the regions of each
+        array that are addressable from a process must have been saved by that same
+        process. (This is always the case when the same devices are used for saving
+        and loading, whilst the shardings themselves are free to change.)
+
+        Loading reads each region directly from the file, which requires the file to
+        be seekable.
+    """
+    if isinstance(x, jax.Array):
+        _save_shards(f, x)
+    else:
+        default_serialise_filter_spec(f, x)
+
+
+def compressed_serialise_filter_spec(
+    f: BinaryIO,
+    x: Any,
+    *,
+    codec: str = "zlib",
+    level: Optional[int] = None,
+    chunk_bytes: int = 2**22,
+    max_workers: Optional[int] = None,
+) -> None:
+    """Filter specification for serialising a leaf, which compresses JAX and NumPy
+    arrays.
+
+    Each array is split into chunks, the bytes of each chunk are shuffled (so that the
+    first byte of every element is stored together, then the second byte of every
+    element, etc.) and then every chunk is compressed independently, in parallel
+    threads. Byte-shuffling typically makes floating-point weights significantly more
+    compressible. All other leaves are saved as in
+    [`equinox.default_serialise_filter_spec`][].
+
+    Compressed arrays are decompressed automatically by
+    [`equinox.default_deserialise_filter_spec`][]. As every chunk may be decompressed
+    independently, then partial loads (such as reading just one shard of an array,
+    when loading with `tree_deserialise_leaves(..., shardings=...)`) only decompress
+    those chunks that are needed.
+
+    **Arguments**
+
+    -   `f`: file-like object
+    -   `x`: The leaf to be saved on the disk.
+    -   `codec`: Either `"zlib"` or `"lzma"`, from the Python standard library.
+    -   `level`: The compression level passed to the codec. Defaults to the codec's
+        own default.
+    -   `chunk_bytes`: The (uncompressed) size of each chunk, in bytes.
+    -   `max_workers`: The number of threads to compress with. Defaults to the number
+        of CPUs.
+
+    **Returns**
+
+    Nothing.
+
+    !!! example
+
+        ```python
+        filter_spec = ft.partial(eqx.compressed_serialise_filter_spec, codec="lzma")
+        eqx.tree_serialise_leaves("model.eqx", model, filter_spec=filter_spec)
+        model = eqx.tree_deserialise_leaves("model.eqx", model)
+        ```
+    """
+    if codec not in _CODECS:
+        raise ValueError(f"`codec` must be one of {tuple(_CODECS)}, not {codec!r}.")
+    if isinstance(x, (jax.Array, np.ndarray)):
+        _save_compressed(f, np.asarray(x), codec, level, chunk_bytes, max_workers)
+    else:
+        default_serialise_filter_spec(f, x)
+
+
 def default_deserialise_filter_spec(f: BinaryIO, x: Any) -> Any:
     """Default filter specification for deserialising saved data.
 
@@ -122,10 +579,27 @@ def default_deserialise_filter_spec(f: BinaryIO, x: Any) -> Any:
         )
         new_tree = eqx.tree_deserialise_leaves("some_filename.eqx", tree, filter_spec=new_filter_spec)
         ```
+
+    !!! info
+
+        If `x` is a `jax.ShapeDtypeStruct` with a `sharding`, then the loaded array will
+        be placed with that sharding. Arrays that were saved using
+        [`equinox.sharded_serialise_filter_spec`][] are read shard-by-shard, directly
+        onto each device. Arrays that were saved using
+        [`equinox.compressed_serialise_filter_spec`][] are decompressed.
     """  # noqa: E501
     if isinstance(x, (jax.Array, jax.ShapeDtypeStruct)):
-        return jnp.load(f)
+        sharding = x.sharding if isinstance(x, jax.ShapeDtypeStruct) else None
+        if _peek_magic(f) in (_SHARDED_MAGIC, _COMPRESSED_MAGIC):
+            out = _load_record(f, sharding, None)
+            return jnp.asarray(out) if sharding is None else out
+        elif sharding is None:
+            return jnp.load(f)
+        else:
+            return jax.device_put(_np_load(f), sharding)
     elif isinstance(x, np.ndarray):
+        if _peek_magic(f) in (_SHARDED_MAGIC, _COMPRESSED_MAGIC):
+            return _load_record(f, None, None)
         # Important to use `np` here to avoid promoting NumPy arrays to JAX.
         return np.load(f)
     elif is_array_like(x):
@@ -140,6 +614,132 @@ def default_deserialise_filter_spec(f: BinaryIO, x: Any) -> Any:
         return x
 
 
+def _np_load(f: BinaryIO) -> np.ndarray:
+    out = np.load(f)
+    # As in `jnp.load`.
+    if out.dtype == "V2":
+        out = out.view(jax.dtypes.bfloat16)
+    return out
+
+
+def _load_npy_as(f: BinaryIO, out_dtype) -> np.ndarray:
+    """Like `np.load`, but converts to `out_dtype` chunk-by-chunk as the data is read,
+    so that the full array is never held in memory with its original dtype.
+    """
+    version = np.lib.format.read_magic(f)
+    if version == (1, 0):
+        shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(f)
+    else:
+        shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(f)
+    if dtype == "V2":
+        # As in `jnp.load`.
+        dtype = jnp.dtype(jax.dtypes.bfloat16)
+    out = np.empty(math.prod(shape), out_dtype)
+    chunk_size = max(1, _CHUNK_BYTES // dtype.itemsize)
+    for start in range(0, out.size, chunk_size):
+        stop = min(start + chunk_size, out.size)
+        out[start:stop] = np.frombuffer(f.read((stop - start) * dtype.itemsize), dtype)
+    if fortran_order:
+        return out.reshape(shape[::-1]).T
+    else:
+        return out.reshape(shape)
+
+
+def _memmap_npy(f: BinaryIO) -> np.ndarray:
+    """Like `np.load`, but returns a read-only memory-mapped array, whose data is only
+    read from disk when it is accessed.
+    """
+    version = np.lib.format.read_magic(f)
+    if version == (1, 0):
+        shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(f)
+    else:
+        shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(f)
+    if dtype == "V2":
+        dtype = jnp.dtype(jax.dtypes.bfloat16)
+    offset = f.tell()
+    nbytes = math.prod(shape) * dtype.itemsize
+    if nbytes == 0:
+        # Cannot memory-map an empty region.
+        out = np.empty(shape, dtype).view(np.memmap)
+    else:
+        order = "F" if fortran_order else "C"
+        out = np.memmap(
+            f, dtype=dtype, mode="r", offset=offset, shape=shape, order=order
+        )
+    # `np.memmap` moves the file position, so set it explicitly.
+    f.seek(offset + nbytes)
+    return out
+
+
+def _lazy_deserialise(f: BinaryIO, x: Any) -> Any:
+    # Only NumPy leaves are memory-mapped: a JAX leaf should come back as a JAX array,
+    # placed on device once, rather than being copied again on every use.
+    if isinstance(x, np.ndarray) and _peek_magic(f) == _NPY_MAGIC:
+        return _memmap_npy(f)
+    else:
+        return default_deserialise_filter_spec(f, x)
+
+
+class _ConvertDtype:
+    """Marks a leaf of `like` that should be loaded with a different dtype."""
+
+    def __init__(self, like: Union[jax.Array, jax.ShapeDtypeStruct], dtype):
+        self.like = like
+        self.dtype = dtype
+
+    def load(self, f: BinaryIO) -> jax.Array:
+        if isinstance(self.like, jax.ShapeDtypeStruct):
+            sharding = self.like.sharding
+        else:
+            sharding = None
+        out = _load_record(f, sharding, self.dtype)
+        if isinstance(out, jax.Array):
+            return out
+        elif sharding is None:
+            return jnp.asarray(out)
+        else:
+            return jax.device_put(out, sharding)
+
+    @property
+    def expected(self) -> jax.ShapeDtypeStruct:
+        return jax.ShapeDtypeStruct(self.like.shape, self.dtype)
+
+
+def _path_matches(key: str, path: tuple) -> bool:
+    # Matches if `key` refers to the leaf itself or to any node containing it.
+    return any(jtu.keystr(path[:i]) == key for i in range(len(path) + 1))
+
+
+def _mapping_dtype(dtype_policy: Mapping, path: tuple, x: Any) -> Any:
+    for key, dtype in dtype_policy.items():
+        if isinstance(key, str):
+            if _path_matches(key, path):
+                return dtype
+        elif key(x):
+            return dtype
+    return None
+
+
+def _resolve_dtype_policy(dtype_policy):
+    def _resolve(path, x):
+        if not isinstance(x, (jax.Array, jax.ShapeDtypeStruct)):
+            return x
+        if isinstance(dtype_policy, Mapping):
+            dtype = _mapping_dtype(dtype_policy, path, x)
+        elif callable(dtype_policy) and not isinstance(dtype_policy, type):
+            dtype = dtype_policy(path, x)
+        elif jnp.issubdtype(x.dtype, jnp.floating):
+            dtype = dtype_policy
+        else:
+            dtype = None
+        if dtype is None or jnp.dtype(dtype) == x.dtype:
+            return x
+        else:
+            return _ConvertDtype(x, jnp.dtype(dtype))
+
+    return _resolve
+
+
 def _with_suffix(path):
     path = pathlib.Path(path)
     if path.suffix == "":
@@ -162,12 +762,24 @@ def _maybe_open(path_or_file: Union[str, pathlib.Path, BinaryIO], mode: str):
         yield path_or_file
 
 
-def _assert_same(array_impl_type):
+@contextmanager
+def _maybe_open_exact(path_or_file: Union[str, pathlib.Path, BinaryIO], mode: str):
+    """As `_maybe_open`, but without changing the suffix of the path."""
+    if isinstance(path_or_file, (str, pathlib.Path)):
+        with open(path_or_file, mode) as file:
+            yield file
+    else:
+        yield path_or_file
+
+
+def _assert_same(array_impl_type, lazy):
     def _assert_same_impl(path, new, old):
         typenew = type(new)
         typeold = type(old)
         if typeold is jax.ShapeDtypeStruct:
             typeold = array_impl_type
+        if lazy and typenew is np.memmap and typeold is np.ndarray:
+            typeold = np.memmap
         if typenew is not typeold:
             raise RuntimeError(
                 f"Deserialised leaf at path '{jtu.keystr(path)}' has changed type from "
@@ -250,6 +862,16 @@ def tree_deserialise_leaves(
     like: PyTree,
     filter_spec=default_deserialise_filter_spec,
     is_leaf: Optional[Callable[[Any], bool]] = None,
+    *,
+    shardings: Optional[PyTree[jax.sharding.Sharding]] = None,
+    dtype_policy: Union[
+        None,
+        jnp.dtype,
+        type,
+        Callable[[tuple, Any], Optional[jnp.dtype]],
+        Mapping[Union[str, Callable[[Any], bool]], Any],
+    ] = None,
+    lazy: bool = False,
 ) -> PyTree:
     """Load the leaves of a PyTree from a file.
 
@@ -266,6 +888,47 @@ def tree_deserialise_leaves(
         value from `like`. (See [`equinox.default_deserialise_filter_spec`][].)
     - `is_leaf`: Called on every node of `like`; if `True` then this node will be
         treated as a leaf.
+    - `shardings`: Optional PyTree of `jax.sharding.Sharding`s, specifying where to
+        place each loaded JAX array. As with [`equinox.filter_shard`][], the structure
+        should be a prefix of `like`. (And leaves of `like` that are not JAX arrays
+        are unaffected.) When used in conjunction with
+        [`equinox.sharded_serialise_filter_spec`][], then each device will read just
+        its own region of every array directly from the file.
+    - `dtype_policy`: Optionally converts JAX arrays to a different dtype as they are
+        loaded. This may be either:
+
+        - a dtype, in which case every floating-point JAX array will be converted to
+            that dtype;
+        - a function `(path, leaf) -> Optional[dtype]`, which is called on every JAX
+            array of `like` (which may be a `jax.ShapeDtypeStruct`) together with its
+            key path, and returns the dtype to convert that leaf to, or `None` to not
+            convert it;
+        - a mapping from keys to dtypes. Each key is either a string, matching the
+            leaf at that key path (as given by `jax.tree_util.keystr`, e.g.
+            `".layers[0]"`) or any leaf inside it, or a filter function
+            `leaf -> bool`, called on every JAX array of `like` (which may be a
+            `jax.ShapeDtypeStruct`). Each leaf is converted to the dtype of the first
+            key that matches it, and is not converted if no key matches.
+
+        The dtype of a leaf of `like` is its dtype on disk. Leaves are converted in
+        chunks as they are read from the file, so that the full-precision array is
+        never materialised in memory. Converted leaves are always loaded in this way,
+        without calling `filter_spec`.
+    - `lazy`: If `True`, then those leaves of `like` that are NumPy arrays are not read
+        from disk whilst loading. Instead they are returned as read-only memory-mapped
+        NumPy arrays (`np.memmap`), whose data is only read when it is first accessed.
+        This makes loading very fast, and means that memory is only used for those
+        arrays that are actually touched. JAX array (and `jax.ShapeDtypeStruct`)
+        leaves are unaffected, and are loaded onto the device as usual. Only those
+        leaves that would otherwise be loaded by
+        [`equinox.default_deserialise_filter_spec`][] are loaded lazily.
+        `path_or_file` must refer to a file on disk.
+
+        !!! Tip
+
+            A memory-mapped array is copied onto the device every time it is passed to
+            a JAX function. If it is used repeatedly, convert it once with
+            `jnp.asarray` after loading.
 
     **Returns:**
 
@@ -316,19 +979,222 @@ def tree_deserialise_leaves(
         should be a prefix of `pytree`, and each function will be mapped over the
         corresponding sub-PyTree of `pytree`.
     """  # noqa: E501
+    if shardings is None:
+        load_like = like
+    else:
+
+        def _with_sharding(sharding, x):
+            def __with_sharding(y):
+                if isinstance(y, (jax.Array, jax.ShapeDtypeStruct)):
+                    return jax.ShapeDtypeStruct(y.shape, y.dtype, sharding=sharding)
+                else:
+                    return y
+
+            return jtu.tree_map(__with_sharding, x, is_leaf=is_leaf)
+
+        load_like = jtu.tree_map(_with_sharding, shardings, like, is_leaf=is_leaf)
+    if dtype_policy is not None:
+        load_like = jtu.tree_map_with_path(
+            _resolve_dtype_policy(dtype_policy), load_like, is_leaf=is_leaf
+        )
     with _maybe_open(path_or_file, "rb") as f:
+        if lazy:
+            try:
+                f.fileno()
+            except (AttributeError, OSError) as e:
+                raise ValueError(
+                    "`tree_deserialise_leaves(..., lazy=True)` requires a file on disk."
+                ) from e
 
         def _deserialise(spec, x):
+            if lazy and spec is default_deserialise_filter_spec:
+                spec = _lazy_deserialise
+
             def __deserialise(y):
-                return spec(f, y)
+                if isinstance(y, _ConvertDtype):
+                    return y.load(f)
+                else:
+                    return spec(f, y)
 
             return _ordered_tree_map(__deserialise, x, is_leaf=is_leaf)
 
-        out = _ordered_tree_map(_deserialise, filter_spec, like)
+        out = _ordered_tree_map(_deserialise, filter_spec, load_like)
     with jax.ensure_compile_time_eval():
         # ArrayImpl isn't a public type, so this is how we get access to it instead.
         # `ensure_compile_time_eval` just in case someone is doing deserialisation
         # inside JIT. Which would be weird, but still.
         array_impl_type = type(jnp.array(0))
-    jtu.tree_map_with_path(_assert_same(array_impl_type), out, like, is_leaf=is_leaf)
+    if dtype_policy is not None:
+        like = jtu.tree_map(
+            lambda y: y.expected if isinstance(y, _ConvertDtype) else y,
+            load_like,
+            is_leaf=is_leaf,
+        )
+    jtu.tree_map_with_path(
+        _assert_same(array_impl_type, lazy), out, like, is_leaf=is_leaf
+    )
     return out
+
+
+_SAFETENSORS_DTYPES = {
+    "bool": "BOOL",
+    "uint8": "U8",
+    "int8": "I8",
+    "uint16": "U16",
+    "int16": "I16",
+    "uint32": "U32",
+    "int32": "I32",
+    "uint64": "U64",
+    "int64": "I64",
+    "float8_e4m3fn": "F8_E4M3",
+    "float8_e5m2": "F8_E5M2",
+    "float16": "F16",
+    "bfloat16": "BF16",
+    "float32": "F32",
+    "float64": "F64",
+}
+_SAFETENSORS_DTYPES_INV = {v: k for k, v in _SAFETENSORS_DTYPES.items()}
+
+
+def _is_safetensor(x: Any) -> bool:
+    return isinstance(x, (jax.Array, jax.ShapeDtypeStruct)) or is_array_like(x)
+
+
+def tree_serialise_safetensors(
+    path_or_file: Union[str, pathlib.Path, BinaryIO],
+    pytree: PyTree,
+    is_leaf: Optional[Callable[[Any], bool]] = None,
+    *,
+    name_fn: Callable[[tuple], str] = jtu.keystr,
+    metadata: Optional[dict[str, str]] = None,
+) -> None:
+    """Save the array leaves of a PyTree to a file in the
+    [safetensors](https://github.com/huggingface/safetensors) format.
+
+    **Arguments:**
+
+    - `path_or_file`: The file location to save values to or a binary file-like object.
+    - `pytree`: The PyTree whose leaves will be saved. All JAX arrays, NumPy arrays and
+        Python bool/int/float are saved; all other leaves are ignored.
+    - `is_leaf`: Called on every node of `pytree`; if `True` then this node will be
+        treated as a leaf.
+    - `name_fn`: Maps the key path of each leaf to the name of the tensor in the file.
+        Defaults to `jax.tree_util.keystr`, e.g. `.layers[0].weight`.
+    - `metadata`: Optional string-to-string dictionary, saved as the file's
+        `__metadata__`.
+
+    **Returns:**
+
+    Nothing.
+
+    !!! example
+
+        ```python
+        model = eqx.nn.MLP(2, 2, 2, 2, key=jr.PRNGKey(0))
+        eqx.tree_serialise_safetensors("model.safetensors", model)
+        model = eqx.tree_deserialise_safetensors("model.safetensors", model)
+        ```
+    """
+    paths_and_leaves, _ = jtu.tree_flatten_with_path(pytree, is_leaf)
+    header = {}
+    arrays = []
+    offset = 0
+    for path, x in paths_and_leaves:
+        if not _is_safetensor(x):
+            continue
+        name = name_fn(path)
+        if name in header:
+            raise ValueError(f"Multiple leaves have the tensor name {name!r}.")
+        x = np.asarray(x)
+        try:
+            dtype = _SAFETENSORS_DTYPES[jnp.dtype(x.dtype).name]
+        except KeyError:
+            raise ValueError(
+                f"Leaf at path '{jtu.keystr(path)}' has dtype {x.dtype}, which is not "
+                "supported by safetensors."
+            ) from None
+        header[name] = dict(
+            dtype=dtype, shape=list(x.shape), data_offsets=[offset, offset + x.nbytes]
+        )
+        arrays.append(x)
+        offset += x.nbytes
+    if metadata is not None:
+        header["__metadata__"] = metadata
+    encoded = json.dumps(header).encode("utf-8")
+    # Pad with spaces so that the data is 8-byte aligned, as in the reference
+    # implementation.
+    encoded += b" " * (-len(encoded) % 8)
+    with _maybe_open_exact(path_or_file, "wb") as f:
+        f.write(struct.pack("<Q", len(encoded)))
+        f.write(encoded)
+        for x in arrays:
+            _write_bytes(f, x)
+
+
+def tree_deserialise_safetensors(
+    path_or_file: Union[str, pathlib.Path, BinaryIO],
+    like: PyTree,
+    is_leaf: Optional[Callable[[Any], bool]] = None,
+    *,
+    name_fn: Callable[[tuple], str] = jtu.keystr,
+) -> PyTree:
+    """Load the array leaves of a PyTree from a file in the
+    [safetensors](https://github.com/huggingface/safetensors) format.
+
+    The file is memory-mapped, and each tensor is read directly from the mapping
+    without any intermediate copies.
+
+    **Arguments:**
+
+    - `path_or_file`: The file location to load values from or a binary file-like
+        object. (Which must refer to a file on disk.)
+    - `like`: A PyTree of same structure, and with leaves of the same type, as the
+        PyTree being loaded. Its JAX arrays (which may be `jax.ShapeDtypeStruct`s),
+        NumPy arrays and Python bool/int/float leaves are replaced with the
+        corresponding tensor from the file; all other leaves are kept as-is.
+    - `is_leaf`: Called on every node of `like`; if `True` then this node will be
+        treated as a leaf.
+    - `name_fn`: Maps the key path of each leaf to the name of the tensor in the file.
+        Defaults to `jax.tree_util.keystr`, e.g. `.layers[0].weight`.
+
+    **Returns:**
+
+    The loaded PyTree. NumPy arrays are returned as read-only views into the
+    memory-mapped file.
+    """
+    with _maybe_open_exact(path_or_file, "rb") as f:
+        (length,) = struct.unpack("<Q", f.read(8))
+        header = json.loads(f.read(length).decode("utf-8"))
+        offset = 8 + length
+        buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def _load(path, x):
+        if not _is_safetensor(x):
+            return x
+        name = name_fn(path)
+        try:
+            info = header[name]
+        except KeyError:
+            raise RuntimeError(f"No tensor named {name!r} in the file.") from None
+        dtype = jnp.dtype(_SAFETENSORS_DTYPES_INV[info["dtype"]])
+        shape = tuple(info["shape"])
+        start, stop = info["data_offsets"]
+        data = np.frombuffer(
+            buffer, dtype, count=math.prod(shape), offset=offset + start
+        ).reshape(shape)
+        if isinstance(x, (jax.Array, jax.ShapeDtypeStruct, np.ndarray)):
+            if shape != x.shape or dtype != x.dtype:
+                raise RuntimeError(
+                    f"Tensor {name!r} has shape {shape} and dtype {dtype} in the "
+                    f"file, but shape {x.shape} and dtype {x.dtype} in `like`."
+                )
+            if isinstance(x, np.ndarray):
+                return data
+            elif isinstance(x, jax.ShapeDtypeStruct) and x.sharding is not None:
+                return jax.device_put(data, x.sharding)
+            else:
+                return jnp.asarray(data)
+        else:
+            return type(x)(data.item())
+
+    return jtu.tree_map_with_path(_load, like, is_leaf=is_leaf)
@@ -1,15 +1,32 @@
-from typing import Any, Union
+import functools as ft
+import re
+from collections.abc import Callable, Hashable, Sequence
+from typing import Any, Optional, Union
 
 import jax
+import jax._src.traceback_util as traceback_util
 import jax.lax as lax
+import jax.numpy as jnp
+import jax.tree_util as jtu
+from jax.experimental.shard_map import shard_map
+from jax.sharding import Mesh, NamedSharding, PartitionSpec
 from jaxlib.xla_extension import Device
 from jaxtyping import PyTree
 
+from ._custom_types import sentinel
 from ._filters import combine, is_array, partition
+from ._module import Module, module_update_wrapper, Partial, Static
+
+
+traceback_util.register_exclusion(__file__)
+
+
+ResolvedSpec = Optional[PartitionSpec]
+Spec = Union[ResolvedSpec, Callable[[Any], ResolvedSpec]]
 
 
 def filter_shard(
-    x: PyTree[Any], device_or_shardings: Union[Device, jax.sharding.Sharding]
+    x: PyTree[Any], device_or_shardings: Union[Device, PyTree[jax.sharding.Sharding]]
 ):
     """Filtered transform combining `jax.lax.with_sharding_constraint`
     and `jax.device_put`.
@@ -39,3 +56,371 @@ def filter_shard(
     dynamic, static = partition(x, is_array)
     dynamic = lax.with_sharding_constraint(dynamic, shardings)
     return combine(dynamic, static)
+
+
+def _is_spec_leaf(x: Any) -> bool:
+    return x is None or isinstance(x, PartitionSpec)
+
+
+def _resolve_spec(spec: Spec, elem: Any) -> PyTree[ResolvedSpec]:
+    if _is_spec_leaf(spec):
+        return jtu.tree_map(lambda x: spec if is_array(x) else None, elem)
+    elif callable(spec):
+        return jtu.tree_map(spec, elem)
+    else:
+        raise ValueError(
+            "`in_specs` and `out_specs` must consist of None, `PartitionSpec`s, and "
+            "callables only."
+        )
+
+
+def _resolve_specs(pytree: PyTree[Any], specs: PyTree[Spec]) -> PyTree[ResolvedSpec]:
+    return jtu.tree_map(_resolve_spec, specs, pytree, is_leaf=_is_spec_leaf)
+
+
+def _flat_specs(pytree: PyTree[Any], specs: PyTree[Spec]) -> list[PartitionSpec]:
+    # One `PartitionSpec` for each array leaf of `pytree`, in order. `None` means
+    # replicated.
+    resolved = _resolve_specs(pytree, specs)
+    return [
+        PartitionSpec() if spec is None else spec
+        for spec, leaf in zip(
+            jtu.tree_leaves(resolved, is_leaf=_is_spec_leaf),
+            jtu.tree_leaves(pytree, is_leaf=lambda x: x is None),
+        )
+        if is_array(leaf)
+    ]
+
+
+class _ShardMapWrapper(Module):
+    _fun: Callable
+    _mesh: Mesh
+    _in_specs: PyTree[Spec]
+    _out_specs: PyTree[Spec]
+    _check_rep: bool
+
+    @property
+    def __wrapped__(self):
+        return self._fun
+
+    def __call__(self, /, *args, **kwargs):
+        if len(kwargs) != 0:
+            raise RuntimeError(
+                "keyword arguments cannot be used with functions wrapped with "
+                "`filter_shard_map`"
+            )
+        del kwargs
+
+        dynamic_args, static_args = partition(args, is_array)
+        dynamic_leaves, dynamic_treedef = jtu.tree_flatten(dynamic_args)
+        in_specs_flat = _flat_specs(args, self._in_specs)
+        assert len(dynamic_leaves) == len(in_specs_flat)
+
+        def _fun_wrapper(_dynamic_leaves):
+            _dynamic_args = jtu.tree_unflatten(dynamic_treedef, _dynamic_leaves)
+            _out = self._fun(*combine(_dynamic_args, static_args))
+            _out_specs_flat = _flat_specs(_out, self._out_specs)
+            _dynamic_out, _static_out = partition(_out, is_array)
+            _out_leaves, _out_treedef = jtu.tree_flatten(_dynamic_out)
+            return _out_leaves, Static((_static_out, _out_treedef, _out_specs_flat))
+
+        def _shard_map(out_specs, check_rep):
+            return shard_map(
+                _fun_wrapper,
+                mesh=self._mesh,
+                in_specs=(in_specs_flat,),
+                out_specs=(out_specs, PartitionSpec()),
+                check_rep=check_rep,
+            )
+
+        # The output specs depend on the output of `fun`, so first trace it abstractly
+        # (treating every output as replicated), to resolve them.
+        _, static = jax.eval_shape(
+            _shard_map(PartitionSpec(), check_rep=False), dynamic_leaves
+        )
+        static_out, out_treedef, out_specs_flat = static.value
+        out_leaves, _ = _shard_map(out_specs_flat, self._check_rep)(dynamic_leaves)
+        dynamic_out = jtu.tree_unflatten(out_treedef, out_leaves)
+        return combine(dynamic_out, static_out)
+
+    def __get__(self, instance, owner):
+        del owner
+        if instance is None:
+            return self
+        return Partial(self, instance)
+
+
+def filter_shard_map(
+    fun=sentinel,
+    *,
+    mesh: Mesh,
+    in_specs: PyTree[Spec],
+    out_specs: PyTree[Spec],
+    check_rep: bool = True,
+):
+    """Maps a function over shards of data, as `jax.experimental.shard_map.shard_map`,
+    but accepting arbitrary PyTrees as inputs and outputs. The body of `fun` is written
+    from the perspective of a single device, and may use collectives (e.g.
+    `jax.lax.psum`) over the axes of `mesh`.
+
+    All JAX arrays are split across devices according to their `PartitionSpec`; all
+    other types are treated as static, and passed as-is to every device.
+
+    **Arguments:**
+
+    For both `in_specs` and `out_specs`, then a `jax.sharding.PartitionSpec` indicates
+    how the axes of an array are split across the axes of `mesh`, `None` indicates
+    replication (equivalent to `PartitionSpec()`), and callables
+    `Leaf -> Union[None, PartitionSpec]` are mapped and evaluated on every leaf of their
+    subtree. A `PartitionSpec` or `None` is only ever applied to array leaves; non-array
+    leaves are always treated as static.
+
+    - `fun` is a pure function to map. Should be of the form `fun(*args)`; that is to
+        say it cannot accept keyword arguments.
+    - `mesh` is a `jax.sharding.Mesh` of devices.
+    - `in_specs` is a PyTree of `None`, `PartitionSpec`s, or callables, whose
+        structure should be a prefix of the input tuple of `args`.
+    - `out_specs` is a PyTree of `None`, `PartitionSpec`s, or callables, whose
+        structure should be a prefix of the output `fun(*args)`.
+    - `check_rep` is as in `shard_map`: whether to check that outputs with `None` (or
+        a `PartitionSpec` not mentioning some mesh axis) are actually replicated.
+
+    **Returns:**
+
+    The mapped version of `fun`.
+
+    !!! example
+
+        ```python
+        import equinox as eqx
+        import jax
+        import jax.numpy as jnp
+        from jax.sharding import Mesh, PartitionSpec as P
+
+        mesh = Mesh(jax.devices(), ("batch",))
+
+        @eqx.filter_shard_map(mesh=mesh, in_specs=(None, P("batch")), out_specs=None)
+        def loss(model, x):
+            # `model` is replicated; `x` is this device's shard of the batch.
+            local = jnp.sum(jax.vmap(model)(x))
+            return jax.lax.psum(local, "batch")
+        ```
+    """
+    if fun is sentinel:
+        return ft.partial(
+            filter_shard_map,
+            mesh=mesh,
+            in_specs=in_specs,
+            out_specs=out_specs,
+            check_rep=check_rep,
+        )
+    shard_map_wrapper = _ShardMapWrapper(
+        _fun=fun,
+        _mesh=mesh,
+        _in_specs=in_specs,
+        _out_specs=out_specs,
+        _check_rep=check_rep,
+    )
+    return module_update_wrapper(shard_map_wrapper)
+
+
+def _key_name(key) -> Any:
+    if isinstance(key, jtu.GetAttrKey):
+        return key.name
+    elif isinstance(key, jtu.SequenceKey):
+        return key.idx
+    elif isinstance(key, jtu.DictKey):
+        return key.key
+    elif isinstance(key, jtu.FlattenedIndexKey):
+        return key.key
+    else:
+        return key
+
+
+def _parent(tree, path) -> Any:
+    # Follow all but the last key of `path` down from `tree`, to find the node that
+    # directly holds the leaf. Returns `None` if this cannot be done.
+    node = tree
+    for key in path[:-1]:
+        if isinstance(key, jtu.GetAttrKey):
+            node = getattr(node, key.name)
+        elif isinstance(key, jtu.SequenceKey):
+            node = node[key.idx]
+        elif isinstance(key, jtu.DictKey):
+            node = node[key.key]
+        else:
+            return None
+    return node
+
+
+def _rule_matches(pattern, tree, path, path_str: str) -> bool:
+    if isinstance(pattern, str):
+        return re.fullmatch(pattern, path_str) is not None
+    elif (
+        isinstance(pattern, tuple)
+        and len(pattern) == 2
+        and isinstance(pattern[0], type)
+        and isinstance(pattern[1], str)
+    ):
+        cls, name = pattern
+        if len(path) == 0 or path[-1] != jtu.GetAttrKey(name):
+            return False
+        return isinstance(_parent(tree, path), cls)
+    else:
+        raise ValueError(
+            "Each rule must be a pair `(pattern, spec)`, where `pattern` is either a "
+            "regex string or a pair `(type, attribute_name)`."
+        )
+
+
+def shard_by_rules(
+    tree: PyTree[Any],
+    mesh: Mesh,
+    rules: Sequence[tuple[Union[str, tuple[type, str]], PartitionSpec]],
+) -> PyTree[Optional[NamedSharding]]:
+    """Creates shardings for every array in a PyTree (typically a model), by matching
+    them against a list of rules. The result can be passed directly to
+    [`equinox.filter_shard`][].
+
+    **Arguments:**
+
+    - `tree`: a PyTree, with potentially a mix of arrays and non-arrays on the leaves.
+    - `mesh`: a `jax.sharding.Mesh` of devices.
+    - `rules`: a sequence of pairs `(pattern, spec)`. Each array is sharded according
+        to the `spec: PartitionSpec` of the first rule whose `pattern` matches it, or
+        replicated if no rule matches. Each `pattern` may be either:
+        - a regex string, which is matched against the whole of the path to the array,
+            with the elements of the path separated by `.`. For example the weight of
+            the first layer of an [`equinox.nn.MLP`][] has path `"layers.0.weight"`.
+        - a pair `(type, attribute_name)`, which matches any array held as the
+            attribute `attribute_name` of an instance of `type`. For example
+            `(eqx.nn.Linear, "weight")`.
+
+    **Returns:**
+
+    A PyTree with the same structure as `tree`, with a `jax.sharding.NamedSharding` for
+    every array, and `None` for every non-array.
+
+    !!! Example
+
+        Tensor parallelism for an [`equinox.nn.MultiheadAttention`][] layer: split the
+        query/key/value projections by output features, and the output projection by
+        input features.
+
+        ```python
+        from jax.sharding import Mesh, PartitionSpec as P
+
+        mesh = Mesh(jax.devices(), ("model",))
+        rules = [
+            (r".*output_proj\\.weight", P(None, "model")),
+            (r".*output_proj\\.bias", P()),
+            ((eqx.nn.Linear, "weight"), P("model", None)),
+            ((eqx.nn.Linear, "bias"), P("model")),
+        ]
+        attention = eqx.nn.MultiheadAttention(...)
+        shardings = eqx.shard_by_rules(attention, mesh, rules)
+        attention = eqx.filter_shard(attention, shardings)
+        ```
+    """
+    rules = list(rules)
+
+    def _get_sharding(path, leaf):
+        if not is_array(leaf):
+            return None
+        path_str = ".".join(str(_key_name(key)) for key in path)
+        for pattern, spec in rules:
+            if _rule_matches(pattern, tree, path, path_str):
+                return NamedSharding(mesh, spec)
+        return NamedSharding(mesh, PartitionSpec())
+
+    return jtu.tree_map_with_path(_get_sharding, tree)
+
+
+def tree_psum_bucketed(
+    tree: PyTree[Any],
+    axis_name: Hashable,
+    *,
+    bucket_bytes: int = 4 * 2**20,
+    mean: bool = False,
+    overlap: bool = False,
+) -> PyTree[Any]:
+    """As `jax.lax.psum`, but packs the arrays of a PyTree into a few large flat
+    buckets, and runs one collective per bucket.
+
+    Reducing a PyTree (e.g. the gradients of a model) with `jax.lax.psum` performs a
+    separate collective for every array. For models with many small parameters, this
+    means many tiny collectives, each with its own fixed latency. Here, arrays of the
+    same dtype are instead concatenated into buckets of up to `bucket_bytes` bytes,
+    each bucket is reduced with a single collective, and then the results are split
+    back into their original shapes.
+
+    **Arguments:**
+
+    - `tree`: a PyTree, with potentially a mix of arrays and non-arrays on the leaves.
+        Only the arrays are reduced; everything else is returned unchanged.
+    - `axis_name`: the name of the mapped axis to reduce over, as for
+        `jax.lax.psum`. For example the `axis_name` of [`equinox.filter_pmap`][] or
+        the mesh axis of [`equinox.filter_shard_map`][].
+    - `bucket_bytes`: the maximum size of each bucket, in bytes. An array larger than
+        this is reduced on its own.
+    - `mean`: if `True`, then compute the mean over the mapped axis (as
+        `jax.lax.pmean`) instead of the sum.
+    - `overlap`: if `True`, then arrays are assigned to buckets starting from the
+        last leaf of `tree`, rather than the first. The backward pass of a model
+        produces the gradients of its final layers first, so this means that the
+        first buckets depend only on gradients that are available early. Together
+        with a backend that schedules collectives asynchronously (e.g. XLA on
+        GPU/TPU), this allows them to overlap with the rest of the backward pass.
+
+    **Returns:**
+
+    A PyTree with the same structure as `tree`, with every array replaced by its sum
+    (or mean) over `axis_name`.
+
+    !!! Example
+
+        ```python
+        @eqx.filter_pmap(axis_name="device")
+        def step(model, x, y):
+            grads = eqx.filter_grad(loss)(model, x, y)
+            grads = eqx.tree_psum_bucketed(grads, "device", mean=True)
+            ...
+        ```
+    """
+    if bucket_bytes < 1:
+        raise ValueError("`bucket_bytes` must be positive.")
+    dynamic, static = partition(tree, is_array)
+    leaves, treedef = jtu.tree_flatten(dynamic)
+    order = range(len(leaves))
+    if overlap:
+        order = reversed(order)
+    # Each bucket is a list of indices into `leaves`, all of the same dtype.
+    buckets: list[list[int]] = []
+    open_buckets: dict[Any, tuple[list[int], int]] = {}
+    for i in order:
+        leaf = leaves[i]
+        dtype = jnp.result_type(leaf)
+        nbytes = leaf.size * dtype.itemsize
+        bucket, bucket_nbytes = open_buckets.get(dtype, ([], 0))
+        if len(bucket) == 0 or bucket_nbytes + nbytes > bucket_bytes:
+            bucket = []
+            bucket_nbytes = 0
+            buckets.append(bucket)
+        bucket.append(i)
+        open_buckets[dtype] = (bucket, bucket_nbytes + nbytes)
+
+    reduce = lax.pmean if mean else lax.psum
+    out = list(leaves)
+    for bucket in buckets:
+        if len(bucket) == 1:
+            [i] = bucket
+            out[i] = reduce(leaves[i], axis_name)
+        else:
+            flat = jnp.concatenate([jnp.ravel(leaves[i]) for i in bucket])
+            flat = reduce(flat, axis_name)
+            start = 0
+            for i in bucket:
+                size = leaves[i].size
+                out[i] = flat[start : start + size].reshape(leaves[i].shape)
+                start += size
+    return combine(jtu.tree_unflatten(treedef, out), static)
@@ -0,0 +1,377 @@
+"""Jacobian sparsity patterns: detection from a jaxpr, and column colouring.
+
+Detection is a conservative dependency analysis: we track, for every element of every
+intermediate array, the set of input elements that it may depend on. Primitives that we
+understand (elementwise operations and the common structural operations such as
+slicing, padding, reshaping, broadcasting and reductions) propagate this precisely. Any
+other primitive is treated as dense: every element of its outputs is assumed to depend
+on every input element that any of its operands depends on. The detected pattern is
+therefore always a superset of the true sparsity pattern.
+"""
+
+import functools as ft
+import itertools as it
+import math
+from collections.abc import Callable, Sequence
+from typing import Any, NamedTuple
+
+import jax
+import jax.core
+import jax.extend.core
+import numpy as np
+
+
+class SparsityPattern(NamedTuple):
+    """The nonzero entries of a `(num_rows, num_columns)` matrix, in coordinate format:
+    entry `(rows[k], columns[k])` is nonzero for every `k`.
+    """
+
+    shape: tuple[int, int]
+    rows: np.ndarray
+    columns: np.ndarray
+
+    @classmethod
+    def from_dense(cls, dense: np.ndarray) -> "SparsityPattern":
+        rows, columns = np.nonzero(dense)
+        return cls(dense.shape, rows, columns)
+
+    def todense(self) -> np.ndarray:
+        out = np.zeros(self.shape, dtype=bool)
+        out[self.rows, self.columns] = True
+        return out
+
+
+def _union_pair(a: frozenset, b: frozenset) -> frozenset:
+    # After a dense operation every element shares one (large) set, so skip the union
+    # when it is trivial. This keeps chains of such operations linear in their size.
+    if a is b or not b:
+        return a
+    elif not a:
+        return b
+    else:
+        return a | b
+
+
+_empty = frozenset()
+_union = np.frompyfunc(_union_pair, 2, 1)
+
+
+def _full(shape, value) -> np.ndarray:
+    out = np.empty(shape, dtype=object)
+    out.fill(value)
+    return out
+
+
+def _all_deps(deps: Sequence[np.ndarray]) -> frozenset:
+    # Many elements typically share the same set, so take each distinct one just once.
+    unique = {id(x): x for x in it.chain.from_iterable(d.ravel() for d in deps)}
+    return frozenset().union(*unique.values())
+
+
+_elementwise = {
+    "abs",
+    "acos",
+    "acosh",
+    "add",
+    "and",
+    "asin",
+    "asinh",
+    "atan",
+    "atan2",
+    "atanh",
+    "cbrt",
+    "ceil",
+    "clamp",
+    "complex",
+    "conj",
+    "convert_element_type",
+    "copy",
+    "copy_p",
+    "cos",
+    "cosh",
+    "digamma",
+    "div",
+    "eq",
+    "erf",
+    "erf_inv",
+    "erfc",
+    "exp",
+    "exp2",
+    "expm1",
+    "floor",
+    "ge",
+    "gt",
+    "imag",
+    "integer_pow",
+    "is_finite",
+    "le",
+    "lgamma",
+    "log",
+    "log1p",
+    "logistic",
+    "lt",
+    "max",
+    "min",
+    "mul",
+    "ne",
+    "neg",
+    "nextafter",
+    "not",
+    "or",
+    "pow",
+    "real",
+    "reduce_precision",
+    "rem",
+    "round",
+    "rsqrt",
+    "select_n",
+    "sign",
+    "sin",
+    "sinh",
+    "sqrt",
+    "square",
+    "sub",
+    "tan",
+    "tanh",
+    "xor",
+}
+
+_reductions = {
+    "argmax",
+    "argmin",
+    "reduce_and",
+    "reduce_max",
+    "reduce_min",
+    "reduce_or",
+    "reduce_prod",
+    "reduce_sum",
+}
+
+
+def _pad(operand, padding_value, out_shape, padding_config):
+    out = _full(out_shape, padding_value[()])
+    out_index = []
+    in_index = []
+    for size, out_size, (lo, _, interior) in zip(
+        operand.shape, out_shape, padding_config
+    ):
+        positions = lo + np.arange(size) * (interior + 1)
+        keep = (positions >= 0) & (positions < out_size)
+        out_index.append(positions[keep])
+        in_index.append(np.arange(size)[keep])
+    out[np.ix_(*out_index)] = operand[np.ix_(*in_index)]
+    return out
+
+
+def _dot_general(lhs, rhs, dimension_numbers):
+    # Each output element depends on every element of its row of `lhs` and its column
+    # of `rhs` (along the contracting dimensions), so first reduce each operand over
+    # its contracting dimensions, then take the outer union.
+    (lhs_contract, rhs_contract), (lhs_batch, rhs_batch) = dimension_numbers
+
+    def _reduce(x, contract, batch):
+        free = [i for i in range(x.ndim) if i not in contract and i not in batch]
+        x = np.transpose(x, list(batch) + free + list(contract))
+        num_kept = len(batch) + len(free)
+        x = x.reshape(x.shape[:num_kept] + (-1,))
+        if x.shape[-1] == 0:
+            return _full(x.shape[:-1], _empty)
+        return np.asarray(_union.reduce(x, axis=-1), dtype=object).reshape(x.shape[:-1])
+
+    lhs = _reduce(lhs, lhs_contract, lhs_batch)
+    rhs = _reduce(rhs, rhs_contract, rhs_batch)
+    num_batch = len(lhs_batch)
+    num_lhs_free = lhs.ndim - num_batch
+    num_rhs_free = rhs.ndim - num_batch
+    # Output layout is `(*batch, *lhs_free, *rhs_free)`.
+    lhs = lhs.reshape(lhs.shape + (1,) * num_rhs_free)
+    rhs = rhs.reshape(
+        rhs.shape[:num_batch] + (1,) * num_lhs_free + rhs.shape[num_batch:]
+    )
+    return np.asarray(_union(lhs, rhs), dtype=object)
+
+
+@ft.cache
+def _call_like() -> frozenset:
+    """Primitives that just call their jaxpr, once, on their inputs.
+
+    These are matched by identity, not by name, as the names vary between JAX versions
+    (e.g. `jax.jit` binds `pjit` in older versions and `jit` in newer ones). Those
+    without a public handle are found by tracing a trivial function.
+    """
+    primitives = jax.extend.core.primitives
+    out = {
+        primitives.call_p,
+        primitives.closed_call_p,
+        primitives.custom_jvp_call_p,
+        primitives.custom_vjp_call_p,
+        primitives.custom_vjp_call_jaxpr_p,
+    }
+    for transform in (jax.jit, jax.checkpoint):
+        jaxpr = jax.make_jaxpr(transform(lambda x: x))(0.0)
+        out.update(eqn.primitive for eqn in jaxpr.eqns)
+    return frozenset(out)
+
+
+def _sub_jaxpr(params) -> Any:
+    for name in ("jaxpr", "call_jaxpr", "fun_jaxpr"):
+        sub = params.get(name)
+        if isinstance(sub, jax.extend.core.ClosedJaxpr):
+            return sub.jaxpr
+        if isinstance(sub, jax.extend.core.Jaxpr):
+            return sub
+    return None
+
+
+def _eqn_deps(eqn, ins: list[np.ndarray]) -> list[np.ndarray]:
+    name = eqn.primitive.name
+    params = eqn.params
+    out_shapes = [v.aval.shape for v in eqn.outvars]
+    if name in _elementwise:
+        [out_shape] = out_shapes
+        out = _full(out_shape, _empty)
+        for x in ins:
+            out = _union(out, np.broadcast_to(x, out_shape))
+        # `np.frompyfunc` returns a bare object, not an array, for 0-dimensional inputs.
+        return [np.asarray(out, dtype=object)]
+    elif name in _reductions:
+        [x] = ins
+        [out_shape] = out_shapes
+        if x.size == 0:
+            return [_full(out_shape, _empty)]
+        for axis in sorted(params["axes"], reverse=True):
+            x = _union.reduce(x, axis=axis)
+        return [np.asarray(x, dtype=object).reshape(out_shape)]
+    elif name == "broadcast_in_dim":
+        [x, *_] = ins
+        shape = params["shape"]
+        expanded = [1] * len(shape)
+        for i, dim in enumerate(params["broadcast_dimensions"]):
+            expanded[dim] = x.shape[i]
+        return [np.broadcast_to(x.reshape(expanded), shape)]
+    elif name == "reshape":
+        [x, *_] = ins
+        return [x.reshape(params["new_sizes"])]
+    elif name == "squeeze":
+        [x] = ins
+        return [np.squeeze(x, axis=tuple(params["dimensions"]))]
+    elif name == "transpose":
+        [x] = ins
+        return [np.transpose(x, params["permutation"])]
+    elif name == "rev":
+        [x] = ins
+        return [np.flip(x, axis=tuple(params["dimensions"]))]
+    elif name == "slice":
+        [x] = ins
+        strides = params["strides"]
+        if strides is None:
+            strides = (1,) * x.ndim
+        index = tuple(
+            slice(start, stop, step)
+            for start, stop, step in zip(
+                params["start_indices"], params["limit_indices"], strides
+            )
+        )
+        return [x[index]]
+    elif name == "concatenate":
+        return [np.concatenate(ins, axis=params["dimension"])]
+    elif name == "pad":
+        [x, padding_value] = ins
+        [out_shape] = out_shapes
+        return [_pad(x, padding_value, out_shape, params["padding_config"])]
+    elif eqn.primitive is jax.extend.core.primitives.dot_general_p:
+        [lhs, rhs] = ins
+        return [_dot_general(lhs, rhs, params["dimension_numbers"])]
+    else:
+        sub = _sub_jaxpr(params) if eqn.primitive in _call_like() else None
+        if sub is not None and len(sub.invars) == len(ins):
+            return _jaxpr_deps(sub, ins)
+        # Unknown primitive: be conservative.
+        deps = _all_deps(ins)
+        return [_full(shape, deps) for shape in out_shapes]
+
+
+def _jaxpr_deps(jaxpr, ins: list[np.ndarray]) -> list[np.ndarray]:
+    env = {}
+
+    def read(v):
+        if isinstance(v, jax.extend.core.Literal):
+            return _full(np.shape(v.val), _empty)
+        return env[v]
+
+    for v in jaxpr.constvars:
+        env[v] = _full(v.aval.shape, _empty)
+    for v, x in zip(jaxpr.invars, ins):
+        env[v] = x
+    for eqn in jaxpr.eqns:
+        outs = _eqn_deps(eqn, [read(v) for v in eqn.invars])
+        for v, x in zip(eqn.outvars, outs):
+            env[v] = x
+    return [read(v) for v in jaxpr.outvars]
+
+
+def jacobian_sparsity(fn: Callable, *args: jax.ShapeDtypeStruct) -> SparsityPattern:
+    """Detects the sparsity pattern of the Jacobian of `fn`, which should accept
+    arrays of the given structs and return a list of arrays.
+
+    Inputs and outputs are each flattened and concatenated, so that the returned
+    pattern has shape `(num_outputs, num_inputs)`.
+    """
+    jaxpr = jax.make_jaxpr(fn)(*args).jaxpr
+    ins = []
+    offset = 0
+    for arg in args:
+        size = math.prod(arg.shape)
+        elements = [frozenset([i]) for i in range(offset, offset + size)]
+        x = np.empty(size, dtype=object)
+        x[:] = elements
+        ins.append(x.reshape(arg.shape))
+        offset += size
+    outs = _jaxpr_deps(jaxpr, ins)
+    row_deps = list(it.chain.from_iterable(out.ravel() for out in outs))
+    rows = np.repeat(np.arange(len(row_deps)), [len(row) for row in row_deps])
+    columns = np.fromiter(
+        it.chain.from_iterable(sorted(row) for row in row_deps),
+        dtype=np.int64,
+        count=len(rows),
+    )
+    return SparsityPattern((len(row_deps), offset), rows, columns)
+
+
+def _compressed(major: np.ndarray, minor: np.ndarray, size: int):
+    # Groups `minor` by `major`: `minor[ptr[i] : ptr[i + 1]]` are those entries with
+    # `major == i`. (That is, CSR or CSC format.)
+    order = np.argsort(major, kind="stable")
+    ptr = np.searchsorted(major[order], np.arange(size + 1))
+    return ptr, minor[order]
+
+
+def colour_columns(pattern: SparsityPattern) -> tuple[np.ndarray, int]:
+    """Greedily colours the columns of a `(num_rows, num_columns)` sparsity pattern,
+    such that no two columns of the same colour both have a nonzero in the same row.
+
+    Returns an integer array of shape `(num_columns,)` giving the colour of each column,
+    and the total number of colours.
+    """
+    num_rows, num_columns = pattern.shape
+    column_ptr, column_rows = _compressed(pattern.columns, pattern.rows, num_columns)
+    row_ptr, row_columns = _compressed(pattern.rows, pattern.columns, num_rows)
+    colours = np.full(num_columns, -1, dtype=np.int64)
+    # `forbidden[c] == j` marks colour `c` as unavailable to column `j`.
+    forbidden = np.full(num_columns, -1, dtype=np.int64)
+    num_colours = 0
+    for j in range(num_columns):
+        rows = column_rows[column_ptr[j] : column_ptr[j + 1]]
+        # Every column sharing a nonzero row with column `j`.
+        neighbours = [row_columns[row_ptr[i] : row_ptr[i + 1]] for i in rows]
+        if len(neighbours) > 0:
+            neighbour_colours = colours[np.concatenate(neighbours)]
+            forbidden[neighbour_colours[neighbour_colours >= 0]] = j
+        (free,) = np.nonzero(forbidden[:num_colours] != j)
+        if len(free) == 0:
+            colour = num_colours
+            num_colours += 1
+        else:
+            colour = free[0]
+        colours[j] = colour
+    return colours, num_colours
@@ -1,6 +1,8 @@
+import functools as ft
 from collections.abc import Callable, Sequence
 from typing import Any, Optional, TYPE_CHECKING, Union
 
+import jax
 import jax.numpy as jnp
 import jax.tree_util as jtu
 import numpy as np
@@ -274,6 +276,39 @@ def _array_equal(x, y, npi, rtol, atol):
         return npi.allclose(x, y, rtol=rtol, atol=atol)
 
 
+@ft.cache
+def _array_impl_type() -> type:
+    # ArrayImpl isn't a public type, so this is how we get access to it instead.
+    with jax.ensure_compile_time_eval():
+        return type(jnp.array(0))
+
+
+def _is_host_comparable(x) -> bool:
+    # Excludes tracers, and also arrays with extended dtypes (e.g. PRNG keys), which
+    # are not `ArrayImpl`s. Only arrays already on the CPU are included, so that
+    # nothing is copied off an accelerator.
+    return (
+        type(x) is _array_impl_type()
+        and x.is_fully_addressable
+        and all(device.platform == "cpu" for device in x.devices())
+    )
+
+
+def _array_equal_host(xs, ys, rtol, atol) -> bool:
+    # Every array is already on the CPU, so this is just a cheap view of each.
+    xs, ys = jax.device_get((xs, ys))
+    # Then compare all arrays of the same dtype in a single vectorised operation.
+    groups = {}
+    for x, y in zip(xs, ys):
+        groups.setdefault(x.dtype, []).append((x, y))
+    for pairs in groups.values():
+        x = np.concatenate([np.ravel(x) for x, _ in pairs])
+        y = np.concatenate([np.ravel(y) for _, y in pairs])
+        if not _array_equal(x, y, np, rtol, atol):
+            return False
+    return True
+
+
 def tree_equal(
     *pytrees: PyTree,
     typematch: bool = False,
@@ -314,7 +349,10 @@ def tree_equal(
     A boolean, or bool-typed tracer.
     """
     flat, treedef = jtu.tree_flatten(pytrees[0])
-    traced_out = True
+    # Comparisons between JAX arrays are deferred, so that they can be performed
+    # together.
+    xs = []
+    ys = []
     for pytree in pytrees[1:]:
         flat_, treedef_ = jtu.tree_flatten(pytree)
         if treedef_ != treedef:
@@ -337,7 +375,8 @@ def tree_equal(
                 if is_array(elem_):
                     if (elem.shape != elem_.shape) or (elem.dtype != elem_.dtype):
                         return False
-                    traced_out = traced_out & _array_equal(elem, elem_, jnp, rtol, atol)
+                    xs.append(elem)
+                    ys.append(elem_)
                 else:
                     return False
             else:
@@ -346,6 +385,24 @@ def tree_equal(
                 else:
                     if elem != elem_:
                         return False
+    # Concrete CPU arrays are compared with NumPy, all at once. This avoids one
+    # dispatch per leaf (which dominates the cost for large PyTrees), and moreover
+    # avoids compiling a single XLA computation over every leaf (which is very slow to
+    # compile for large PyTrees). Anything else, in particular tracers and arrays on
+    # accelerators, is compared leaf-by-leaf on its own device.
+    host_xs = []
+    host_ys = []
+    traced_out = True
+    for x, y in zip(xs, ys):
+        if _is_host_comparable(x) and _is_host_comparable(y):
+            host_xs.append(x)
+            host_ys.append(y)
+        else:
+            traced_out = traced_out & _array_equal(x, y, jnp, rtol, atol)
+    if len(host_xs) > 0:
+        traced_out = traced_out & jnp.asarray(
+            _array_equal_host(host_xs, host_ys, rtol, atol)
+        )
     return traced_out
 
 
@@ -467,41 +524,78 @@ def tree_check(pytree: Any) -> None:
 
     A `ValueError` if the PyTree is not well-formed.
     """
-    all_nodes = {}
-    _tree_check(pytree, all_nodes)
+    # Single pass over the PyTree, using `is_leaf` as a hook that is called on every
+    # node in depth-first order. The first time we see a node we let JAX recurse into
+    # it as normal; if we see it again then we stop the recursion there (which also
+    # terminates self-referential structures) and check whether the duplicate is
+    # actually a problem.
+    # We keep a reference to every node so that `id`s cannot be reused.
+    seen = {}
+    allowed_duplicates = set()
+
+    def is_leaf(node):
+        key = id(node)
+        if key not in seen:
+            seen[key] = node
+            return False
+        if key not in allowed_duplicates:
+            # We allow duplicate leaves and empty containers.
+            if _is_nonempty_node(node):
+                try:
+                    type_string = type(node).__name__
+                except AttributeError:
+                    # AttributeError: in case we cannot get __name__ for some weird
+                    # reason.
+                    type_string = "<unknown type>"
+                if _is_self_referential(node):
+                    raise ValueError(
+                        f"PyTree node of type `{type_string}` is self-referential; "
+                        "that is to say it appears somewhere within its own PyTree "
+                        "structure. This is not allowed."
+                    )
+                else:
+                    raise ValueError(
+                        f"PyTree node of type `{type_string}` appears in the PyTree "
+                        "multiple times. This is almost always an error, as these "
+                        "nodes will turn into two duplicate copies after "
+                        "flattening/unflattening, e.g. when crossing a JIT boundary."
+                    )
+            allowed_duplicates.add(key)
+        return True
+
+    jtu.tree_flatten(pytree, is_leaf=is_leaf)
 
 
 _leaf_treedef = jtu.tree_structure(0)
 
 
-def _tree_check(node, all_nodes):
-    subnodes, treedef = tree_flatten_one_level(node)
-    # We allow duplicate leaves and empty containers, so don't raise an error with those
-    if treedef != _leaf_treedef and treedef.num_leaves > 0:
-        try:
-            self_referential, type_string = all_nodes[id(node)]
-        except KeyError:
-            pass
-        else:
-            if self_referential:
-                raise ValueError(
-                    f"PyTree node of type `{type_string}` is self-referential; that is "
-                    "to say it appears somewhere within its own PyTree structure. This "
-                    "is not allowed."
-                )
-            else:
-                raise ValueError(
-                    f"PyTree node of type `{type_string}` appears in the PyTree "
-                    "multiple times. This is almost always an error, as these nodes "
-                    "will turn into two duplicate copies after "
-                    "flattening/unflattening, e.g. when crossing a JIT boundary."
-                )
-        try:
-            type_string = type(node).__name__
-        except AttributeError:
-            # AttributeError: in case we cannot get __name__ for some weird reason.
-            type_string = "<unknown type>"
-        all_nodes[id(node)] = (True, type_string)
-        for subnode in subnodes:
-            _tree_check(subnode, all_nodes)
-        all_nodes[id(node)] = (False, type_string)
+def _is_nonempty_node(node) -> bool:
+    is_root = True
+
+    def is_leaf(_):
+        nonlocal is_root
+        out = not is_root
+        is_root = False
+        return out
+
+    treedef = jtu.tree_structure(node, is_leaf=is_leaf)
+    return treedef != _leaf_treedef and treedef.num_leaves > 0
+
+
+def _is_self_referential(node) -> bool:
+    # Only called when producing an error message, so efficiency isn't a concern.
+    found = False
+    seen = set()
+
+    def is_leaf(x):
+        nonlocal found
+        if x is node and len(seen) > 0:
+            found = True
+            return True
+        if id(x) in seen:
+            return True
+        seen.add(id(x))
+        return False
+
+    jtu.tree_flatten(node, is_leaf=is_leaf)
+    return found
@@ -2,6 +2,7 @@ import dataclasses
 import functools as ft
 import inspect
 import warnings
+import weakref
 from collections.abc import Callable, Hashable
 from typing import Any, Literal, Optional, overload, Union
 
@@ -13,6 +14,7 @@ import jax.tree_util as jtu
 import numpy as np
 from jaxtyping import PyTree
 
+from ._caches import cache_clears
 from ._compile_utils import (
     compile_cache,
     hashable_combine,
@@ -23,7 +25,7 @@ from ._custom_types import sentinel
 from ._deprecate import deprecated_0_10
 from ._doc_utils import doc_remove_args
 from ._filters import combine, filter, is_array, is_array_like, partition
-from ._module import Module, module_update_wrapper, Partial, Static
+from ._module import field, Module, module_update_wrapper, Partial, Static
 
 
 traceback_util.register_exclusion(__file__)
@@ -80,6 +82,45 @@ def _moveaxis(array, axis):
     return jnp.moveaxis(array, 0, axis)
 
 
+def _chunked_vmap(vmap, in_axes, dynamic_args, axis_size, chunk_size):
+    # Move every vectorised axis to the front.
+    leaves, treedef = jtu.tree_flatten(dynamic_args)
+    leaves = [
+        jnp.moveaxis(x, axis, 0) for x, axis in zip(leaves, jtu.tree_leaves(in_axes))
+    ]
+    if axis_size is None:
+        axis_size = leaves[0].shape[0]
+    if axis_size <= chunk_size:
+        return vmap(in_axes=(0,), axis_size=axis_size)(
+            jtu.tree_unflatten(treedef, leaves)
+        )
+    num_chunks, remainder = divmod(axis_size, chunk_size)
+    split = num_chunks * chunk_size
+
+    chunk_vmap = vmap(in_axes=(0,), axis_size=chunk_size)
+
+    def _chunk_fun(_leaves):
+        return chunk_vmap(jtu.tree_unflatten(treedef, _leaves))
+
+    chunks = [x[:split].reshape(num_chunks, chunk_size, *x.shape[1:]) for x in leaves]
+    _, nonvmapd_struct, static = jax.eval_shape(_chunk_fun, [x[0] for x in chunks])
+
+    # The non-vectorised outputs are the same for every chunk, so are carried through
+    # the loop rather than stacked.
+    def _body(_, _chunk):
+        _vmapd, _nonvmapd_arr, _ = _chunk_fun(_chunk)
+        return _nonvmapd_arr, _vmapd
+
+    init = jtu.tree_map(lambda x: jnp.zeros(x.shape, x.dtype), nonvmapd_struct)
+    nonvmapd_arr, vmapd = jax.lax.scan(_body, init, chunks, length=num_chunks)
+    vmapd = jtu.tree_map(lambda x: x.reshape(split, *x.shape[2:]), vmapd)
+    if remainder != 0:
+        rest = jtu.tree_unflatten(treedef, [x[split:] for x in leaves])
+        vmapd_rest, nonvmapd_arr, _ = vmap(in_axes=(0,), axis_size=remainder)(rest)
+        vmapd = jtu.tree_map(lambda x, y: jnp.concatenate([x, y]), vmapd, vmapd_rest)
+    return vmapd, nonvmapd_arr, static
+
+
 def _named_in_axes(fun, in_axes, args):
     if isinstance(in_axes, dict):
         in_axes = dict(in_axes)
@@ -119,6 +160,7 @@ class _VmapWrapper(Module):
     _out_axes: PyTree[AxisSpec]
     _axis_name: Optional[Hashable]
     _axis_size: Optional[int]
+    _chunk_size: Optional[int]
     _vmapkwargs: dict[str, Any]
 
     @property
@@ -166,14 +208,21 @@ class _VmapWrapper(Module):
                     "either `in_axes` or `axis_size` to be not `None`."
                 )
         else:
-            vmapd, nonvmapd_arr, static = jax.vmap(
+            vmap = ft.partial(
+                jax.vmap,
                 _fun_wrapper,
-                in_axes=(in_axes,),
                 out_axes=(0, None, None),
                 axis_name=self._axis_name,
-                axis_size=self._axis_size,
                 **self._vmapkwargs,
-            )(dynamic_args)
+            )
+            if self._chunk_size is None:
+                vmapd, nonvmapd_arr, static = vmap(
+                    in_axes=(in_axes,), axis_size=self._axis_size
+                )(dynamic_args)
+            else:
+                vmapd, nonvmapd_arr, static = _chunked_vmap(
+                    vmap, in_axes, dynamic_args, self._axis_size, self._chunk_size
+                )
 
         nonvmapd_static, out_axes = static.value
         nonvmapd = combine(nonvmapd_arr, nonvmapd_static)
@@ -197,6 +246,7 @@ def filter_vmap(
     out_axes: PyTree[AxisSpec] = if_array(0),
     axis_name: Hashable = None,
     axis_size: Optional[int] = None,
+    chunk_size: Optional[int] = None,
 ) -> Callable[[Callable[..., Any]], Callable[..., Any]]: ...
 
 
@@ -208,6 +258,7 @@ def filter_vmap(
     out_axes: PyTree[AxisSpec] = if_array(0),
     axis_name: Hashable = None,
     axis_size: Optional[int] = None,
+    chunk_size: Optional[int] = None,
 ) -> Callable[..., Any]: ...
 
 
@@ -219,6 +270,7 @@ def filter_vmap(
     out_axes: PyTree[AxisSpec] = if_array(0),
     axis_name: Hashable = None,
     axis_size: Optional[int] = None,
+    chunk_size: Optional[int] = None,
     **vmapkwargs,
 ):
     """Vectorises a function. By default, all JAX/NumPy arrays are vectorised down their
@@ -249,6 +301,11 @@ def filter_vmap(
     - `axis_size` is an optional `int` describing the size of the axis mapped. This
         only needs to be passed if none of the input arguments are vectorised, as else
         it can be deduced by looking at the argument shapes.
+    - `chunk_size` is an optional `int`. If passed, then rather than vectorising over
+        the whole axis at once, `fun` is vectorised over chunks of at most this size,
+        which are looped over with a `jax.lax.scan`. This bounds memory usage by the
+        size of a single chunk. Cannot be used with `axis_name`, as collectives would
+        then only be computed over each chunk.
 
     **Returns:**
 
@@ -340,6 +397,7 @@ def filter_vmap(
             out_axes=out_axes,
             axis_name=axis_name,
             axis_size=axis_size,
+            chunk_size=chunk_size,
             **vmapkwargs,
         )
 
@@ -348,6 +406,11 @@ def filter_vmap(
     deprecated_0_10(vmapkwargs, "args")
     deprecated_0_10(vmapkwargs, "kwargs")
     deprecated_0_10(vmapkwargs, "out")
+    if chunk_size is not None:
+        if chunk_size < 1:
+            raise ValueError("`chunk_size` must be a positive integer.")
+        if axis_name is not None:
+            raise ValueError("Cannot use both `chunk_size` and `axis_name`.")
 
     vmap_wrapper = _VmapWrapper(
         _fun=fun,
@@ -355,6 +418,7 @@ def filter_vmap(
         _out_axes=out_axes,
         _axis_name=axis_name,
         _axis_size=axis_size,
+        _chunk_size=chunk_size,
         _vmapkwargs=vmapkwargs,
     )
     return module_update_wrapper(vmap_wrapper)
@@ -388,8 +452,8 @@ def _filter_pmap_cache(
                 "filter_pmap(..., out_axes=...) must contain only integers and Nones"
             )
 
-    def fun_wrapped(_dynamic):
-        _fun, _args, _, _out_axes = combine(_dynamic, static)
+    def fun_wrapped(_dynamic_donate, _dynamic_nodonate):
+        _fun, _args, _, _out_axes = combine(_dynamic_donate, _dynamic_nodonate, static)
         _out = _fun(*_args)
         _out_axes = _resolve_axes(_out, _out_axes)
         jtu.tree_map(_check_map_out_axis, _out_axes)
@@ -410,7 +474,7 @@ def _filter_pmap_cache(
 
     return jax.pmap(
         fun_wrapped,
-        in_axes=(in_axes,),  # pyright: ignore
+        in_axes=(in_axes, in_axes),  # pyright: ignore
         out_axes=out_axes,  # pyright: ignore
         axis_name=axis_name,
         axis_size=axis_size,
@@ -431,12 +495,34 @@ def _common_preprocess(axis_size, kwargs):
         return np.broadcast_to(0, axis_size)
 
 
+def _donate_mask(fun, args, num_leaves, donate_first, donate_rest):
+    # Which leaves of `(fun, args, maybe_dummy, out_axes)` to donate.
+    num_fun = len(jtu.tree_leaves(fun))
+    num_first = len(jtu.tree_leaves(args[:1]))
+    num_args = len(jtu.tree_leaves(args))
+    return (
+        (donate_rest,) * num_fun
+        + (donate_first,) * num_first
+        + (donate_rest,) * (num_args - num_first)
+        + (False,) * (num_leaves - num_fun - num_args)
+    )
+
+
+def _split_dynamic(leaves, treedef, donate_mask):
+    donate = [x if d and is_array(x) else None for x, d in zip(leaves, donate_mask)]
+    nodonate = [
+        x if not d and is_array(x) else None for x, d in zip(leaves, donate_mask)
+    ]
+    return jtu.tree_unflatten(treedef, donate), jtu.tree_unflatten(treedef, nodonate)
+
+
 def _preprocess(info, args, kwargs):
-    fun, out_axes, axis_size = info
+    fun, out_axes, axis_size, donate_first, donate_rest = info
     maybe_dummy = _common_preprocess(axis_size, kwargs)
     del kwargs
-    dynamic = filter((fun, args, maybe_dummy, out_axes), is_array)
-    return (dynamic,)
+    leaves, treedef = jtu.tree_flatten((fun, args, maybe_dummy, out_axes))
+    donate_mask = _donate_mask(fun, args, len(leaves), donate_first, donate_rest)
+    return _split_dynamic(leaves, treedef, donate_mask)
 
 
 def _postprocess(out):
@@ -445,6 +531,32 @@ def _postprocess(out):
     return combine(*pmapd, nonpmapd)
 
 
+class _DispatchCache(dict):
+    # This is a cache rather than part of the wrapper's identity: all instances compare
+    # equal, so that it can be a static field of `_PmapWrapper` without making two
+    # `filter_pmap(f)`s unequal (which would e.g. make `filter_jit` retrace). Equal
+    # wrappers have equal configuration, so may share each other's cache.
+    def __hash__(self):
+        return 0
+
+    def __eq__(self, other):
+        return isinstance(other, _DispatchCache)
+
+
+# Keyed by `id`, as all `_DispatchCache`s compare equal.
+_dispatch_caches: "weakref.WeakValueDictionary[int, _DispatchCache]" = (
+    weakref.WeakValueDictionary()
+)
+
+
+def _clear_dispatch_caches():
+    for dispatch_cache in list(_dispatch_caches.values()):
+        dispatch_cache.clear()
+
+
+cache_clears.append(_clear_dispatch_caches)
+
+
 class _PmapWrapper(Module):
     _fun: Callable
     _in_axes: PyTree[AxisSpec]
@@ -452,25 +564,32 @@ class _PmapWrapper(Module):
     _axis_name: Optional[Hashable]
     _axis_size: Optional[int]
     _filter_warning: bool
+    _donate_first: bool
+    _donate_rest: bool
     _pmapkwargs: dict[str, Any]
+    # Maps the structure of the inputs (tree structure, non-array leaves, and the
+    # shapes and dtypes of the array leaves) to the compiled function, so that repeated
+    # calls skip resolving `in_axes` and looking up `_filter_pmap_cache`.
+    _dispatch_cache: _DispatchCache = field(static=True, repr=False)
 
     @property
     def __wrapped__(self):
         return self._fun
 
-    def _call(self, is_lower, args, kwargs):
-        maybe_dummy = _common_preprocess(self._axis_size, kwargs)
-        del kwargs
-
+    def _compile(self, args, leaves, treedef):
         in_axes = _named_in_axes(self._fun, self._in_axes, args)
         in_axes = _resolve_axes(args, in_axes)
         in_axes = (None, in_axes, 0, None)
-
-        dynamic, static = partition(
-            (self._fun, args, maybe_dummy, self._out_axes), is_array
+        static = jtu.tree_unflatten(
+            treedef, [None if is_array(x) else x for x in leaves]
+        )
+        struct = jtu.tree_unflatten(
+            treedef,
+            [
+                jax.ShapeDtypeStruct(x.shape, x.dtype) if is_array(x) else None
+                for x in leaves
+            ],
         )
-        struct = jtu.tree_map(lambda x: jax.ShapeDtypeStruct(x.shape, x.dtype), dynamic)
-
         cached = _filter_pmap_cache(
             self._fun,
             static,
@@ -480,24 +599,53 @@ class _PmapWrapper(Module):
             self._axis_size,
             self._pmapkwargs,
         )
+        donate_mask = _donate_mask(
+            self._fun, args, len(leaves), self._donate_first, self._donate_rest
+        )
+        return cached, donate_mask
 
+    def _call(self, is_lower, args, kwargs):
+        maybe_dummy = _common_preprocess(self._axis_size, kwargs)
+        del kwargs
+
+        leaves, treedef = jtu.tree_flatten(
+            (self._fun, args, maybe_dummy, self._out_axes)
+        )
         if is_lower:
+            cached, donate_mask = self._compile(args, leaves, treedef)
             return Lowered(
-                cached.lower(dynamic),
-                (self._fun, self._out_axes, self._axis_size),
+                cached.lower(*_split_dynamic(leaves, treedef, donate_mask)),
+                (
+                    self._fun,
+                    self._out_axes,
+                    self._axis_size,
+                    self._donate_first,
+                    self._donate_rest,
+                ),
                 _preprocess,  # pyright: ignore
                 _postprocess,  # pyright: ignore
             )
+
+        key = (
+            treedef,
+            tuple((x.shape, x.dtype) if is_array(x) else x for x in leaves),
+        )
+        try:
+            cached, donate_mask = self._dispatch_cache[key]
+        except KeyError:
+            cached, donate_mask = self._dispatch_cache[key] = self._compile(
+                args, leaves, treedef
+            )
+        dynamic_donate, dynamic_nodonate = _split_dynamic(leaves, treedef, donate_mask)
+        if self._filter_warning is True:
+            with warnings.catch_warnings():
+                warnings.filterwarnings(
+                    "ignore", message="Some donated buffers were not usable*"
+                )
+                out = cached(dynamic_donate, dynamic_nodonate)
         else:
-            if self._filter_warning is True:
-                with warnings.catch_warnings():
-                    warnings.filterwarnings(
-                        "ignore", message="Some donated buffers were not usable*"
-                    )
-                    out = cached(dynamic)
-            else:
-                out = cached(dynamic)
-            return _postprocess(out)
+            out = cached(dynamic_donate, dynamic_nodonate)
+        return _postprocess(out)
 
     def __call__(self, /, *args, **kwargs):
         return self._call(False, args, kwargs)
@@ -522,7 +670,9 @@ def filter_pmap(
     out_axes: PyTree[AxisSpec] = if_array(0),
     axis_name: Hashable = None,
     axis_size: Optional[int] = None,
-    donate: Literal["all", "warn", "none"] = "none",
+    donate: Literal[
+        "all", "all-except-first", "warn", "warn-except-first", "none"
+    ] = "none",
 ) -> Callable[[Callable[..., Any]], Callable[..., Any]]: ...
 
 
@@ -534,7 +684,9 @@ def filter_pmap(
     out_axes: PyTree[AxisSpec] = if_array(0),
     axis_name: Hashable = None,
     axis_size: Optional[int] = None,
-    donate: Literal["all", "warn", "none"] = "none",
+    donate: Literal[
+        "all", "all-except-first", "warn", "warn-except-first", "none"
+    ] = "none",
 ) -> Callable[..., Any]: ...
 
 
@@ -546,7 +698,9 @@ def filter_pmap(
     out_axes: PyTree[AxisSpec] = if_array(0),
     axis_name: Hashable = None,
     axis_size: Optional[int] = None,
-    donate: Literal["all", "warn", "none"] = "none",
+    donate: Literal[
+        "all", "all-except-first", "warn", "warn-except-first", "none"
+    ] = "none",
     **pmapkwargs,
 ):
     """
@@ -593,9 +747,16 @@ def filter_pmap(
         should either be:
         - `'all'`: donate all arrays and suppress all warnings about
             unused buffers;
+        - `'all-except-first'`: donate all arrays except for those in the first
+            argument, and suppress all warnings about unused buffers;
         - `'warn'`: as above, but don't suppress unused buffer warnings;
+        - `'warn-except-first'`: as above, but don't suppress unused buffer warnings;
         - `'none'`: the default, disables buffer donation.
 
+        For example a training step `step(batch, params, opt_state)` may use
+        `donate='all-except-first'` so that the replicated parameters and optimiser
+        state are updated in-place on every device.
+
     **Returns:**
 
     The parallelised version of `fun`.
@@ -661,13 +822,35 @@ def filter_pmap(
             DeprecationWarning,
         )
         donate = "all"
-    if donate not in {"all", "warn", "none"}:
+    if donate == "all":
+        filter_warning = True
+        donate_first = True
+        donate_rest = True
+    elif donate == "all-except-first":
+        filter_warning = True
+        donate_first = False
+        donate_rest = True
+    elif donate == "warn":
+        filter_warning = False
+        donate_first = True
+        donate_rest = True
+    elif donate == "warn-except-first":
+        filter_warning = False
+        donate_first = False
+        donate_rest = True
+    elif donate == "none":
+        filter_warning = False
+        donate_first = False
+        donate_rest = False
+    else:
         raise ValueError(
-            "`filter_jit(..., donate=...)` must be one of 'all', 'warn', or 'none'"
+            "`filter_pmap(..., donate=...)` must be one of 'all', 'all-except-first', "
+            "'warn', 'warn-except-first', or 'none'."
         )
-    filter_warning = True if donate == "all" else False
     if donate != "none":
         pmapkwargs["donate_argnums"] = (0,)
+    dispatch_cache = _DispatchCache()
+    _dispatch_caches[id(dispatch_cache)] = dispatch_cache
 
     pmap_wrapper = _PmapWrapper(
         _fun=fun,
@@ -676,6 +859,9 @@ def filter_pmap(
         _axis_name=axis_name,
         _axis_size=axis_size,
         _filter_warning=filter_warning,
+        _donate_first=donate_first,
+        _donate_rest=donate_rest,
         _pmapkwargs=pmapkwargs,
+        _dispatch_cache=dispatch_cache,
     )
     return module_update_wrapper(pmap_wrapper)
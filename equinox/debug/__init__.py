@@ -6,3 +6,5 @@ from ._max_traces import (
     assert_max_traces as assert_max_traces,
     get_num_traces as get_num_traces,
 )
+from ._saved_residuals import saved_residuals as saved_residuals
+from ._tree_mismatches import tree_mismatches as tree_mismatches
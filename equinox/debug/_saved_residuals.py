@@ -0,0 +1,59 @@
+import math
+from collections.abc import Callable
+from typing import Any
+
+import jax
+import jax.tree_util as jtu
+
+from .._filters import combine, filter, is_inexact_array, partition
+
+
+def saved_residuals(
+    fun: Callable, *args: Any, **kwargs: Any
+) -> tuple[int, list[jax.ShapeDtypeStruct]]:
+    """Reports the residuals that are saved on the forward pass, for use on the
+    backward pass, when reverse-mode differentiating `fun(*args, **kwargs)`.
+
+    This is useful for comparing the memory cost of different rematerialisation
+    policies, e.g. those of [`equinox.checkpoint_policy`][] passed to
+    [`equinox.filter_checkpoint`][]. No computation is performed: `fun` is only traced.
+
+    **Arguments:**
+
+    - `fun`: The function to inspect. Its output may be any PyTree; only its
+        floating-point arrays are differentiated.
+    - `*args`, `**kwargs`: The arguments to call `fun` with. All floating-point arrays
+        are differentiated.
+
+    **Returns:**
+
+    A 2-tuple of the total number of bytes of residuals, and a list of the shapes and
+    dtypes of each residual. These include any inputs that must be kept alive for the
+    backward pass.
+
+    !!! Example
+
+        ```python
+        def loss(model, x):
+            return jnp.sum(jax.vmap(model)(x))
+
+        for policy in (None, eqx.checkpoint_policy(save_scopes=["eqx.nn.Linear"])):
+            f = eqx.filter_checkpoint(loss, policy=policy)
+            nbytes, _ = eqx.debug.saved_residuals(f, model, x)
+        ```
+    """
+    dynamic, static = partition((args, kwargs), is_inexact_array)
+    flat, treedef = jtu.tree_flatten(dynamic)
+
+    def _flat_fun(*_flat):
+        _args, _kwargs = combine(jtu.tree_unflatten(treedef, _flat), static)
+        _out = fun(*_args, **_kwargs)
+        return jtu.tree_leaves(filter(_out, is_inexact_array))
+
+    def _residuals(*_flat):
+        _, vjp_fn = jax.vjp(_flat_fun, *_flat)
+        return jtu.tree_leaves(vjp_fn)
+
+    residuals = jax.eval_shape(_residuals, *flat)
+    nbytes = sum(math.prod(x.shape) * x.dtype.itemsize for x in residuals)
+    return nbytes, residuals
@@ -0,0 +1,94 @@
+from typing import Any, Optional
+
+import jax
+import jax.tree_util as jtu
+import numpy as np
+from jaxtyping import ArrayLike, Float, PyTree
+
+from .._filters import is_array
+from .._tree import _array_equal
+
+
+def tree_mismatches(
+    pytree1: PyTree,
+    pytree2: PyTree,
+    *,
+    rtol: Float[ArrayLike, ""] = 0.0,
+    atol: Float[ArrayLike, ""] = 0.0,
+) -> list[tuple[str, Optional[float]]]:
+    """Reports which leaves of two PyTrees are not equal, as determined by
+    [`equinox.tree_equal`][].
+
+    This is useful for finding out *why* `eqx.tree_equal(pytree1, pytree2)` is false.
+    All arrays are moved to the host together, so there is only a single
+    synchronisation point regardless of the number of leaves.
+
+    **Arguments:**
+
+    - `pytree1`: Any PyTree.
+    - `pytree2`: Any PyTree, with the same structure as `pytree1`.
+    - `rtol`: As in [`equinox.tree_equal`][].
+    - `atol`: As in [`equinox.tree_equal`][].
+
+    **Returns:**
+
+    A list of `(path, max_abs_diff)` pairs, one for every pair of leaves that are not
+    equal. `path` is the `jax.tree_util.keystr` of the leaf. For pairs of arrays with
+    the same shape and dtype, `max_abs_diff` is the largest absolute difference
+    between them. For all other pairs of leaves (e.g. arrays with different shapes, or
+    non-arrays), it is `None`.
+
+    !!! Example
+
+        ```python
+        model1 = eqx.nn.MLP(2, 2, 2, 2, key=jr.PRNGKey(0))
+        model2 = eqx.tree_at(lambda m: m.layers[0].bias, model1, replace_fn=lambda b: b + 1)
+        eqx.debug.tree_mismatches(model1, model2)
+        # [('.layers[0].bias', 1.0)]
+        ```
+    """  # noqa: E501
+    paths_and_leaves1, treedef1 = jtu.tree_flatten_with_path(pytree1)
+    paths_and_leaves2, treedef2 = jtu.tree_flatten_with_path(pytree2)
+    if treedef1 != treedef2:
+        raise ValueError(
+            "`pytree1` and `pytree2` must have the same structure, but got "
+            f"{treedef1} and {treedef2}."
+        )
+    mismatches: list[tuple[str, Any]] = []
+    array_paths = []
+    xs = []
+    ys = []
+    for (path, x), (_, y) in zip(paths_and_leaves1, paths_and_leaves2):
+        if is_array(x) and is_array(y):
+            if x.shape == y.shape and x.dtype == y.dtype:
+                if jax.dtypes.issubdtype(x.dtype, jax.dtypes.prng_key):
+                    # Compare the underlying integers of PRNG keys.
+                    x = jax.random.key_data(x)
+                    y = jax.random.key_data(y)
+                array_paths.append(path)
+                xs.append(x)
+                ys.append(y)
+            else:
+                mismatches.append((path, None))
+        elif is_array(x) or is_array(y) or x != y:
+            mismatches.append((path, None))
+    xs, ys = jax.device_get((xs, ys))
+    for path, x, y in zip(array_paths, xs, ys):
+        x = np.asarray(x)
+        y = np.asarray(y)
+        if not _array_equal(x, y, np, rtol, atol):
+            if x.size == 0:
+                diff = 0.0
+            elif x.dtype == np.bool_:
+                diff = float(np.any(x != y))
+            else:
+                if np.issubdtype(x.dtype, np.integer):
+                    # Avoid wraparound when subtracting unsigned (or small) integers.
+                    x = x.astype(np.float64)
+                    y = y.astype(np.float64)
+                diff = float(np.max(np.abs(x - y)))
+            mismatches.append((path, diff))
+    # Report in the order of the leaves.
+    order = {id(path): i for i, (path, _) in enumerate(paths_and_leaves1)}
+    mismatches.sort(key=lambda pair: order[id(pair[0])])
+    return [(jtu.keystr(path), diff) for path, diff in mismatches]
@@ -53,6 +53,8 @@ from ._finalise_jaxpr import (
 from ._getkey import GetKey as GetKey
 from ._loop import (
     buffer_at_set as buffer_at_set,
+    compacted_while_loop as compacted_while_loop,
+    HostCheckpointStats as HostCheckpointStats,
     maybe_set_p as maybe_set_p,
     MaybeBuffer as MaybeBuffer,
     scan as scan,
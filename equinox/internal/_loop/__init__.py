@@ -4,4 +4,6 @@ from .common import (
     MaybeBuffer as MaybeBuffer,
     select_if_vmap_p as select_if_vmap_p,
 )
+from .compacted import compacted_while_loop as compacted_while_loop
 from .loop import scan as scan, while_loop as while_loop
+from .offload import HostCheckpointStats as HostCheckpointStats
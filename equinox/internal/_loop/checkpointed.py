@@ -22,6 +22,12 @@ equal to `(num_checkpoints + 1) * (num_checkpoints + 2) / 2`; see the Stumm--Wal
 paper. After that is may make extra steps (as compared to the offline version), but does
 still have similar asymptotic complexity.
 
+If the number of steps is known in advance -- `max_steps` is passed and `cond_fun`
+trivially returns `True`, as in `equinox.internal.scan` -- then we instead use the
+offline schedule of `revolve` (the second reference below), which places checkpoints
+optimally for that number of steps. The schedule is computed from a small table of
+binomial coefficients, which is precomputed on the host.
+
 For context, the two classical references for (offline) treeverse are:
 
     Griewank 1992
@@ -50,22 +56,34 @@ import math
 import operator
 import typing
 from collections.abc import Callable, Sequence
-from typing import Any, cast, Optional, TypeVar, Union
+from typing import Any, cast, Literal, Optional, TypeVar, Union
 
 import jax
 import jax.core
 import jax.lax as lax
 import jax.numpy as jnp
 import jax.tree_util as jtu
+import numpy as np
 from jaxtyping import Array, ArrayLike, Bool
 
 from ..._ad import filter_closure_convert, filter_custom_jvp, filter_custom_vjp
 from ..._errors import error_if
 from ..._filters import combine, filter, is_array, is_inexact_array, partition
+from ..._make_jaxpr import filter_make_jaxpr
 from ..._module import Static
 from ..._tree import tree_at, tree_equal
 from .._nontraceable import nonbatchable
 from .common import common_rewrite, fixed_asarray
+from .offload import (
+    host_free,
+    host_maybe_write,
+    host_permute,
+    host_read,
+    HostCheckpointStats,
+    HostOffload,
+    HostResiduals,
+    new_host_residuals,
+)
 
 
 _T = TypeVar("_T")
@@ -81,6 +99,8 @@ def checkpointed_while_loop(
     max_steps: Optional[int] = None,
     buffers: Optional[Callable[[_T], Union[_Node, Sequence[_Node]]]] = None,
     checkpoints: Optional[int] = None,
+    checkpoint_memory: Literal["device", "host"] = "device",
+    host_stats_callback: Optional[Callable[[HostCheckpointStats], Any]] = None,
 ) -> _T:
     """Reverse-mode autodifferentiable while loop, using optimal online checkpointing.
 
@@ -108,6 +128,18 @@ def checkpointed_while_loop(
         updated throughout the loop.)
     - `buffers`: If passed, then every array in `tree_leaves(buffers(init_val))` will
         become a write-only buffer. (Supporting only `.at[].set()`.)
+    - `checkpoint_memory`: Where to store the checkpoints. Either `"device"` (the
+        default), or `"host"`, in which case they are copied to host memory whenever
+        they are saved and back to the device whenever they are loaded. Only a single
+        copy of `init_val` is then held on the device (rather than `checkpoints`-many),
+        so that many more checkpoints may be used, at the cost of these transfers.
+        Each transfer is a synchronous `jax.experimental.io_callback`, which blocks
+        the loop until a full copy of the checkpoint has been made on the host (or
+        read back from it), and is not overlapped with computation.
+    - `host_stats_callback`: Only used if `checkpoint_memory="host"`. If passed, then
+        this is called on the host at the end of each backward pass with an
+        `equinox.internal.HostCheckpointStats`, reporting the number of bytes moved
+        between device and host, and the number of recomputed steps.
 
     **Returns:**
 
@@ -117,6 +149,28 @@ def checkpointed_while_loop(
 
         This function is not forward-mode autodifferentiable.
 
+    !!! Info
+
+        If the number of steps is known in advance, then the checkpoints can be placed
+        optimally ahead of time, using the offline `revolve` schedule rather than an
+        online one. This is done automatically if `max_steps` is passed and `cond_fun`
+        returns the Python value `True` (rather than an array), in which case the loop
+        always runs for exactly `max_steps` steps. For example, this is the case for
+        `equinox.internal.scan`. (The online schedule is already optimal if
+        `max_steps <= (checkpoints + 1) * (checkpoints + 2) / 2`, so this only makes a
+        difference for larger `max_steps`.)
+
+        To check this, `cond_fun` is traced one extra time on `init_val` whenever
+        `max_steps` is large enough for this to matter, so any Python side effects in
+        `cond_fun` will run an extra time.
+
+    !!! Info
+
+        If `checkpoint_memory="host"`, then the host copies of the checkpoints are
+        freed at the end of the backward pass. A forward pass whose backward pass is
+        never run (e.g. `jax.vjp` without calling the returned function) will not free
+        them.
+
     !!! Info
 
         `buffers` is useful in the following way.
@@ -233,11 +287,25 @@ def checkpointed_while_loop(
             assert 2 * max_steps < ((checkpoints + 1) * (checkpoints + 2))
     if checkpoints < 1:
         raise ValueError("Must have at least one checkpoint")
+    if checkpoint_memory == "device":
+        offload = None
+    elif checkpoint_memory == "host":
+        offload = HostOffload(host_stats_callback)
+    else:
+        raise ValueError("`checkpoint_memory` must be either 'device' or 'host'.")
     init_val = jtu.tree_map(fixed_asarray, init_val)
     if max_steps == 0:
         return init_val
     if max_steps is not None:
         checkpoints = min(checkpoints, max_steps)
+    # Stumm--Walther is already optimal for
+    # `max_steps <= (checkpoints + 1)(checkpoints + 2)/2`, so only use `revolve` beyond
+    # that. (This also excludes `checkpoints == max_steps`.)
+    revolve = (
+        max_steps is not None
+        and 2 * max_steps > (checkpoints + 1) * (checkpoints + 2)
+        and _always_true(cond_fun, init_val)
+    )
     cond_fun_, body_fun_, init_val_, buffers_ = common_rewrite(
         cond_fun, body_fun, init_val, max_steps, buffers, makes_false_steps=False
     )
@@ -247,12 +315,22 @@ def checkpointed_while_loop(
     body_fun_ = filter_closure_convert(body_fun_, init_val_)
     vjp_arg = (init_val_, body_fun_)
     final_val_ = _checkpointed_while_loop(
-        vjp_arg, cond_fun_, checkpoints, buffers_, max_steps
+        vjp_arg, cond_fun_, checkpoints, buffers_, max_steps, offload, revolve
     )
     _, _, _, final_val = _stop_gradient_on_unperturbed(init_val_, final_val_, body_fun_)
     return final_val
 
 
+def _always_true(cond_fun, init_val) -> bool:
+    """Whether `cond_fun` is statically known to always return `True`.
+
+    This traces `cond_fun` (an extra time, on top of tracing it for the loop itself), so
+    any Python side effects it has will run again.
+    """
+    _, _, out = filter_make_jaxpr(cond_fun)(init_val)
+    return type(out) is bool and out
+
+
 def _stop_gradient(x):
     if is_array(x):
         return lax.stop_gradient(x)
@@ -261,9 +339,11 @@ def _stop_gradient(x):
 
 
 @filter_custom_vjp
-def _checkpointed_while_loop(vjp_arg, cond_fun, checkpoints, buffers, max_steps):
+def _checkpointed_while_loop(
+    vjp_arg, cond_fun, checkpoints, buffers, max_steps, offload, revolve
+):
     """Uncheckpointed forward used when not differentiating."""
-    del checkpoints, buffers, max_steps
+    del checkpoints, buffers, max_steps, offload, revolve
     init_val, body_fun = vjp_arg
     while_loop = jax.named_call(lax.while_loop, name="checkpointed-no-vjp")
     # Hashable wrapper; JAX issue #13554 and
@@ -286,6 +366,38 @@ def _unique_index(i, x):
     return x.at[i].get(unique_indices=True)
 
 
+def _read_residual(index, residuals):
+    """Reads the checkpoint at `index`, from either device or host memory."""
+    if isinstance(residuals, HostResiduals):
+        return host_read(residuals, index)
+    else:
+        return jtu.tree_map(ft.partial(_scalar_index, index), residuals)
+
+
+def _maybe_write_residual(pred, index, residuals, val):
+    """Writes `val` to the checkpoint at `index` if `pred`, in either device or host
+    memory.
+    """
+    if isinstance(residuals, HostResiduals):
+        return host_maybe_write(residuals, index, pred, val)
+    else:
+
+        def _maybe_update(xs, x):
+            where_x = jnp.where(pred, x, _scalar_index(index, xs))
+            where_x = cast(Array, where_x)
+            return lax.dynamic_update_index_in_dim(xs, where_x, index, axis=0)
+
+        return jtu.tree_map(_maybe_update, residuals, val)
+
+
+def _permute_residuals(permutation, residuals):
+    """Reorders the checkpoints, in either device or host memory."""
+    if isinstance(residuals, HostResiduals):
+        return host_permute(residuals, permutation)
+    else:
+        return jtu.tree_map(ft.partial(_unique_index, permutation), residuals)
+
+
 def _stumm_walther_i(step, save_state):
     """Algorithm 1 from:
 
@@ -382,8 +494,98 @@ def _wang_moin_wrapper(step, save_state, residual_steps):
     return save_residual, index, (save_state_sw_i, save_state_wm_2)
 
 
+def _binomial(snaps, reps):
+    """The number of steps that can be reversed using `snaps`-many checkpoints, whilst
+    recomputing each step at most `reps`-many times. (Griewank and Walther 2000.)
+    """
+    if snaps < 0 or reps < 0:
+        return 0
+    return math.comb(snaps + reps, snaps)
+
+
+def _revolve_offset(steps, snaps, reps, binomial, where):
+    """Given a checkpoint at some step, and that we wish to reverse the `steps`-many
+    steps after it, this computes how many steps after it the next checkpoint should be
+    placed. This is the `revolve` algorithm, from Griewank and Walther 2000.
+
+    `snaps` is the number of free checkpoints, plus one for the current checkpoint.
+    `reps` is the smallest value such that `binomial(snaps, reps) >= steps`.
+
+    This is used both on the host (with Python integers) and on the device (with JAX
+    arrays), which is why `binomial` and `where` are passed in.
+    """
+    range_ = binomial(snaps, reps)
+    bino1 = binomial(snaps, reps - 1)
+    bino2 = binomial(snaps - 1, reps - 1)
+    bino3 = binomial(snaps - 2, reps - 1)
+    bino4 = binomial(snaps, reps - 2)
+    bino5 = binomial(snaps - 3, reps)
+    offset = where(
+        steps <= bino1 + bino3,
+        bino4,
+        where(steps >= range_ - bino5, bino1, steps - bino2 - bino3),
+    )
+    return where(offset < 1, 1, offset)
+
+
+def _host_where(pred, x, y):
+    return x if pred else y
+
+
+def _revolve_positions(num_steps, checkpoints, int_dtype):
+    """The steps at which to save checkpoints on the forward pass, when using `revolve`.
+    Padded to length `checkpoints + 1` with `_unreachable_checkpoint_step`.
+    """
+    positions = [0]
+    # Stop once all checkpoints are used, or if there are <=2 steps left to reverse, as
+    # in `_calc_next_checkpoint`.
+    while len(positions) < checkpoints and num_steps - positions[-1] > 2:
+        steps = num_steps - positions[-1]
+        snaps = checkpoints - len(positions) + 1
+        reps = 0
+        while _binomial(snaps, reps) < steps:
+            reps += 1
+        offset = _revolve_offset(steps, snaps, reps, _binomial, _host_where)
+        positions.append(positions[-1] + offset)
+    unreachable = _unreachable_checkpoint_step(int_dtype)
+    positions = positions + [unreachable] * (checkpoints + 1 - len(positions))
+    return np.array(positions, dtype=int_dtype)
+
+
+def _revolve_table(num_steps, checkpoints, int_dtype):
+    """Precomputes `_binomial(snaps, reps)` for `-3 <= snaps <= checkpoints + 1` and
+    `-2 <= reps <= max_reps`, for use on the device. Here, `max_reps` is the most that
+    will ever be needed with `snaps >= 2`. (With `snaps == 1` there is no free
+    checkpoint to place, so the result is unused.)
+    """
+    max_reps = 0
+    while _binomial(min(2, checkpoints), max_reps) < num_steps:
+        max_reps += 1
+    # Clip so that sums and differences of entries cannot overflow. The clipped entries
+    # are much larger than `num_steps`, and are only compared against it.
+    clip = np.iinfo(int_dtype).max // 4
+    table = [
+        [min(_binomial(snaps, reps), clip) for reps in range(-2, max_reps + 1)]
+        for snaps in range(-3, checkpoints + 2)
+    ]
+    return np.array(table, dtype=int_dtype)
+
+
+def _revolve_should_save(step, save_state, positions):
+    """As `_should_save_residual`, when the checkpoints are placed at precomputed
+    `positions`. Then `save_state` is just the number of checkpoints saved so far.
+    """
+    step, save_state = nonbatchable((step, save_state))
+    index = save_state
+    save_residual = step == positions[index]
+    save_state2 = jnp.where(save_residual, index + 1, index)
+    out = save_residual, index, save_state2
+    out = nonbatchable(out)
+    return out
+
+
 def _should_save_residual(
-    step, save_state, residual_steps, u2_minus_1, checkpoints, max_steps
+    step, save_state, residual_steps, u2_minus_1, checkpoints, max_steps, positions
 ):
     """This is the controller for whether we should save the current value at each step,
     and if so which memory location to save it in.
@@ -391,7 +593,12 @@ def _should_save_residual(
     # TODO: also implement Algorithm 2 of Stumm and Walther, which gives improved
     # results for u2 < step < u3.
 
-    if checkpoints == max_steps:
+    if positions is not None:
+        # Offline case: the number of steps is known in advance.
+        save_residual, index, save_state2 = _revolve_should_save(
+            step, save_state, positions
+        )
+    elif checkpoints == max_steps:
         # Important special case! We don't need to do any computations in this case.
         # This is a measurable performance optimisation.
         save_residual = True
@@ -432,7 +639,7 @@ def _array_to_none(x):
 
 @_checkpointed_while_loop.def_fwd
 def _checkpointed_while_loop_fwd(
-    perturbed, vjp_arg, cond_fun, checkpoints, buffers, max_steps
+    perturbed, vjp_arg, cond_fun, checkpoints, buffers, max_steps, offload, revolve
 ):
     """Run the while loop, saving checkpoints whenever the controller
     (`_should_save_residual`) requires.
@@ -452,33 +659,39 @@ def _checkpointed_while_loop_fwd(
 
         step2 = step + 1
         save_residual, index, save_state2 = _should_save_residual(
-            step, save_state, residual_steps, u2_minus_1, checkpoints, max_steps
+            step,
+            save_state,
+            residual_steps,
+            u2_minus_1,
+            checkpoints,
+            max_steps,
+            positions,
         )
         val2 = body_fun(val)
-
-        def _maybe_update(xs, x):
-            where_x = jnp.where(save_residual, x, _scalar_index(index, xs))
-            where_x = cast(Array, where_x)
-            return lax.dynamic_update_index_in_dim(xs, where_x, index, axis=0)
-
         val_no_buffers = tree_at(buffers(None), val, replace_fn=_array_to_none)
-        residual_steps2, residuals2 = jtu.tree_map(
-            _maybe_update,
-            (residual_steps, residuals),
-            (step, val_no_buffers),
+        residual_steps2 = _maybe_write_residual(
+            save_residual, index, residual_steps, step
+        )
+        residuals2 = _maybe_write_residual(
+            save_residual, index, residuals, val_no_buffers
         )
         save_state2, residual_steps2 = nonbatchable((save_state2, residual_steps2))
         return step2, save_state2, val2, residual_steps2, residuals2
 
     int_dtype = jnp.int64 if jax.config.jax_enable_x64 else jnp.int32  # pyright: ignore
     init_step = jnp.array(0, dtype=int_dtype)  # dtype matches init_residual_steps
-    init_save_state_sw_i = 0, checkpoints, checkpoints, True
-    dtype_max = jnp.iinfo(int_dtype).max  # pyright: ignore
-    init_save_state_wm = (
-        jnp.zeros(checkpoints, dtype=int_dtype).at[0].set(dtype_max),
-        jnp.full((checkpoints,), False),
-    )
-    init_save_state = (init_save_state_sw_i, init_save_state_wm)
+    if revolve:
+        positions = jnp.asarray(_revolve_positions(max_steps, checkpoints, int_dtype))
+        init_save_state = jnp.array(0, dtype=int_dtype)
+    else:
+        positions = None
+        init_save_state_sw_i = 0, checkpoints, checkpoints, True
+        dtype_max = jnp.iinfo(int_dtype).max  # pyright: ignore
+        init_save_state_wm = (
+            jnp.zeros(checkpoints, dtype=int_dtype).at[0].set(dtype_max),
+            jnp.full((checkpoints,), False),
+        )
+        init_save_state = (init_save_state_sw_i, init_save_state_wm)
     # Uses the fact that `_unreachable_checkpoint_step` returns intmax, so that in our
     # sorting later, in the steps < checkpoints case, all unused memory gets sorted
     # to the end.
@@ -487,10 +700,13 @@ def _checkpointed_while_loop_fwd(
     )
 
     init_val_no_buffers = tree_at(buffers(None), init_val, replace_fn=_array_to_none)
-    # Fill value for the memory isn't important.
-    init_residuals = jtu.tree_map(
-        lambda x: jnp.zeros((checkpoints,) + x.shape, x.dtype), init_val_no_buffers
-    )
+    if offload is None:
+        # Fill value for the memory isn't important.
+        init_residuals = jtu.tree_map(
+            lambda x: jnp.zeros((checkpoints,) + x.shape, x.dtype), init_val_no_buffers
+        )
+    else:
+        init_residuals = new_host_residuals(init_val_no_buffers)
     init_carry = (
         init_step,
         init_save_state,
@@ -514,13 +730,12 @@ def _checkpointed_while_loop_fwd(
     # reading and writing the most recent residual to and from the end. So sort the
     # residuals we've produced here to obtain the desired invariant, i.e. that the
     # residuals are in order.
-    if checkpoints != max_steps:
-        # If `checkpoints == max_steps` then residuals are already sorted.
+    if checkpoints != max_steps and not revolve:
+        # If `checkpoints == max_steps`, or if using `revolve`, then residuals are
+        # already sorted.
         sort_indices = jnp.argsort(final_residual_steps)
-        final_residual_steps, final_residuals = jtu.tree_map(
-            ft.partial(_unique_index, sort_indices),
-            (final_residual_steps, final_residuals),
-        )
+        final_residual_steps = _unique_index(sort_indices, final_residual_steps)
+        final_residuals = _permute_residuals(sort_indices, final_residuals)
     num_steps, final_residual_steps = nonbatchable((num_steps, final_residual_steps))
     return final_val, (num_steps, final_residual_steps, final_residuals, filled_buffers)
 
@@ -539,9 +754,8 @@ def _load_from_checkpoint(
     # (Clip to zero just to not error from index == 0 on the very last step; the result
     # is unused in this case.)
     read_index = jnp.maximum(index - 1, 0)
-    step_val2, val2 = jtu.tree_map(
-        ft.partial(_scalar_index, read_index), (residual_steps, residuals)
-    )
+    step_val2 = _scalar_index(read_index, residual_steps)
+    val2 = _read_residual(read_index, residuals)
 
     # We may need to keep this residual around, and jump back to it multiple times.
     # (In which case index2 == index.) Or this may be the last time and we don't need to
@@ -570,6 +784,7 @@ def _maybe_save_to_checkpoint(
     residual_steps,
     residuals,
     checkpoints,
+    revolve_table,
 ):
     """Might save a residual to the store of checkpoints."""
     (
@@ -582,19 +797,16 @@ def _maybe_save_to_checkpoint(
         (step_val, step_grad_val, step_next_checkpoint, index, residual_steps)
     )
     save_checkpoint = step_val == step_next_checkpoint
-
-    def _maybe_update(xs, x):
-        where_x = jnp.where(save_checkpoint, x, _scalar_index(index, xs))
-        where_x = cast(Array, where_x)
-        return lax.dynamic_update_index_in_dim(xs, where_x, index, axis=0)
-
-    residual_steps2, residuals2 = jtu.tree_map(
-        _maybe_update, (residual_steps, residuals), (step_val, val)
+    residual_steps2 = _maybe_write_residual(
+        save_checkpoint, index, residual_steps, step_val
     )
+    residuals2 = _maybe_write_residual(save_checkpoint, index, residuals, val)
     index2 = jnp.where(save_checkpoint, index + 1, index)
     step_next_checkpoint2 = jnp.where(
         save_checkpoint,
-        _calc_next_checkpoint(step_val, step_grad_val, index2, checkpoints),
+        _calc_next_checkpoint(
+            step_val, step_grad_val, index2, checkpoints, revolve_table
+        ),
         step_next_checkpoint,
     )
     index2, step_next_checkpoint2, residual_steps2 = nonbatchable(
@@ -603,19 +815,34 @@ def _maybe_save_to_checkpoint(
     return index2, step_next_checkpoint2, residual_steps2, residuals2
 
 
-def _calc_next_checkpoint(step_val, step_grad_val, index, checkpoints):
+def _calc_next_checkpoint(step_val, step_grad_val, index, checkpoints, revolve_table):
     """Determines the step at which we next want to save a checkpoint."""
     # Note that when this function is called, `step_val` is always at the most recent
     # checkpoint.
     step_val, step_grad_val, index = nonbatchable((step_val, step_grad_val, index))
 
-    # Using treeverse...
-    # ...Checkpoints are either placed binomially (most of the time)...
-    out_binomial = step_val + (step_grad_val - step_val) // 2
-    # ...or linearly (when the space to cross fits within the checkpoint budget).
-    out_linear = step_val + 1
-    within_budget = (step_grad_val - step_val - 2) <= (checkpoints - index)
-    out = jnp.where(within_budget, out_linear, out_binomial)
+    if revolve_table is None:
+        # Using treeverse...
+        # ...Checkpoints are either placed binomially (most of the time)...
+        out_binomial = step_val + (step_grad_val - step_val) // 2
+        # ...or linearly (when the space to cross fits within the checkpoint budget).
+        out_linear = step_val + 1
+        within_budget = (step_grad_val - step_val - 2) <= (checkpoints - index)
+        out = jnp.where(within_budget, out_linear, out_binomial)
+    else:
+        # Using revolve.
+        steps = step_grad_val - step_val
+        # Free checkpoints, plus the one at `step_val`.
+        snaps = checkpoints - index + 1
+        max_reps = revolve_table.shape[1] - 3
+
+        def _binomial_lookup(_snaps, _reps):
+            return revolve_table[_snaps + 3, _reps + 2]
+
+        reps = jnp.sum(revolve_table[snaps + 3, 2:] < steps, dtype=steps.dtype)
+        reps = jnp.minimum(reps, max_reps)
+        offset = _revolve_offset(steps, snaps, reps, _binomial_lookup, jnp.where)
+        out = step_val + offset
     # Why -2?
     # If `step_val + 1 == step_grad_val` then we're just going to make a single U-turn,
     # and don't need to store any checkpoints.
@@ -705,7 +932,9 @@ def _fwd(
     )
 
 
-def _make_u_turn(vjp_fn, residual_steps, residuals, checkpoints, max_steps):
+def _make_u_turn(
+    vjp_fn, residual_steps, residuals, checkpoints, max_steps, revolve_table
+):
     """Propagates the cotangent backward one step."""
     residual_steps = nonbatchable(residual_steps)
 
@@ -727,7 +956,7 @@ def _make_u_turn(vjp_fn, residual_steps, residuals, checkpoints, max_steps):
             step_grad_val2, index, residual_steps, residuals, checkpoints, max_steps
         )
         step_next_checkpoint2 = _calc_next_checkpoint(
-            step_val2, step_grad_val2, index2, checkpoints
+            step_val2, step_grad_val2, index2, checkpoints, revolve_table
         )
         step_val2, step_grad_val2, step_next_checkpoint2, index2 = nonbatchable(
             (step_val2, step_grad_val2, step_next_checkpoint2, index2)
@@ -755,6 +984,8 @@ def _checkpointed_while_loop_bwd(
     checkpoints,
     buffers,
     max_steps,
+    offload,
+    revolve,
 ):
     """Time for the complicated bit: iterate backward through a checkpointed while loop,
     loading values from checkpoints and using treeverse to toggle between forward and
@@ -791,6 +1022,7 @@ def _checkpointed_while_loop_bwd(
             grad_body_fun,
             residual_steps,
             residuals,
+            recomputed_steps,
         ) = carry
         (
             step_val,
@@ -844,6 +1076,9 @@ def _checkpointed_while_loop_bwd(
         else:
             perform_u_turn = step_val + 1 == step_grad_val
             perform_u_turn = nonbatchable(perform_u_turn)
+        recomputed_steps2 = jnp.where(
+            perform_u_turn, recomputed_steps, recomputed_steps + 1
+        )
         (
             step_val2,
             step_grad_val2,
@@ -854,7 +1089,14 @@ def _checkpointed_while_loop_bwd(
             grad_body_fun2,
         ) = lax.cond(
             perform_u_turn,
-            _make_u_turn(vjp_fn, residual_steps, residuals, checkpoints, max_steps),
+            _make_u_turn(
+                vjp_fn,
+                residual_steps,
+                residuals,
+                checkpoints,
+                max_steps,
+                revolve_table,
+            ),
             _fwd,
             step_val,
             step_grad_val,
@@ -894,6 +1136,7 @@ def _checkpointed_while_loop_bwd(
                 residual_steps,
                 residuals,
                 checkpoints,
+                revolve_table,
             )
 
         return (
@@ -906,6 +1149,7 @@ def _checkpointed_while_loop_bwd(
             grad_body_fun2,
             residual_steps2,
             residuals2,
+            recomputed_steps2,
         )
 
     # We can index into our residuals using 0, 1, ..., checkpoints - 1.
@@ -913,7 +1157,15 @@ def _checkpointed_while_loop_bwd(
     # 0, 1, ..., checkpoints - 1, checkpoints, where `index == checkpoints` indicates
     # that there are no empty spots and the whole buffer is full. (And this is used in
     # `_calc_step_next_checkpoint`.)
-    init_index = jnp.minimum(num_steps, checkpoints)
+    if revolve:
+        int_dtype = init_residual_steps.dtype
+        revolve_table = jnp.asarray(_revolve_table(max_steps, checkpoints, int_dtype))
+        # Not every checkpoint is necessarily used on the forward pass.
+        positions = _revolve_positions(max_steps, checkpoints, int_dtype)
+        init_index = jnp.sum(positions < num_steps, dtype=int_dtype)
+    else:
+        revolve_table = None
+        init_index = jnp.minimum(num_steps, checkpoints)
     init_step_grad_val = num_steps
     init_step_val, init_val, init_index = _load_from_checkpoint(
         init_step_grad_val,
@@ -924,7 +1176,7 @@ def _checkpointed_while_loop_bwd(
         max_steps,
     )
     init_step_next_checkpoint = _calc_next_checkpoint(
-        init_step_val, init_step_grad_val, init_index, checkpoints
+        init_step_val, init_step_grad_val, init_index, checkpoints, revolve_table
     )
 
     #
@@ -1110,6 +1362,13 @@ def _checkpointed_while_loop_bwd(
     # depend only on those outputs which have symbolic zero cotangents -- then we can
     # skip the whole computation.
     if len(jtu.tree_leaves(grad_final_val)) == 0:
+        if offload is not None:
+            host_free(
+                init_residuals,
+                num_steps,
+                jnp.array(0, dtype=num_steps.dtype),
+                offload.stats_callback,
+            )
         return jtu.tree_map(lambda _: None, (grad_final_val, body_fun))
     symbolic_zero_gradient = jax.eval_shape(
         _resolve_symbolic_zeros, grad_final_val
@@ -1134,6 +1393,7 @@ def _checkpointed_while_loop_bwd(
         grad_final_body_fun,
         init_residual_steps,
         init_residuals,
+        jnp.array(0, dtype=num_steps.dtype),
     )
     # Note that the saved checkpoints hold both (a) values computed on the forward
     # pass, and (b) checkpoints recomputed on the backward pass. (We don't need to
@@ -1166,12 +1426,16 @@ def _checkpointed_while_loop_bwd(
     # -------
     # `residual_steps` is the memory holding the `step` for each checkpoint
     # `residuals` is the memory holding the `val` for each checkpoint
+    # `recomputed_steps` counts the number of steps of the primal computation that have
+    #   been recomputed.
 
     # Not reverse mode autodifferentiable, but it is forward-mode autodifferentiable!
     # That means we can do Hessians, at least.
     while_loop = jax.named_call(lax.while_loop, name="checkpointed-bwd")
     final_carry = while_loop(_cond_fun, _body_fun, init_carry)
-    *_, grad_init_val, grad_body_fun, _, _ = final_carry
+    *_, grad_init_val, grad_body_fun, _, final_residuals, recomputed_steps = final_carry
+    if offload is not None:
+        host_free(final_residuals, num_steps, recomputed_steps, offload.stats_callback)
     out = grad_init_val, grad_body_fun
     return out
 
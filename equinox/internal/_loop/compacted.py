@@ -0,0 +1,218 @@
+from collections.abc import Callable
+from typing import Optional, TypeVar, Union
+
+import jax
+import jax.lax as lax
+import jax.numpy as jnp
+import jax.tree_util as jtu
+from jax.custom_batching import custom_vmap
+from jaxtyping import Array, Bool, Float
+
+from ..._ad import filter_closure_convert
+from ..._filters import combine, is_array, partition
+from .common import fixed_asarray
+
+
+_T = TypeVar("_T")
+_Bool = Union[bool, Bool[Array, ""]]
+
+
+def compacted_while_loop(
+    cond_fun: Callable[[_T], _Bool],
+    body_fun: Callable[[_T], _T],
+    init_val: _T,
+    *,
+    max_steps: Optional[int] = None,
+    compact_every: int = 16,
+) -> tuple[_T, Float[Array, ""]]:
+    """A while loop that, when vmapped, periodically compacts the batch down to just
+    those lanes that are still running.
+
+    A vmapped `lax.while_loop` keeps every batch lane running until the slowest one has
+    finished, with the finished lanes just discarding their results. This is wasteful
+    when the number of steps varies a lot between lanes, e.g. for adaptive ODE solvers.
+
+    Instead, every `compact_every` steps, the lanes that are still running are gathered
+    into a dense batch. Its size is the smallest of `B, B/2, B/4, ..., 1` (where `B` is
+    the vmapped batch size) that fits them. The loop then runs on that smaller batch,
+    after which the results are scattered back into the full batch.
+
+    **Arguments:**
+
+    - `cond_fun`: As `lax.while_loop`.
+    - `body_fun`: As `lax.while_loop`.
+    - `init_val`: As `lax.while_loop`.
+    - `max_steps`: A bound on the maximum number of steps, after which the loop
+        terminates unconditionally. Can be set to `None` for arbitrarily many steps.
+    - `compact_every`: How many steps to take between compactions. Smaller values
+        track the number of running lanes more closely, at the cost of more gathers and
+        scatters.
+
+    **Returns:**
+
+    A 2-tuple of `(final_val, utilisation)`. `final_val` is the final value; as
+    `lax.while_loop`. `utilisation` is a scalar: the fraction of lanes in each executed
+    `body_fun` call that were still running, averaged over all executed calls. (Which
+    is always one when not vmapped.)
+
+    !!! Warning
+
+        This loop is forward-mode autodifferentiable but not reverse-mode
+        autodifferentiable; as `lax.while_loop`.
+    """
+    if not isinstance(compact_every, int) or compact_every < 1:
+        raise ValueError("`compact_every` must be a positive integer")
+    if max_steps is not None and (not isinstance(max_steps, int) or max_steps < 0):
+        raise ValueError("`max_steps` must be `None` or a non-negative integer")
+
+    init_val = jtu.tree_map(fixed_asarray, init_val)
+    # Any tracers that `cond_fun` or `body_fun` close over are made part of their PyTree
+    # structure, so that `custom_vmap` can see whether they are batched.
+    cond_fun = filter_closure_convert(cond_fun, init_val)
+    body_fun = filter_closure_convert(body_fun, init_val)
+    dynamic, static = partition((init_val, cond_fun, body_fun), is_array)
+
+    def _is_running(val, steps, cond, width, in_axes):
+        pred = jax.vmap(_call, in_axes=in_axes, axis_size=width)(cond, val)
+        if max_steps is not None:
+            pred = pred & (steps < max_steps)
+        return pred
+
+    def _step(val, body, width, in_axes):
+        out = jax.vmap(_call, in_axes=in_axes, axis_size=width)(body, val)
+        return partition(out, is_array)[0]
+
+    @custom_vmap
+    def _loop(_dynamic):
+        val, cond, body = combine(_dynamic, static)
+
+        def _cond(carry):
+            _val, _steps = carry
+            pred = cond(_val)
+            if max_steps is not None:
+                pred = pred & (_steps < max_steps)
+            return pred
+
+        def _body(carry):
+            _val, _steps = carry
+            return body(_val), _steps + 1
+
+        val, _ = lax.while_loop(_cond, _body, (val, jnp.array(0, dtype=jnp.int32)))
+        return partition(val, is_array)[0], jnp.array(1.0)
+
+    @_loop.def_vmap
+    def _loop_vmap(axis_size, in_batched, _dynamic):
+        [batched] = in_batched
+        val_dynamic, cond_dynamic, body_dynamic = _dynamic
+        val_batched, cond_batched, body_batched = batched
+        # Every lane gets its own copy of the carry.
+        val_dynamic = jtu.tree_map(
+            lambda x, b: x if b else jnp.broadcast_to(x, (axis_size,) + x.shape),
+            val_dynamic,
+            val_batched,
+        )
+        val_static, cond_static, body_static = static
+        cond_axes = jtu.tree_map(lambda b: 0 if b else None, cond_batched)
+        body_axes = jtu.tree_map(lambda b: 0 if b else None, body_batched)
+
+        # Runs up to `compact_every` steps on the first `width` running lanes.
+        def _make_branch(width):
+            def _branch(carry):
+                val, steps, running, lane_steps, lane_slots = carry
+                # Stable sort: running lanes first, in their original order.
+                index = jnp.argsort(~running, stable=True)[:width]
+                sub_val = jtu.tree_map(lambda x: x[index], val)
+                sub_steps = steps[index]
+                sub_running = running[index]
+                sub_cond, sub_body = jtu.tree_map(
+                    lambda x, b: x[index] if b else x,
+                    (cond_dynamic, body_dynamic),
+                    (cond_batched, body_batched),
+                )
+                sub_cond = combine(sub_cond, cond_static)
+                sub_body = combine(sub_body, body_static)
+
+                def _inner_cond(inner_carry):
+                    i, _, _, _running, _, _ = inner_carry
+                    return (i < compact_every) & jnp.any(_running)
+
+                def _inner_body(inner_carry):
+                    i, _val, _steps, _running, _lane_steps, _lane_slots = inner_carry
+                    new_val = _step(
+                        combine(_val, val_static), sub_body, width, (body_axes, 0)
+                    )
+                    _val = jtu.tree_map(
+                        lambda n, o: jnp.where(
+                            _running.reshape(_running.shape + (1,) * (n.ndim - 1)), n, o
+                        ),
+                        new_val,
+                        _val,
+                    )
+                    _steps = _steps + _running.astype(jnp.int32)
+                    _lane_steps = _lane_steps + jnp.sum(_running, dtype=jnp.int32)
+                    _lane_slots = _lane_slots + width
+                    _running = _running & _is_running(
+                        combine(_val, val_static),
+                        _steps,
+                        sub_cond,
+                        width,
+                        (cond_axes, 0),
+                    )
+                    return i + 1, _val, _steps, _running, _lane_steps, _lane_slots
+
+                inner_init = (
+                    jnp.array(0, dtype=jnp.int32),
+                    sub_val,
+                    sub_steps,
+                    sub_running,
+                    lane_steps,
+                    lane_slots,
+                )
+                _, sub_val, sub_steps, sub_running, lane_steps, lane_slots = (
+                    lax.while_loop(_inner_cond, _inner_body, inner_init)
+                )
+                # `index` has no duplicates, so scattering back is unambiguous.
+                val = jtu.tree_map(lambda x, s: x.at[index].set(s), val, sub_val)
+                steps = steps.at[index].set(sub_steps)
+                running = running.at[index].set(sub_running)
+                return val, steps, running, lane_steps, lane_slots
+
+            return _branch
+
+        widths = [axis_size]
+        while widths[-1] > 1:
+            widths.append((widths[-1] + 1) // 2)
+        branches = [_make_branch(width) for width in widths]
+
+        def _outer_cond(carry):
+            _, _, running, _, _ = carry
+            return jnp.any(running)
+
+        def _outer_body(carry):
+            _, _, running, _, _ = carry
+            # Index of the smallest width that fits every running lane.
+            branch_index = (
+                jnp.sum(jnp.array(widths) >= jnp.sum(running, dtype=jnp.int32)) - 1
+            )
+            return lax.switch(branch_index, branches, carry)
+
+        steps = jnp.zeros(axis_size, dtype=jnp.int32)
+        cond = combine(cond_dynamic, cond_static)
+        running = _is_running(
+            combine(val_dynamic, val_static), steps, cond, axis_size, (cond_axes, 0)
+        )
+        zero = jnp.array(0, dtype=jnp.int32)
+        init = (val_dynamic, steps, running, zero, zero)
+        val_dynamic, _, _, lane_steps, lane_slots = lax.while_loop(
+            _outer_cond, _outer_body, init
+        )
+        utilisation = jnp.where(lane_slots == 0, 1.0, lane_steps / lane_slots)
+        out_batched = (jtu.tree_map(lambda _: True, val_dynamic), False)
+        return (val_dynamic, utilisation), out_batched
+
+    final_dynamic, utilisation = _loop(dynamic)
+    return combine(final_dynamic, static[0]), jnp.asarray(utilisation)
+
+
+def _call(fn, x):
+    return fn(x)
@@ -10,6 +10,8 @@ from jaxtyping import Array, Bool
 from .bounded import bounded_while_loop
 from .checkpointed import checkpointed_while_loop
 from .common import common_rewrite
+from .compacted import compacted_while_loop
+from .offload import HostCheckpointStats
 
 
 _Carry = TypeVar("_Carry")
@@ -26,9 +28,12 @@ def while_loop(
     *,
     max_steps: Optional[int] = None,
     buffers: Optional[Callable[[_Carry], Union[_Node, Sequence[_Node]]]] = None,
-    kind: Literal["lax", "checkpointed", "bounded"],
+    kind: Literal["lax", "checkpointed", "bounded", "compacted"],
     checkpoints: Optional[int] = None,
     base: int = 16,
+    compact_every: int = 16,
+    checkpoint_memory: Literal["device", "host"] = "device",
+    host_stats_callback: Optional[Callable[[HostCheckpointStats], Any]] = None,
 ) -> _Carry:
     """A better while loop, supporting (1) reverse-mode autodifferentiation; (2) online
     checkpointing schemes; (3) efficient in-place scatters (normally XLA tends to make
@@ -50,7 +55,7 @@ def while_loop(
         buffer.
 
     - `kind`: The type of while loop that is lowered to underneath. This may either be
-        `"lax"`, `"checkpointed"`, or `"bounded"`.
+        `"lax"`, `"checkpointed"`, `"bounded"`, or `"compacted"`.
 
         If `kind` is `"lax"` then the loop is efficiently forward-mode
         autodifferentiable, but does not support reverse-mode autodifferentiation.
@@ -63,6 +68,12 @@ def while_loop(
         autodifferentiated, but it requires an `int` value for `max_steps`, and as
         `max_steps` grows then time and memory usage will increase.
 
+        If `kind` is `"compacted"` then the loop is as `"lax"`, except that when it is
+        vmapped, then the batch lanes that are still running are periodically gathered
+        into a smaller batch, so that finished lanes stop using compute. It does not
+        support `buffers`. See `equinox.internal.compacted_while_loop`, which also
+        reports the measured lane utilisation.
+
     - `checkpoints`: Only used if `kind="checkpointed"`. Specifies the number of
         checkpoints to use; if `None` then this is automatically derived from
         `max_steps`.
@@ -72,6 +83,20 @@ def while_loop(
         `math.ceil(math.log(max_steps, base))` decreases. (Which happens as `base`
         increases.)
 
+    - `compact_every`: Only used if `kind="compacted"`. The number of steps to take
+        between each compaction of the running batch lanes.
+
+    - `checkpoint_memory`: Only used if `kind="checkpointed"`. Either `"device"` (the
+        default) or `"host"`, in which case the checkpoints are kept in host memory, and
+        transferred to and from the device as they are saved and loaded. This allows for
+        using many more checkpoints than would fit in device memory. Each transfer is
+        a synchronous, blocking copy made via `jax.experimental.io_callback`.
+
+    - `host_stats_callback`: Only used if `kind="checkpointed"` and
+        `checkpoint_memory="host"`. Called at the end of each backward pass with an
+        `equinox.internal.HostCheckpointStats`, reporting the number of bytes moved
+        between device and host, and the number of recomputed steps.
+
     !!! Danger
 
         Note that `buffers` is subject to the following restrictions:
@@ -95,7 +120,8 @@ def while_loop(
     """
 
     if kind == "lax":
-        del kind, checkpoints, base
+        del kind, checkpoints, base, compact_every
+        del checkpoint_memory, host_stats_callback
         cond_fun_, body_fun_, init_val_, _ = common_rewrite(
             cond_fun, body_fun, init_val, max_steps, buffers, makes_false_steps=False
         )
@@ -103,7 +129,7 @@ def while_loop(
         _, _, _, final_val = lax.while_loop(cond_fun_, body_fun_, init_val_)
         return final_val
     elif kind == "checkpointed":
-        del kind, base
+        del kind, base, compact_every
         return checkpointed_while_loop(
             cond_fun,
             body_fun,
@@ -111,9 +137,12 @@ def while_loop(
             max_steps=max_steps,
             buffers=buffers,
             checkpoints=checkpoints,
+            checkpoint_memory=checkpoint_memory,
+            host_stats_callback=host_stats_callback,
         )
     elif kind == "bounded":
-        del kind, checkpoints
+        del kind, checkpoints, compact_every
+        del checkpoint_memory, host_stats_callback
         if max_steps is None:
             raise ValueError("kind='bounded' requires `max_steps` to be specified")
         return bounded_while_loop(
@@ -124,6 +153,19 @@ def while_loop(
             buffers=buffers,
             base=base,
         )
+    elif kind == "compacted":
+        del kind, checkpoints, base
+        del checkpoint_memory, host_stats_callback
+        if buffers is not None:
+            raise ValueError("kind='compacted' does not support `buffers`")
+        final_val, _ = compacted_while_loop(
+            cond_fun,
+            body_fun,
+            init_val,
+            max_steps=max_steps,
+            compact_every=compact_every,
+        )
+        return final_val
     else:
         raise ValueError(f"Unrecognised kind of while loop '{kind}'")
 
@@ -159,7 +201,10 @@ def scan(
         If `kind` is `"lax"` then the usual `lax.scan` is used.
 
         If `kind` is `"checkpointed"` then the scan uses checkpointing to reduce memory
-        usage. It will not be forward-mode autodifferentiable.
+        usage. It will not be forward-mode autodifferentiable. As the number of steps is
+        known in advance, the checkpoints are placed using the offline `revolve`
+        schedule whenever this improves on the online one. (When `checkpoints` is small
+        relative to `length`.)
 
     - `checkpoints`: Only used if `kind="checkpointed"`. Specifies the number of
         checkpoints to use; if `None` then this is set proportional to `sqrt(length)`.
@@ -0,0 +1,232 @@
+"""Stores the checkpoints of `checkpointed_while_loop` in host memory, rather than in
+device memory.
+
+Checkpoints are transferred with `io_callback`s into a Python-side store (one per run
+of the forward pass), which is freed at the end of the backward pass. Every transfer
+consumes and produces a token, so that the transfers are ordered by data dependencies.
+Only a single checkpoint-shaped value (the "template") is kept on device, which is
+used to determine the shape, dtype and batching of reads.
+
+`io_callback`s are synchronous: each transfer blocks until a full host copy of the
+checkpoint has been made (or read back), and is not overlapped with computation. (A
+`device_put` into the `"pinned_host"` memory kind would avoid this, but that is not
+available on every backend, e.g. CPU.)
+"""
+
+import itertools as it
+import threading
+from collections.abc import Callable
+from typing import Any, Optional
+
+import jax
+import jax.numpy as jnp
+import jax.tree_util as jtu
+import numpy as np
+from jax.custom_batching import custom_vmap
+from jax.experimental import io_callback
+from jaxtyping import Array, Int, PyTree
+
+from ..._module import field, Module
+
+
+class HostCheckpointStats(Module):
+    """Statistics for a single backward pass through
+    `equinox.internal.checkpointed_while_loop(..., checkpoint_memory="host")`.
+
+    **Fields:**
+
+    - `num_steps`: the number of steps taken by the loop on the forward pass.
+    - `bytes_to_host`: the number of bytes of checkpoints copied from device to host,
+        over both the forward and backward passes.
+    - `bytes_from_host`: the number of bytes of checkpoints copied from host to device.
+    - `recomputed_steps`: the number of steps that were recomputed on the backward
+        pass, starting from a checkpoint. (Increasing the number of checkpoints trades
+        more bytes moved for fewer recomputed steps.)
+    """
+
+    num_steps: int
+    bytes_to_host: int
+    bytes_from_host: int
+    recomputed_steps: int
+
+
+class _HostStore:
+    def __init__(self):
+        self.checkpoints: dict[int, list[np.ndarray]] = {}
+        self.bytes_to_host = 0
+        self.bytes_from_host = 0
+
+
+_lock = threading.Lock()
+_store_ids = it.count()
+_stores: dict[int, _HostStore] = {}
+
+
+def _int32(x) -> np.ndarray:
+    return np.asarray(x, dtype=np.int32)
+
+
+def _new_store_impl():
+    with _lock:
+        store_id = next(_store_ids) % np.iinfo(np.int32).max
+        _stores[store_id] = _HostStore()
+    return _int32(store_id)
+
+
+def _write_impl(store_id, index, token, *leaves):
+    store = _stores[int(store_id)]
+    # Copy, as the callback arguments may alias device buffers.
+    leaves = [np.array(x) for x in leaves]
+    store.checkpoints[int(index)] = leaves
+    store.bytes_to_host += sum(x.nbytes for x in leaves)
+    return _int32(token + 1)
+
+
+def _read_impl(store_id, index, token):
+    del token
+    store = _stores[int(store_id)]
+    leaves = store.checkpoints[int(index)]
+    store.bytes_from_host += sum(x.nbytes for x in leaves)
+    return leaves
+
+
+def _permute_impl(store_id, permutation, token):
+    store = _stores[int(store_id)]
+    checkpoints = store.checkpoints
+    store.checkpoints = {
+        i: checkpoints[int(j)]
+        for i, j in enumerate(permutation)
+        if int(j) in checkpoints
+    }
+    return _int32(token + 1)
+
+
+def _make_free_impl(stats_callback):
+    def _free_impl(store_id, token, num_steps, recomputed_steps):
+        del token
+        with _lock:
+            store = _stores.pop(int(store_id))
+        if stats_callback is not None:
+            stats = HostCheckpointStats(
+                num_steps=int(num_steps),
+                bytes_to_host=store.bytes_to_host,
+                bytes_from_host=store.bytes_from_host,
+                recomputed_steps=int(recomputed_steps),
+            )
+            stats_callback(stats)
+        return _int32(0)
+
+    return _free_impl
+
+
+_token_struct = jax.ShapeDtypeStruct((), jnp.int32)
+
+
+# Reads and writes are wrapped in `custom_vmap`, so that a batch of checkpoints is
+# transferred as a single array. (Rather than the default batching rule for
+# `io_callback`, which would make one call per batch element, all writing to the same
+# location.) In each batching rule we simply call the same function again, on the
+# batched arrays; this also handles nested `vmap`s.
+
+
+def _broadcast(axis_size, x, batched):
+    if batched:
+        return x
+    else:
+        return jnp.broadcast_to(x, (axis_size,) + x.shape)
+
+
+@custom_vmap
+def _write(store_id, index, token, leaves):
+    return io_callback(_write_impl, _token_struct, store_id, index, token, *leaves)
+
+
+@_write.def_vmap
+def _write_vmap(axis_size, in_batched, store_id, index, token, leaves):
+    store_id_batched, index_batched, token_batched, leaves_batched = in_batched
+    assert not store_id_batched
+    assert not index_batched
+    assert not token_batched
+    leaves = [_broadcast(axis_size, x, b) for x, b in zip(leaves, leaves_batched)]
+    return _write(store_id, index, token, leaves), False
+
+
+@custom_vmap
+def _read(store_id, index, token, template):
+    struct = [jax.ShapeDtypeStruct(x.shape, x.dtype) for x in template]
+    return io_callback(_read_impl, struct, store_id, index, token)
+
+
+@_read.def_vmap
+def _read_vmap(axis_size, in_batched, store_id, index, token, template):
+    store_id_batched, index_batched, token_batched, template_batched = in_batched
+    assert not store_id_batched
+    assert not index_batched
+    assert not token_batched
+    template = [_broadcast(axis_size, x, b) for x, b in zip(template, template_batched)]
+    out = _read(store_id, index, token, template)
+    # Unbatched leaves were broadcast when written, so every batch element is the same.
+    # Keep them unbatched, as they would be if the checkpoints were kept on device.
+    out = [x if b else x[0] for x, b in zip(out, template_batched)]
+    return out, list(template_batched)
+
+
+class HostResiduals(Module):
+    """Used in place of the on-device buffer of checkpoints."""
+
+    store_id: Int[Array, ""]
+    token: Int[Array, ""]
+    template: PyTree[Array]
+
+
+def new_host_residuals(template: PyTree[Array]) -> HostResiduals:
+    store_id = io_callback(_new_store_impl, _token_struct)
+    return HostResiduals(store_id, jnp.array(0, dtype=jnp.int32), template)
+
+
+def host_read(residuals: HostResiduals, index: Int[Array, ""]) -> PyTree[Array]:
+    leaves, treedef = jtu.tree_flatten(residuals.template)
+    out = _read(residuals.store_id, index, residuals.token, leaves)
+    return jtu.tree_unflatten(treedef, out)
+
+
+def host_maybe_write(
+    residuals: HostResiduals, index: Int[Array, ""], pred, val: PyTree[Array]
+) -> HostResiduals:
+    leaves = jtu.tree_leaves(val)
+
+    def _do_write(token):
+        return _write(residuals.store_id, index, token, leaves)
+
+    # Use a `cond` so that no transfer takes place if we're not saving.
+    token = jax.lax.cond(pred, _do_write, lambda token: token, residuals.token)
+    # The template only needs to match `val` in shape, dtype and batching.
+    return HostResiduals(residuals.store_id, token, val)
+
+
+def host_permute(residuals: HostResiduals, permutation: Int[Array, " n"]):
+    token = io_callback(
+        _permute_impl, _token_struct, residuals.store_id, permutation, residuals.token
+    )
+    return HostResiduals(residuals.store_id, token, residuals.template)
+
+
+def host_free(
+    residuals: HostResiduals,
+    num_steps: Int[Array, ""],
+    recomputed_steps: Int[Array, ""],
+    stats_callback: Optional[Callable[[HostCheckpointStats], Any]],
+) -> None:
+    # Output is unused, but `io_callback` is effectful so this will not be DCE'd.
+    io_callback(
+        _make_free_impl(stats_callback),
+        _token_struct,
+        residuals.store_id,
+        residuals.token,
+        num_steps,
+        recomputed_steps,
+    )
+
+
+class HostOffload(Module):
+    stats_callback: Optional[Callable[[HostCheckpointStats], Any]] = field(static=True)
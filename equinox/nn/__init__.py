@@ -24,6 +24,10 @@ from ._normalisation import (
     LayerNorm as LayerNorm,
     RMSNorm as RMSNorm,
 )
+from ._pipeline import (
+    PipelineSequential as PipelineSequential,
+    PipelineStats as PipelineStats,
+)
 from ._pool import (
     AdaptiveAvgPool1d as AdaptiveAvgPool1d,
     AdaptiveAvgPool2d as AdaptiveAvgPool2d,
@@ -6,6 +6,7 @@ import jax.lax as lax
 import jax.numpy as jnp
 from jaxtyping import Array, Bool, Float, PRNGKeyArray
 
+from .._ad import named_scope
 from .._misc import default_floating_dtype
 from .._module import field
 from ._sequential import StatefulLayer
@@ -106,7 +107,7 @@ class BatchNorm(StatefulLayer, strict=True):
         self.channelwise_affine = channelwise_affine
         self.momentum = momentum
 
-    @jax.named_scope("eqx.nn.BatchNorm")
+    @named_scope("eqx.nn.BatchNorm")
     def __call__(
         self,
         x: Array,
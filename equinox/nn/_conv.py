@@ -3,13 +3,13 @@ import math
 from collections.abc import Callable, Sequence
 from typing import Optional, TypeVar, Union
 
-import jax
 import jax.lax as lax
 import jax.numpy as jnp
 import jax.random as jrandom
 import numpy as np
 from jaxtyping import Array, PRNGKeyArray
 
+from .._ad import named_scope
 from .._misc import default_floating_dtype
 from .._module import field, Module
 from ._misc import all_sequences, default_init
@@ -208,7 +208,7 @@ class Conv(Module, strict=True):
         x = jnp.pad(x, [(0, 0)] + padding, mode)
         return x
 
-    @jax.named_scope("eqx.nn.Conv")
+    @named_scope("eqx.nn.Conv")
     def __call__(self, x: Array, *, key: Optional[PRNGKeyArray] = None) -> Array:
         """**Arguments:**
 
@@ -580,7 +580,7 @@ class ConvTranspose(Module, strict=True):
         padding_t = tuple((p[0].item(), p[1].item()) for p in padding_t % stride)
         return x, padding_t
 
-    @jax.named_scope("eqx.nn.ConvTranspose")
+    @named_scope("eqx.nn.ConvTranspose")
     def __call__(self, x: Array, *, key: Optional[PRNGKeyArray] = None) -> Array:
         """**Arguments:**
 
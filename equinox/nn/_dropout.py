@@ -1,12 +1,12 @@
 import warnings
 from typing import Optional
 
-import jax
 import jax.lax as lax
 import jax.numpy as jnp
 import jax.random as jrandom
 from jaxtyping import Array, PRNGKeyArray
 
+from .._ad import named_scope
 from .._module import Module
 
 
@@ -54,7 +54,7 @@ class Dropout(Module, strict=True):
     def deterministic(self):
         return self.inference
 
-    @jax.named_scope("eqx.nn.Dropout")
+    @named_scope("eqx.nn.Dropout")
     def __call__(
         self,
         x: Array,
@@ -1,11 +1,11 @@
 import math
 from typing import Any, Literal, Optional, TypeVar, Union
 
-import jax
 import jax.numpy as jnp
 import jax.random as jrandom
 from jaxtyping import Array, PRNGKeyArray
 
+from .._ad import named_scope
 from .._misc import default_floating_dtype
 from .._module import field, Module
 from ._misc import default_init
@@ -62,7 +62,7 @@ class Linear(Module, strict=True):
         self.out_features = out_features
         self.use_bias = use_bias
 
-    @jax.named_scope("eqx.nn.Linear")
+    @named_scope("eqx.nn.Linear")
     def __call__(self, x: Array, *, key: Optional[PRNGKeyArray] = None) -> Array:
         """**Arguments:**
 
@@ -112,7 +112,7 @@ class Identity(Module, strict=True):
     def __init__(self, *args: Any, **kwargs: Any):
         """Consumes arbitrary `*args` and `**kwargs` but ignores them."""
 
-    @jax.named_scope("eqx.nn.Identity")
+    @named_scope("eqx.nn.Identity")
     def __call__(self, x: _T, *, key: Optional[PRNGKeyArray] = None) -> _T:
         """**Arguments:**
 
@@ -5,12 +5,12 @@ from typing import (
     Union,
 )
 
-import jax
 import jax.nn as jnn
 import jax.random as jrandom
 import jax.tree_util as jtu
 from jaxtyping import Array, PRNGKeyArray
 
+from .._ad import named_scope
 from .._doc_utils import doc_repr
 from .._filters import is_array
 from .._misc import default_floating_dtype
@@ -125,7 +125,7 @@ class MLP(Module, strict=True):
         self.use_bias = use_bias
         self.use_final_bias = use_final_bias
 
-    @jax.named_scope("eqx.nn.MLP")
+    @named_scope("eqx.nn.MLP")
     def __call__(self, x: Array, *, key: Optional[PRNGKeyArray] = None) -> Array:
         """**Arguments:**
 
@@ -0,0 +1,370 @@
+from collections.abc import Callable, Sequence
+from typing import Any, Literal, Optional
+
+import jax
+import jax.numpy as jnp
+import jax.tree_util as jtu
+from jaxtyping import Array, PRNGKeyArray, PyTree
+
+from .._ad import filter_vjp
+from .._filters import combine, filter, is_array, is_inexact_array, partition
+from .._jit import filter_jit
+from .._module import field, Module
+from .._tree import tree_at
+from ._sequential import Sequential
+
+
+class PipelineStats(Module):
+    """Statistics of a pipeline schedule, as returned by
+    [`equinox.nn.PipelineSequential.stats`][].
+
+    **Attributes:**
+
+    - `num_ticks`: the length of the schedule, in units of the time taken for a single
+        forward (or backward) pass of a single microbatch through a single stage.
+    - `stage_utilisation`: for each stage, the fraction of the schedule for which that
+        stage is busy.
+    - `bubble_fraction`: the fraction of the schedule for which stages are idle,
+        averaged over all stages. That is, `1 - mean(stage_utilisation)`.
+    - `max_in_flight`: for each stage, the maximum number of microbatches whose
+        activations are stored at any one time, awaiting their backward pass.
+    """
+
+    num_ticks: int
+    stage_utilisation: tuple[float, ...]
+    bubble_fraction: float
+    max_in_flight: tuple[int, ...]
+
+
+def _stage_order(
+    schedule: str, stage: int, num_stages: int, num_microbatches: int
+) -> list[tuple[str, int]]:
+    forwards = [("F", m) for m in range(num_microbatches)]
+    backwards = [("B", m) for m in range(num_microbatches)]
+    if schedule == "gpipe":
+        return forwards + backwards
+    else:
+        # 1F1B: a few warmup forward passes, then alternate forward and backward
+        # passes, then finish the remaining backward passes.
+        num_warmup = min(num_stages - stage - 1, num_microbatches)
+        order = forwards[:num_warmup]
+        for f, b in zip(forwards[num_warmup:], backwards):
+            order.append(f)
+            order.append(b)
+        order.extend(backwards[num_microbatches - num_warmup :])
+        return order
+
+
+def _simulate(
+    schedule: str, num_stages: int, num_microbatches: int
+) -> tuple[list[list[tuple[int, str, int]]], PipelineStats]:
+    # Each stage performs its operations in order, with each operation taking one tick,
+    # as soon as their dependencies (on the neighbouring stages) are satisfied.
+    orders = [
+        _stage_order(schedule, s, num_stages, num_microbatches)
+        for s in range(num_stages)
+    ]
+    positions = [0] * num_stages
+    done = set()
+    ticks = []
+    in_flight = [0] * num_stages
+    max_in_flight = [0] * num_stages
+    while any(p < len(o) for p, o in zip(positions, orders)):
+        tick = []
+        for s in range(num_stages):
+            if positions[s] == len(orders[s]):
+                continue
+            kind, m = orders[s][positions[s]]
+            if kind == "F":
+                ready = s == 0 or ("F", s - 1, m) in done
+            else:
+                ready = ("F", s, m) in done and (
+                    s == num_stages - 1 or ("B", s + 1, m) in done
+                )
+            if ready:
+                tick.append((s, kind, m))
+        if len(tick) == 0:
+            raise RuntimeError("Internal error: pipeline schedule is deadlocked.")
+        for s, kind, m in tick:
+            positions[s] += 1
+            done.add((kind, s, m))
+            in_flight[s] += 1 if kind == "F" else -1
+            max_in_flight[s] = max(max_in_flight[s], in_flight[s])
+        ticks.append(tick)
+    num_ticks = len(ticks)
+    utilisation = tuple(2 * num_microbatches / num_ticks for _ in range(num_stages))
+    stats = PipelineStats(
+        num_ticks=num_ticks,
+        stage_utilisation=utilisation,
+        bubble_fraction=1 - sum(utilisation) / num_stages,
+        max_in_flight=tuple(max_in_flight),
+    )
+    return ticks, stats
+
+
+def _split_layers(layers: Sequence, num_stages: int) -> list[tuple]:
+    # Balance the stages by number of parameters, keeping at least one layer per stage.
+    sizes = [
+        sum(x.size for x in jtu.tree_leaves(layer) if is_array(x)) + 1
+        for layer in layers
+    ]
+    total = sum(sizes)
+    stages = []
+    start = 0
+    cumulative = 0
+    for s in range(num_stages - 1):
+        target = total * (s + 1) / num_stages
+        end = start + 1
+        cumulative += sizes[start]
+        max_end = len(layers) - (num_stages - s - 1)
+        while end < max_end and cumulative + sizes[end] / 2 <= target:
+            cumulative += sizes[end]
+            end += 1
+        stages.append(tuple(layers[start:end]))
+        start = end
+    stages.append(tuple(layers[start:]))
+    return stages
+
+
+def _device_put(tree, device):
+    dynamic, static = partition(tree, is_array)
+    return combine(jax.device_put(dynamic, device), static)
+
+
+@filter_jit
+def _forward(stage, x):
+    return jax.vmap(stage)(x)
+
+
+@filter_jit
+def _forward_loss(stage, x, loss_fn, args):
+    return loss_fn(jax.vmap(stage)(x), *args)
+
+
+# The backward passes recompute the forward pass of their stage, so that only the
+# inputs to each stage need to be stored between the forward and backward passes.
+
+
+@filter_jit
+def _backward(stage, x, cotangent):
+    _, vjp_fn = filter_vjp(lambda _stage, _x: jax.vmap(_stage)(_x), stage, x)
+    return vjp_fn(cotangent)
+
+
+@filter_jit
+def _backward_loss(stage, x, loss_fn, args, scale):
+    def _loss(_stage, _x):
+        return loss_fn(jax.vmap(_stage)(_x), *args)
+
+    _, vjp_fn = filter_vjp(_loss, stage, x)
+    return vjp_fn(scale)
+
+
+@filter_jit
+def _add(x, y):
+    return jtu.tree_map(lambda a, b: a + b, x, y)
+
+
+class PipelineSequential(Module):
+    """A pipeline-parallel version of [`equinox.nn.Sequential`][]. The layers are split
+    into consecutive stages, with each stage placed on a different device, and a batch
+    of inputs is split into microbatches which flow through the stages.
+
+    As JAX dispatches computations asynchronously, then the different stages run
+    concurrently on their different devices, with each stage working on a different
+    microbatch.
+
+    Unlike `Sequential`, this operates on a batch of inputs, with a leading batch axis.
+
+    !!! Example
+
+        ```python
+        model = eqx.nn.Sequential([...])
+        pipeline = eqx.nn.PipelineSequential(
+            model, jax.devices()[:4], num_microbatches=8, schedule="1f1b"
+        )
+        loss, grads = pipeline.value_and_grad(loss_fn, x, y)
+        pipeline = eqx.apply_updates(pipeline, updates)
+        ```
+    """
+
+    stages: tuple[Sequential, ...]
+    devices: tuple[Any, ...] = field(static=True)
+    num_microbatches: int = field(static=True)
+    schedule: Literal["gpipe", "1f1b"] = field(static=True)
+
+    def __init__(
+        self,
+        sequential: Sequential,
+        devices: Sequence[Any],
+        *,
+        num_microbatches: int,
+        schedule: Literal["gpipe", "1f1b"] = "gpipe",
+        boundaries: Optional[Sequence[int]] = None,
+    ):
+        """**Arguments:**
+
+        - `sequential`: the [`equinox.nn.Sequential`][] to parallelise. Stateful layers
+            are not supported.
+        - `devices`: a sequence of devices, one per stage.
+        - `num_microbatches`: the number of microbatches to split each batch into.
+        - `schedule`: either `"gpipe"` (all forward passes, then all backward passes)
+            or `"1f1b"` (interleave forward and backward passes, so that each stage
+            stores the activations of at most as many microbatches as there are
+            stages). This only affects
+            [`equinox.nn.PipelineSequential.value_and_grad`][].
+        - `boundaries`: optionally, the indices of the layers at which each new stage
+            starts, of length `len(devices) - 1`. If not passed then the layers are
+            split to balance the number of parameters in each stage.
+        """
+        if sequential.is_stateful():
+            raise ValueError("`PipelineSequential` does not support stateful layers.")
+        if schedule not in ("gpipe", "1f1b"):
+            raise ValueError("`schedule` must be either 'gpipe' or '1f1b'.")
+        if num_microbatches < 1:
+            raise ValueError("`num_microbatches` must be a positive integer.")
+        layers = sequential.layers
+        num_stages = len(devices)
+        if num_stages > len(layers):
+            raise ValueError("Cannot have more stages (devices) than layers.")
+        if boundaries is None:
+            stages = _split_layers(layers, num_stages)
+        else:
+            if len(boundaries) != num_stages - 1:
+                raise ValueError("Must have `len(boundaries) == len(devices) - 1`.")
+            edges = [0, *boundaries, len(layers)]
+            stages = [tuple(layers[a:b]) for a, b in zip(edges[:-1], edges[1:])]
+        self.stages = tuple(
+            _device_put(Sequential(stage), device)
+            for stage, device in zip(stages, devices)
+        )
+        self.devices = tuple(devices)
+        self.num_microbatches = num_microbatches
+        self.schedule = schedule
+
+    def _microbatches(self, x: PyTree[Array]) -> list[PyTree[Array]]:
+        def _split(y):
+            if y.shape[0] % self.num_microbatches != 0:
+                raise ValueError(
+                    "The batch size must be divisible by `num_microbatches`."
+                )
+            return jnp.split(y, self.num_microbatches)
+
+        dynamic, static = partition(x, is_array)
+        leaves, treedef = jtu.tree_flatten(dynamic)
+        split = [_split(y) for y in leaves]
+        return [
+            combine(jtu.tree_unflatten(treedef, [y[m] for y in split]), static)
+            for m in range(self.num_microbatches)
+        ]
+
+    def __call__(self, x: Array, *, key: Optional[PRNGKeyArray] = None) -> Array:
+        """**Arguments:**
+
+        - `x`: a batch of inputs, with a leading batch axis whose size is divisible by
+            `num_microbatches`. Each example is passed to the first layer.
+        - `key`: Ignored; provided for compatibility with the rest of the Equinox API.
+            (Keyword only argument.)
+
+        **Returns:**
+
+        The batch of outputs from the last layer, on the last device.
+
+        This may be differentiated (e.g. with [`equinox.filter_grad`][]) as normal,
+        which will perform the backward pass in a GPipe schedule.
+        """
+        del key
+        outs = []
+        # Microbatch-major dispatch order: since dispatch is asynchronous, then stage
+        # `s` works on microbatch `m + 1` whilst stage `s + 1` works on microbatch `m`.
+        for xm in self._microbatches(x):
+            for stage, device in zip(self.stages, self.devices):
+                xm = _forward(stage, jax.device_put(xm, device))
+            outs.append(xm)
+        return jnp.concatenate(outs)
+
+    def value_and_grad(
+        self, loss_fn: Callable[..., Array], x: Array, *args: Any
+    ) -> tuple[Array, PyTree]:
+        """Computes a loss and its gradients with respect to the parameters, using the
+        pipeline schedule.
+
+        **Arguments:**
+
+        - `loss_fn`: called as `loss_fn(out, *args)` on each microbatch, where `out` is
+            the output of the final stage. Should return a scalar averaged over the
+            microbatch.
+        - `x`: a batch of inputs, as for `__call__`.
+        - `*args`: any other arguments to `loss_fn`. All arrays in `args` are split
+            into microbatches along their leading axis.
+
+        **Returns:**
+
+        A 2-tuple of `(loss, grads)`, where `loss` is the average loss over all
+        microbatches, and `grads` has the same structure as
+        `eqx.filter(self, eqx.is_inexact_array)`. The gradients for each stage are
+        placed on that stage's device.
+        """
+        num_stages = len(self.stages)
+        xs = self._microbatches(x)
+        argss = self._microbatches(args)
+        ticks, _ = _simulate(self.schedule, num_stages, self.num_microbatches)
+        # `activations[s][m]` is the input to stage `s` for microbatch `m`, on device
+        # `s`; `cotangents` likewise for the cotangent of the output of stage `s`.
+        activations: list[dict[int, Any]] = [{} for _ in range(num_stages)]
+        cotangents: list[dict[int, Any]] = [{} for _ in range(num_stages)]
+        grads: list[Any] = [None] * num_stages
+        losses = []
+        last_device = self.devices[-1]
+        argss = [_device_put(args_m, last_device) for args_m in argss]
+        scale = jax.device_put(jnp.array(1 / self.num_microbatches), last_device)
+        for m, xm in enumerate(xs):
+            activations[0][m] = jax.device_put(xm, self.devices[0])
+        for tick in ticks:
+            for s, kind, m in tick:
+                stage = self.stages[s]
+                if kind == "F":
+                    xm = activations[s][m]
+                    if s == num_stages - 1:
+                        losses.append(_forward_loss(stage, xm, loss_fn, argss[m]))
+                    else:
+                        out = _forward(stage, xm)
+                        next_device = self.devices[s + 1]
+                        activations[s + 1][m] = jax.device_put(out, next_device)
+                else:
+                    xm = activations[s].pop(m)
+                    if s == num_stages - 1:
+                        stage_grad, input_grad = _backward_loss(
+                            stage, xm, loss_fn, argss[m], scale
+                        )
+                    else:
+                        cotangent = cotangents[s].pop(m)
+                        stage_grad, input_grad = _backward(stage, xm, cotangent)
+                    if grads[s] is None:
+                        grads[s] = stage_grad
+                    else:
+                        grads[s] = _add(grads[s], stage_grad)
+                    if s > 0:
+                        prev_device = self.devices[s - 1]
+                        cotangents[s - 1][m] = jax.device_put(input_grad, prev_device)
+        loss = jnp.mean(jnp.stack(losses))
+        grads = tree_at(
+            lambda p: p.stages, filter(self, is_inexact_array), tuple(grads)
+        )
+        return loss, grads
+
+    def stats(self) -> PipelineStats:
+        """Returns statistics of the pipeline schedule used by
+        [`equinox.nn.PipelineSequential.value_and_grad`][], assuming that every forward
+        and backward pass of every stage takes the same amount of time.
+
+        **Arguments:**
+
+        None.
+
+        **Returns:**
+
+        An [`equinox.nn.PipelineStats`][].
+        """
+        _, stats = _simulate(self.schedule, len(self.stages), self.num_microbatches)
+        return stats
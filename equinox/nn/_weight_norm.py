@@ -6,6 +6,7 @@ import jax
 import jax.numpy as jnp
 from jaxtyping import Array, PRNGKeyArray, Scalar
 
+from .._ad import named_scope
 from .._module import field, Module
 from .._tree import tree_at
 
@@ -94,7 +95,7 @@ class WeightNorm(Module, Generic[_Layer], strict=True):
         )
         self.g = self._norm(getattr(layer, weight_name))
 
-    @jax.named_scope("eqx.nn.WeightNorm")
+    @named_scope("eqx.nn.WeightNorm")
     def __call__(self, x: Array, *, key: Optional[PRNGKeyArray] = None) -> Array:
         """**Arguments:**
 
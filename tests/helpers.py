@@ -1,3 +1,8 @@
+import os
+import subprocess
+import sys
+import textwrap
+
 import equinox as eqx
 import jax.random as jr
 import jax.tree_util as jtu
@@ -27,3 +32,26 @@ treedefs = [
 
 def tree_allclose(x, y, *, rtol=1e-5, atol=1e-8):
     return eqx.tree_equal(x, y, typematch=True, rtol=rtol, atol=atol)
+
+
+def run_with_cpu_devices(num_devices: int, source: str):
+    """Runs `source` in a fresh Python process, in which JAX has `num_devices` CPU
+    devices available.
+
+    (Within this process the number of devices has already been fixed by the time that
+    any test runs.)
+    """
+    env = dict(os.environ)
+    env["JAX_PLATFORMS"] = "cpu"
+    env["XLA_FLAGS"] = (
+        env.get("XLA_FLAGS", "")
+        + f" --xla_force_host_platform_device_count={num_devices}"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", textwrap.dedent(source)],
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    assert result.returncode == 0, result.stderr
+    return result.stdout
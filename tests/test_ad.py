@@ -3,6 +3,7 @@ from typing import Union
 
 import equinox as eqx
 import jax
+import jax.flatten_util
 import jax.numpy as jnp
 import jax.random as jrandom
 import jax.tree_util as jtu
@@ -463,6 +464,154 @@ def test_filter_custom_jvp_exact():
     jax.grad(g)(1.0, 1)
 
 
+@pytest.mark.parametrize("has_aux", (False, True))
+def test_microbatches(has_aux, getkey):
+    mlp = eqx.nn.MLP(3, 2, 8, 2, key=getkey())
+    x = jrandom.normal(getkey(), (12, 3))
+    y = jrandom.normal(getkey(), (12, 2))
+
+    def loss(model, x, y, *, scale):
+        out = jnp.mean((jax.vmap(model)(x) - y) ** 2) * scale
+        if has_aux:
+            return out, jnp.sum(x)
+        else:
+            return out
+
+    true_value, true_grad = eqx.filter_value_and_grad(loss, has_aux=has_aux)(
+        mlp, x, y, scale=2.0
+    )
+    for microbatches, accumulate_dtype in ((1, None), (4, None), (3, jnp.float32)):
+        value, grad = eqx.filter_value_and_grad(
+            loss,
+            has_aux=has_aux,
+            microbatches=microbatches,
+            microbatch_argnums=(1, 2),
+            accumulate_dtype=accumulate_dtype,
+        )(mlp, x, y, scale=2.0)
+        assert jtu.tree_structure(grad) == jtu.tree_structure(true_grad)
+        assert all(
+            g.dtype == jnp.float32 for g in jtu.tree_leaves(grad)
+        )  # parameter dtype
+        assert tree_allclose(grad, true_grad, rtol=1e-5, atol=1e-6)
+        if has_aux:
+            value, aux = value
+            true_value_, true_aux = true_value
+            assert aux.shape == (microbatches,)
+            assert tree_allclose(jnp.sum(aux), true_aux, rtol=1e-5)
+        else:
+            true_value_ = true_value
+        assert tree_allclose(value, true_value_, rtol=1e-5)
+
+    grad = eqx.filter_grad(
+        loss, has_aux=has_aux, microbatches=2, microbatch_argnums=(1, 2)
+    )(mlp, x, y, scale=2.0)
+    if has_aux:
+        grad, _ = grad
+    assert tree_allclose(grad, true_grad, rtol=1e-5, atol=1e-6)
+    with pytest.raises(ValueError, match="microbatches"):
+        eqx.filter_grad(
+            loss, has_aux=has_aux, microbatches=5, microbatch_argnums=(1, 2)
+        )(mlp, x, y, scale=2.0)
+    with pytest.raises(ValueError, match="microbatch_argnums"):
+        eqx.filter_grad(loss, microbatches=2, microbatch_argnums=0)
+    with pytest.raises(ValueError, match="microbatch_argnums"):
+        eqx.filter_grad(loss, microbatches=2, microbatch_argnums=3)(
+            mlp, x, y, scale=2.0
+        )
+
+
+def test_microbatches_unsplit_arguments(getkey):
+    # Only the batch argument is split: not scalar arrays, nor keys, in other
+    # arguments. (A legacy key has shape (2,), so would otherwise split silently.)
+    mlp = eqx.nn.MLP(3, 2, 8, 2, key=getkey())
+    batch = (jrandom.normal(getkey(), (4, 3)), jrandom.normal(getkey(), (4, 2)))
+    scale = jnp.array(2.0)
+
+    def loss(model, batch, scale, key):
+        x, y = batch
+        noise = jrandom.normal(key, y.shape[1:])
+        return jnp.mean((jax.vmap(model)(x) - y - noise[None]) ** 2) * scale
+
+    for key in (jrandom.PRNGKey(0), jrandom.key(0)):
+        true_value, true_grad = eqx.filter_value_and_grad(loss)(mlp, batch, scale, key)
+        value, grad = eqx.filter_value_and_grad(loss, microbatches=2)(
+            mlp, batch, scale, key
+        )
+        assert tree_allclose(value, true_value, rtol=1e-5)
+        assert tree_allclose(grad, true_grad, rtol=1e-5, atol=1e-6)
+
+
+@pytest.mark.parametrize("inner_vmap", (False, True))
+@pytest.mark.parametrize("clip_norm", (None, 1.0))
+def test_filter_per_example_grad(inner_vmap, clip_norm, getkey):
+    class Model(eqx.Module):
+        embedding: eqx.nn.Embedding
+        conv: eqx.nn.Conv1d
+        linear: eqx.nn.Linear
+        scale: jax.Array
+
+        def __call__(self, tokens):
+            if inner_vmap:
+                x = jax.vmap(self.embedding)(tokens).T
+            else:
+                x = jnp.stack([self.embedding(t) for t in tokens], axis=-1)
+            x = jnp.tanh(self.conv(x)).reshape(-1)
+            return self.linear(x) * self.scale
+
+    model = Model(
+        eqx.nn.Embedding(10, 4, key=getkey()),
+        eqx.nn.Conv1d(4, 3, 3, key=getkey()),
+        eqx.nn.Linear(9, "scalar", key=getkey()),
+        jnp.array(2.0),
+    )
+
+    def loss(model, tokens, y):
+        return (model(tokens) - y) ** 2
+
+    tokens = jrandom.randint(getkey(), (5, 5), 0, 4)
+    y = jrandom.normal(getkey(), (5,))
+    grads = jax.vmap(eqx.filter_grad(loss), in_axes=(None, 0, 0))(model, tokens, y)
+    true_norms = jnp.sqrt(
+        sum(jnp.sum(g.reshape(5, -1) ** 2, axis=1) for g in jtu.tree_leaves(grads))
+    )
+    if clip_norm is None:
+        scale = jnp.ones(5)
+    else:
+        scale = jnp.minimum(1, clip_norm / true_norms)
+    true_sum = jtu.tree_map(lambda g: jnp.tensordot(scale, g, axes=1), grads)
+
+    per_example_grad = eqx.filter_jit(
+        eqx.filter_per_example_grad(loss, clip_norm=clip_norm)
+    )
+    norms, grad_sum = per_example_grad(model, tokens, y)
+    assert tree_allclose(norms, true_norms, rtol=1e-5, atol=1e-5)
+    assert tree_allclose(grad_sum, true_sum, rtol=1e-5, atol=1e-5)
+
+
+def test_filter_per_example_grad_scan(getkey):
+    # `inner` is called inside a `scan`, so falls back to `vmap`; `outer` does not.
+    model = (eqx.nn.Linear(3, 3, key=getkey()), eqx.nn.Linear(3, 2, key=getkey()))
+
+    def loss(model, x):
+        inner, outer = model
+
+        def body(carry, _):
+            return jnp.tanh(inner(carry)), None
+
+        x, _ = jax.lax.scan(body, x, length=2)
+        return jnp.sum(outer(x) ** 2)
+
+    x = jrandom.normal(getkey(), (4, 3))
+    grads = jax.vmap(eqx.filter_grad(loss), in_axes=(None, 0))(model, x)
+    true_norms = jnp.sqrt(
+        sum(jnp.sum(g.reshape(4, -1) ** 2, axis=1) for g in jtu.tree_leaves(grads))
+    )
+    true_sum = jtu.tree_map(lambda g: jnp.sum(g, axis=0), grads)
+    norms, grad_sum = eqx.filter_per_example_grad(loss)(model, x)
+    assert tree_allclose(norms, true_norms, rtol=1e-5, atol=1e-5)
+    assert tree_allclose(grad_sum, true_sum, rtol=1e-5, atol=1e-5)
+
+
 def test_filter_hessian_and_jacfwd_and_jacrev():
     # filter_hessian is implemented in terms of the other 2, so this tests all 3.
 
@@ -518,6 +667,146 @@ def test_pytree_jacfwd():
     )
 
 
+@pytest.mark.parametrize("rev", (False, True))
+@pytest.mark.parametrize("chunk_size", (1, 3, 100))
+def test_chunked_jacobian(rev, chunk_size, getkey):
+    def f(x, y):
+        a, (b, c), _ = x
+        out = {"p": jnp.sin(a) * b, "q": (jnp.sum(jnp.outer(a, c)) + y, jnp.tanh(c))}
+        return out, y
+
+    x = (
+        jrandom.normal(getkey(), (3,)),
+        (jnp.array(2.0), jrandom.normal(getkey(), (2, 2))),
+        "static",
+    )
+    jac = eqx.filter_jacrev if rev else eqx.filter_jacfwd
+    true_out, true_aux = jac(f, has_aux=True)(x, 1.0)
+    out, aux = jac(f, has_aux=True, chunk_size=chunk_size)(x, 1.0)
+    assert jtu.tree_structure(out) == jtu.tree_structure(true_out)
+    assert tree_allclose(out, true_out)
+    assert aux == true_aux
+
+
+@pytest.mark.parametrize("chunk_size", (None, 2))
+def test_sparse_jacfwd(chunk_size, getkey):
+    def f(x):
+        a, b, _ = x
+        diff = jnp.concatenate([a[1:] - a[:-1], jnp.sin(a[:1])]) * b["u"][0]
+        return {"p": jnp.pad(diff, (1, 0)), "q": (jnp.sum(b["u"]), jnp.tanh(b["u"]))}
+
+    x = (jrandom.normal(getkey(), (5,)), {"u": jrandom.normal(getkey(), (2,))}, 1)
+    true_jac = eqx.filter_jacfwd(f)(x)
+    jac = eqx.filter_jacfwd(f, sparsity="auto", chunk_size=chunk_size)(x)
+    assert jtu.tree_structure(jac) == jtu.tree_structure(true_jac)
+    assert tree_allclose(jac, true_jac)
+
+    flat_jac = jax.jacfwd(
+        lambda a, u: jnp.concatenate(
+            [jnp.ravel(y) for y in jtu.tree_leaves(f((a, {"u": u}, 1)))]
+        ),
+        argnums=(0, 1),
+    )(*jtu.tree_leaves(x)[:2])
+    pattern = np.concatenate([np.asarray(j) != 0 for j in flat_jac], axis=1)
+    jac = eqx.filter_jit(eqx.filter_jacfwd(f, sparsity=pattern))(x)
+    assert tree_allclose(jac, true_jac)
+
+    with pytest.raises(ValueError, match="sparsity"):
+        eqx.filter_jacfwd(f, sparsity=pattern[1:])(x)
+
+
+def test_jacobian_sparsity_banded():
+    def f(u):
+        return jnp.pad(u[2:] - 2 * u[1:-1] + u[:-2], 1) + jnp.sin(u)
+
+    pattern = eqx._sparsity.jacobian_sparsity(
+        f, jax.ShapeDtypeStruct((10,), jnp.float32)
+    )
+    assert pattern.shape == (10, 10)
+    assert len(pattern.rows) == 26
+    true_pattern = np.abs(np.arange(10)[:, None] - np.arange(10)[None]) <= 1
+    true_pattern[0, 1] = true_pattern[-1, -2] = False
+    assert (pattern.todense() == true_pattern).all()
+    colours, num_colours = eqx._sparsity.colour_columns(pattern)
+    assert num_colours == 3
+    for colour in range(num_colours):
+        assert true_pattern[:, colours == colour].sum(axis=1).max() <= 1
+
+
+def test_jacobian_sparsity_dot_general():
+    # Block-diagonal: each row of `x` only interacts with itself. Also checks that
+    # calls to `jax.jit` are recursed into.
+    @jax.jit
+    def f(x, w):
+        return jnp.einsum("bi,ij->bj", x, w)
+
+    pattern = eqx._sparsity.jacobian_sparsity(
+        f,
+        jax.ShapeDtypeStruct((3, 2), jnp.float32),
+        jax.ShapeDtypeStruct((2, 4), jnp.float32),
+    )
+    x = jnp.arange(6.0).reshape(3, 2) + 1
+    w = jnp.arange(8.0).reshape(2, 4) + 1
+    jac_x, jac_w = jax.jacfwd(f, argnums=(0, 1))(x, w)
+    true_pattern = np.concatenate(
+        [np.asarray(jac_x).reshape(12, 6), np.asarray(jac_w).reshape(12, 8)], axis=1
+    )
+    assert (pattern.todense() == (true_pattern != 0)).all()
+
+
+def test_filter_hvp(getkey):
+    def f(x, y):
+        a, b, _ = x
+        return jnp.sum(jnp.sin(a) * b**2) + y * jnp.sum(a**3)
+
+    x = (jrandom.normal(getkey(), (3,)), jrandom.normal(getkey(), (3,)), 1)
+    v = (jrandom.normal(getkey(), (3,)), jrandom.normal(getkey(), (3,)), None)
+    hess = jax.hessian(lambda a, b: f((a, b, 1), 2.0), argnums=(0, 1))(*x[:2])
+    true_hvp = tuple(sum(h @ vj for h, vj in zip(hi, v[:2])) for hi in hess) + (None,)
+    hvp = eqx.filter_hvp(f, x, v, 2.0)
+    assert tree_allclose(hvp, true_hvp)
+    # Non-floating-point leaves of `v` are ignored.
+    assert tree_allclose(eqx.filter_hvp(f, x, v[:2] + ("hi",), 2.0), true_hvp)
+
+
+def test_filter_ggn_vp_and_fisher_vp(getkey):
+    mlp = eqx.nn.MLP(3, 2, 4, 1, key=getkey())
+    xs = jrandom.normal(getkey(), (5, 3))
+    ys = jrandom.normal(getkey(), (5, 2))
+    v = jtu.tree_map(
+        lambda x: jrandom.normal(getkey(), x.shape), eqx.filter(mlp, eqx.is_array)
+    )
+    params, static = eqx.partition(mlp, eqx.is_array)
+    flat_params, unravel = jax.flatten_util.ravel_pytree(params)
+    flat_v, _ = jax.flatten_util.ravel_pytree(v)
+
+    def forward(model, x):
+        return jax.vmap(model)(x)
+
+    def loss(pred):
+        return jnp.sum(jnp.tanh(pred - ys) ** 2)
+
+    def flat_forward(p):
+        return forward(eqx.combine(unravel(p), static), xs).reshape(-1)
+
+    jac = jax.jacfwd(flat_forward)(flat_params)
+    hess = jax.hessian(lambda pred: loss(pred.reshape(5, 2)))(flat_forward(flat_params))
+    true_ggn_vp = unravel(jac.T @ hess @ jac @ flat_v)
+    ggn_vp = eqx.filter_ggn_vp(forward, loss, mlp, v, xs)
+    assert tree_allclose(ggn_vp, true_ggn_vp, rtol=1e-4, atol=1e-5)
+
+    def per_example_losses(model, x, y):
+        return jnp.sum((jax.vmap(model)(x) - y) ** 2, axis=1)
+
+    def flat_losses(p):
+        return per_example_losses(eqx.combine(unravel(p), static), xs, ys)
+
+    jac = jax.jacrev(flat_losses)(flat_params)
+    true_fisher_vp = unravel(jac.T @ (jac @ flat_v) / 5)
+    fisher_vp = eqx.filter_fisher_vp(per_example_losses, mlp, v, xs, ys)
+    assert tree_allclose(fisher_vp, true_fisher_vp, rtol=1e-4, atol=1e-5)
+
+
 def test_filter_custom_jvp_symbolic_zero():
     @eqx.filter_custom_jvp
     def f(x, y):
@@ -551,6 +840,53 @@ def test_filter_custom_vjp_nondiff_args():
         jax.grad(lambda x: f(x, x))(1.0)
 
 
+def test_filter_custom_vjp_residuals():
+    def make(**kwargs):
+        num_fwd = 0
+
+        @eqx.filter_custom_vjp
+        def f(x, big):
+            return jnp.sin(x) + jnp.sum(big)
+
+        @f.def_fwd(**kwargs)
+        def f_fwd(perturbed, x, big):
+            nonlocal num_fwd
+            num_fwd += 1
+            out = jnp.sin(x) + jnp.sum(big)
+            return out, {"cos": jnp.cos(x), "unused": big * 2}
+
+        @f.def_bwd
+        def f_bwd(residuals, g, perturbed, x, big):
+            return g * residuals["cos"]
+
+        return f, lambda: num_fwd
+
+    x = jnp.arange(3.0)
+    big = jnp.ones((100, 100))
+    true_grad = jnp.cos(x)
+    f, _ = make()
+    nbytes, _ = eqx.debug.saved_residuals(
+        lambda x, big: f(x, jax.lax.stop_gradient(big)), x, big
+    )
+    assert tree_allclose(jax.grad(lambda x: jnp.sum(f(x, big)))(x), true_grad)
+
+    f, num_fwd = make(recompute=lambda r: r.ndim == 2)
+    recompute_nbytes, _ = eqx.debug.saved_residuals(
+        lambda x, big: f(x, jax.lax.stop_gradient(big)), x, big
+    )
+    assert tree_allclose(jax.grad(lambda x: jnp.sum(f(x, big)))(x), true_grad)
+    assert num_fwd() == 3  # `saved_residuals`, then forward and backward here.
+    assert recompute_nbytes == nbytes - big.nbytes
+
+    f, _ = make(drop_unused_residuals=True)
+    drop_nbytes, _ = eqx.debug.saved_residuals(
+        lambda x, big: f(x, jax.lax.stop_gradient(big)), x, big
+    )
+    assert tree_allclose(jax.grad(lambda x: jnp.sum(f(x, big)))(x), true_grad)
+    # The unused residual, and the unused arguments `x` and `big`, are all dropped.
+    assert drop_nbytes == nbytes - 2 * big.nbytes - x.nbytes
+
+
 def test_filter_custom_vjp_symbolic_zero():
     called = False
 
@@ -1,8 +1,14 @@
+from collections import Counter
 from functools import partial
 
 import equinox as eqx
+import jax
 import jax.numpy as jnp
+import jax.random as jr
 import jax.tree_util as jtu
+import pytest
+
+from .helpers import tree_allclose
 
 
 def test_checkpoint(getkey):
@@ -22,3 +28,76 @@ def test_checkpoint(getkey):
         jtu.tree_leaves(grad_f_check(mlp, x)), jtu.tree_leaves(grad_f_nocheck(mlp, x))
     ):
         assert jnp.allclose(l1, l2)
+
+
+def test_checkpoint_policy(getkey):
+    mlp = eqx.nn.MLP(30, 30, 40, 3, key=getkey())
+    x = jr.normal(getkey(), (8, 30))
+
+    def fun(mlp, x):
+        return jnp.sum(jax.vmap(mlp)(x) ** 2)
+
+    true_grads = eqx.filter_grad(fun)(mlp, x)
+    residuals = {}
+    for name, policy in [
+        ("none", jax.checkpoint_policies.nothing_saveable),
+        ("linear", eqx.checkpoint_policy(save_scopes=["eqx.nn.Linear"])),
+        ("everything", jax.checkpoint_policies.everything_saveable),
+    ]:
+        checkpointed_fun = eqx.filter_checkpoint(fun, policy=policy)
+        grads = eqx.filter_grad(checkpointed_fun)(mlp, x)
+        assert tree_allclose(grads, true_grads)
+        residuals[name] = eqx.debug.saved_residuals(checkpointed_fun, mlp, x)
+
+    # The outputs of the three hidden layers, plus the output layer itself (needed for
+    # the squaring).
+    linear_outputs = [(8, 40), (8, 40), (8, 40), (8, 30)]
+    nbytes, structs = residuals["linear"]
+    extra = Counter(s.shape for s in structs)
+    extra.subtract(s.shape for s in residuals["none"][1])
+    assert sorted(extra.elements()) == sorted(linear_outputs)
+    assert residuals["none"][0] < nbytes < residuals["everything"][0]
+
+
+def test_checkpoint_name(getkey):
+    def fun(x):
+        y = eqx.checkpoint_name({"a": jnp.sin(x), "b": 1}, "foo")
+        return jnp.sum(jnp.sin(y["a"])) * y["b"]
+
+    x = jr.normal(getkey(), (5,))
+    policy = eqx.checkpoint_policy(save_names=["foo"])
+    checkpointed_fun = eqx.filter_checkpoint(fun, policy=policy)
+    assert tree_allclose(eqx.filter_grad(checkpointed_fun)(x), eqx.filter_grad(fun)(x))
+    nbytes, _ = eqx.debug.saved_residuals(checkpointed_fun, x)
+    nbytes_none, _ = eqx.debug.saved_residuals(
+        eqx.filter_checkpoint(fun, policy=jax.checkpoint_policies.nothing_saveable), x
+    )
+    assert nbytes == nbytes_none + 5 * 4
+
+
+def test_checkpoint_policy_scan(getkey):
+    # Scopes inside `lax.scan` are found too.
+    linear = eqx.nn.Linear(10, 10, key=getkey())
+    x = jr.normal(getkey(), (10,))
+
+    def fun(linear, x):
+        def body(carry, _):
+            return jnp.tanh(linear(carry)), None
+
+        out, _ = jax.lax.scan(body, x, length=3)
+        return jnp.sum(out)
+
+    def nbytes(policy):
+        checkpointed_fun = eqx.filter_checkpoint(fun, policy=policy)
+        return eqx.debug.saved_residuals(checkpointed_fun, linear, x)[0]
+
+    policy = eqx.checkpoint_policy(save_scopes=["eqx.nn.Linear"])
+    checkpointed_fun = eqx.filter_checkpoint(fun, policy=policy)
+    grads = eqx.filter_grad(checkpointed_fun)(linear, x)
+    assert tree_allclose(grads, eqx.filter_grad(fun)(linear, x))
+    # The outputs of the `Linear` inside the scan are now saved.
+    assert nbytes(policy) > nbytes(jax.checkpoint_policies.nothing_saveable)
+
+    policy = eqx.checkpoint_policy(save_scopes=["eqx.nn.Conv"])
+    with pytest.raises(ValueError, match="eqx.nn.Conv"):
+        eqx.filter_grad(eqx.filter_checkpoint(fun, policy=policy))(linear, x)
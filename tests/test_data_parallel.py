@@ -0,0 +1,84 @@
+import pytest
+
+from .helpers import run_with_cpu_devices
+
+
+@pytest.mark.parametrize("shard_optimizer_state", (False, True))
+def test_data_parallel_step(shard_optimizer_state):
+    run_with_cpu_devices(
+        4,
+        f"""
+        import equinox as eqx
+        import jax
+        import jax.numpy as jnp
+        import jax.random as jr
+        import optax
+        from jax.sharding import Mesh
+
+        mesh = Mesh(jax.devices(), ("data",))
+        model = eqx.nn.MLP(3, 2, 8, 2, key=jr.PRNGKey(0))
+        optim = optax.adam(1e-2)
+        x = jr.normal(jr.PRNGKey(1), (16, 3))
+        y = jr.normal(jr.PRNGKey(2), (16, 2))
+
+        def loss_fn(model, x, y):
+            return jnp.mean((jax.vmap(model)(x) - y) ** 2)
+
+        @eqx.filter_jit
+        def reference_step(model, opt_state, x, y):
+            loss, grads = eqx.filter_value_and_grad(loss_fn)(model, x, y)
+            params = eqx.filter(model, eqx.is_inexact_array)
+            updates, opt_state = optim.update(grads, opt_state, params)
+            return eqx.apply_updates(model, updates), opt_state, loss
+
+        step = eqx.make_data_parallel_step(
+            loss_fn,
+            optim.update,
+            mesh,
+            shard_optimizer_state={shard_optimizer_state},
+        )
+        true_model = model
+        true_opt_state = optim.init(eqx.filter(model, eqx.is_inexact_array))
+        opt_state = optim.init(eqx.filter(model, eqx.is_inexact_array))
+        for _ in range(3):
+            true_model, true_opt_state, true_loss = reference_step(
+                true_model, true_opt_state, x, y
+            )
+            model, opt_state, loss = step(model, opt_state, x, y)
+            assert jnp.allclose(loss, true_loss, rtol=1e-5, atol=1e-5)
+        assert eqx.tree_equal(model, true_model, rtol=1e-5, atol=1e-5)
+
+        weight = model.layers[0].weight
+        assert weight.sharding.is_fully_replicated
+        mu = opt_state[0].mu.layers[0].weight
+        assert mu.shape == (8, 3)
+        if {shard_optimizer_state}:
+            assert mu.sharding.spec == jax.sharding.PartitionSpec("data")
+            assert mu.addressable_shards[0].data.shape == (2, 3)
+        else:
+            assert mu.sharding.is_fully_replicated
+        """,
+    )
+
+
+def test_data_parallel_step_batch_size():
+    run_with_cpu_devices(
+        4,
+        """
+        import equinox as eqx
+        import jax
+        import jax.numpy as jnp
+        from jax.sharding import Mesh
+
+        mesh = Mesh(jax.devices(), ("data",))
+        step = eqx.make_data_parallel_step(
+            lambda model, x: jnp.sum(model * x), lambda g, s, p: (g, s), mesh
+        )
+        try:
+            step(jnp.array(1.0), None, jnp.ones(6))
+        except ValueError as e:
+            assert "divisible" in str(e)
+        else:
+            assert False
+        """,
+    )
@@ -80,3 +80,34 @@ def test_max_traces_clone(getkey):
 
         with pytest.raises(RuntimeError, match="can only be traced 2 times"):
             lin(jnp.array([False, False, False]))
+
+
+def test_tree_mismatches(getkey):
+    model1 = eqx.nn.MLP(2, 2, 2, 2, key=getkey())
+    model2 = eqx.tree_at(
+        lambda m: (m.layers[0].bias, m.layers[1].weight),
+        model1,
+        replace_fn=lambda x: x + 0.5,
+    )
+    assert eqx.debug.tree_mismatches(model1, model1) == []
+    assert eqx.debug.tree_mismatches(model1, model2) == [
+        (".layers[0].bias", 0.5),
+        (".layers[1].weight", 0.5),
+    ]
+    assert eqx.debug.tree_mismatches(model1, model2, atol=1.0) == []
+
+    tree1 = (jnp.zeros(2), 1, jnp.array([True, False]), jnp.zeros(3))
+    tree2 = (jnp.zeros(3), 2, jnp.array([True, True]), jnp.zeros(3))
+    assert eqx.debug.tree_mismatches(tree1, tree2) == [
+        ("[0]", None),
+        ("[1]", None),
+        ("[2]", 1.0),
+    ]
+    with pytest.raises(ValueError, match="same structure"):
+        eqx.debug.tree_mismatches(tree1, tree1[:2])
+
+    tree1 = (jnp.array([1, 5], dtype=jnp.uint8), jax.random.key(0), jax.random.key(1))
+    tree2 = (jnp.array([3, 5], dtype=jnp.uint8), jax.random.key(0), jax.random.key(2))
+    [(path0, diff0), (path2, _)] = eqx.debug.tree_mismatches(tree1, tree2)
+    assert (path0, diff0) == ("[0]", 2.0)
+    assert path2 == "[2]"
@@ -165,3 +165,23 @@ def test_is_leaf():
     out1, out2 = eqx.partition(pytree, filter_spec, is_leaf=is_m)
     assert out1 == [M(1), None, 3]
     assert out2 == [None, M(2), None]
+
+
+def test_callable_pytree_filter_spec():
+    # A callable which is itself a PyTree is treated as a prefix of `pytree`, not as
+    # a filter function.
+    class Spec(eqx.Module):
+        a: Any
+        b: Any
+
+        def __call__(self, x):
+            assert False
+
+    out1, out2 = eqx.partition(Spec(1, "hi"), Spec(True, False))
+    assert out1 == Spec(1, None)
+    assert out2 == Spec(None, "hi")
+    assert eqx.filter(Spec(1, "hi"), Spec(True, False), inverse=True) == Spec(
+        None, "hi"
+    )
+    assert eqx.filter([1, (2, "hi")], True, replace=0) == [1, (2, "hi")]
+    assert eqx.filter([1, (2, "hi")], False, replace=0) == [0, (0, 0)]
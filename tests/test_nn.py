@@ -9,6 +9,8 @@ import jax.random as jrandom
 import pytest
 from jax._src.dtypes import TypePromotionError
 
+from .helpers import run_with_cpu_devices
+
 
 def test_custom_init():
     with pytest.raises(TypeError):
@@ -199,6 +201,81 @@ def test_nested_sequential(inner_stateful, outer_stateful, getkey):
     assert out.shape == (1, 6)
 
 
+def test_pipeline_stats():
+    seq = eqx.nn.Sequential(
+        [eqx.nn.Linear(2, 2, key=jrandom.PRNGKey(i)) for i in range(4)]
+    )
+    cpu = jax.devices("cpu")[0]
+    for schedule in ("gpipe", "1f1b"):
+        pipeline = eqx.nn.PipelineSequential(
+            seq, [cpu] * 4, num_microbatches=8, schedule=schedule
+        )
+        stats = pipeline.stats()
+        # GPipe bubble: (stages - 1) / (microbatches + stages - 1)
+        assert stats.num_ticks == 22
+        assert stats.bubble_fraction == pytest.approx(3 / 11)
+        assert stats.stage_utilisation == pytest.approx((8 / 11,) * 4)
+        if schedule == "gpipe":
+            assert stats.max_in_flight == (8, 8, 8, 8)
+        else:
+            assert stats.max_in_flight == (4, 3, 2, 1)
+
+
+@pytest.mark.parametrize("schedule", ("gpipe", "1f1b"))
+def test_pipeline_sequential(schedule):
+    run_with_cpu_devices(
+        4,
+        f"""
+        import equinox as eqx
+        import jax
+        import jax.numpy as jnp
+        import jax.random as jr
+
+        keys = jr.split(jr.PRNGKey(0), 6)
+        seq = eqx.nn.Sequential(
+            [
+                eqx.nn.Linear(3, 8, key=keys[0]),
+                eqx.nn.Lambda(jax.nn.relu),
+                eqx.nn.Linear(8, 8, key=keys[1]),
+                eqx.nn.Lambda(jnp.tanh),
+                eqx.nn.Linear(8, 8, key=keys[2]),
+                eqx.nn.Linear(8, 2, key=keys[3]),
+            ]
+        )
+        devices = jax.devices()
+        pipeline = eqx.nn.PipelineSequential(
+            seq, devices, num_microbatches=4, schedule="{schedule}"
+        )
+        assert len(pipeline.stages) == 4
+        assert sum(len(stage) for stage in pipeline.stages) == 6
+        for stage, device in zip(pipeline.stages, devices):
+            for x in jax.tree_util.tree_leaves(eqx.filter(stage, eqx.is_array)):
+                assert x.devices() == {{device}}
+
+        x = jr.normal(keys[4], (16, 3))
+        y = jr.normal(keys[5], (16, 2))
+        assert jnp.allclose(pipeline(x), jax.vmap(seq)(x), atol=1e-5)
+
+        def loss_fn(out, y):
+            return jnp.mean((out - y) ** 2)
+
+        loss, grads = pipeline.value_and_grad(loss_fn, x, y)
+        true_loss, true_grads = eqx.filter_value_and_grad(
+            lambda seq: loss_fn(jax.vmap(seq)(x), y)
+        )(seq)
+        assert jnp.allclose(loss, true_loss, atol=1e-5)
+        grads_layers = [l for stage in grads.stages for l in stage.layers]
+        assert eqx.tree_equal(
+            grads_layers, list(true_grads.layers), rtol=1e-5, atol=1e-5
+        )
+
+        # Differentiating through `__call__` also works, in a GPipe schedule.
+        filter_grads = eqx.filter_grad(lambda p: loss_fn(p(x), y))(pipeline)
+        assert eqx.tree_equal(filter_grads, grads, rtol=1e-5, atol=1e-5)
+        """,
+    )
+
+
 def test_mlp(getkey):
     mlp = eqx.nn.MLP(2, 3, 8, 2, key=getkey())
     x = jrandom.normal(getkey(), (2,))
@@ -285,3 +285,64 @@ def test_out_axes_with_at_least_three_dimensions(out_axes):
     z = filter_pmap(foo, out_axes=out_axes)(x)
     assert y.shape == z.shape
     assert (y == z).all()
+
+
+@pytest.mark.parametrize("donate", ("all", "all-except-first", "none"))
+def test_donation(donate):
+    @filter_pmap(donate=donate)
+    def f(x, y):
+        return x + 1, y + 1
+
+    # Use outputs of `f`, which are already sharded across devices.
+    x, y = f(jnp.array([1.0]), jnp.array([2.0]))
+    f(x, y)
+    assert x.is_deleted() == (donate == "all")
+    assert y.is_deleted() == (donate != "none")
+
+
+def test_dispatch_cache():
+    num_traces = 0
+
+    @filter_pmap
+    def f(x, y):
+        nonlocal num_traces
+        num_traces += 1
+        return x + y
+
+    for i in range(3):
+        assert shaped_allclose(f(jnp.array([i]), 1), jnp.array([i + 1]))
+    assert num_traces == 2  # eval_shape + pmap
+    assert len(f._dispatch_cache) == 1
+
+    # New static argument.
+    assert shaped_allclose(f(jnp.array([1]), 2), jnp.array([3]))
+    assert num_traces == 4
+    # New shape.
+    assert shaped_allclose(f(jnp.array([[1]]), 1), jnp.array([[2]]))
+    assert num_traces == 6
+    assert len(f._dispatch_cache) == 3
+
+    eqx.clear_caches()
+    assert len(f._dispatch_cache) == 0
+
+
+def test_dispatch_cache_equality():
+    def f(x):
+        return x + 1
+
+    f1 = filter_pmap(f)
+    f2 = filter_pmap(f)
+    assert f1 == f2
+    assert hash(f1) == hash(f2)
+
+    num_traces = 0
+
+    @eqx.filter_jit
+    def g(fn, x):
+        nonlocal num_traces
+        num_traces += 1
+        return fn(x)
+
+    assert shaped_allclose(g(f1, jnp.array([1])), jnp.array([2]))
+    assert shaped_allclose(g(f2, jnp.array([1])), jnp.array([2]))
+    assert num_traces == 1
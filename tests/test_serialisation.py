@@ -1,12 +1,18 @@
+import functools as ft
+import json
 import os
+import struct
 
 import equinox as eqx
 import jax
 import jax.numpy as jnp
+import jax.tree_util as jtu
 import numpy as np
 import pytest
 from jax.dtypes import bfloat16
 
+from .helpers import run_with_cpu_devices
+
 
 def _example_trees():
     jax_array1 = jnp.array(1)
@@ -258,3 +264,304 @@ def test_eval_shape(getkey, tmp_path):
     model3 = eqx.tree_deserialise_leaves(tmp_path, model2)
 
     assert eqx.tree_equal(model, model3, typematch=True)
+
+
+def test_sharded_single_device(getkey, tmp_path):
+    model = eqx.nn.MLP(2, 2, 2, 2, key=getkey())
+    tree = (model, np.array([1.0, 2.0]), 3, jnp.array(4, dtype=bfloat16))
+    eqx.tree_serialise_leaves(
+        tmp_path, tree, filter_spec=eqx.sharded_serialise_filter_spec
+    )
+
+    [cpu] = jax.local_devices(backend="cpu")
+    sharding = jax.sharding.SingleDeviceSharding(cpu)
+    like = eqx.filter_eval_shape(lambda: tree)
+    like = (like[0], np.array([0.0, 0.0]), 0, like[3])
+    for shardings in (None, sharding):
+        loaded = eqx.tree_deserialise_leaves(tmp_path, like, shardings=shardings)
+        assert eqx.tree_equal(loaded, tree, typematch=True)
+
+    # Plain files can also be loaded into a sharding.
+    eqx.tree_serialise_leaves(tmp_path, tree)
+    loaded = eqx.tree_deserialise_leaves(tmp_path, like, shardings=sharding)
+    assert eqx.tree_equal(loaded, tree, typematch=True)
+
+
+def test_sharded_multiple_devices(tmp_path):
+    run_with_cpu_devices(
+        4,
+        f"""
+        import functools as ft
+        import os
+
+        import equinox as eqx
+        import jax
+        import jax.numpy as jnp
+        import jax.random as jr
+        import numpy as np
+        from jax.sharding import Mesh, NamedSharding, PartitionSpec as P
+
+        mesh = Mesh(np.array(jax.devices()).reshape(2, 2), ("a", "b"))
+        x = jr.normal(jr.PRNGKey(0), (8, 6))
+        y = jnp.arange(1000)
+        tree = (
+            eqx.filter_shard(x, NamedSharding(mesh, P("a", "b"))),
+            eqx.filter_shard(y, NamedSharding(mesh, P())),
+            "static",
+        )
+        path = os.path.join({str(tmp_path)!r}, "model.eqx")
+        eqx.tree_serialise_leaves(
+            path, tree, filter_spec=eqx.sharded_serialise_filter_spec
+        )
+        # Replicated data is only saved once.
+        assert os.path.getsize(path) < x.nbytes + 2 * y.nbytes
+
+        compressed_path = os.path.join({str(tmp_path)!r}, "compressed.eqx")
+        filter_spec = ft.partial(eqx.compressed_serialise_filter_spec, chunk_bytes=20)
+        eqx.tree_serialise_leaves(compressed_path, tree, filter_spec=filter_spec)
+
+        like = eqx.filter_eval_shape(lambda: tree)
+        for spec in (P("a", "b"), P("b", None), P(None, "a"), P()):
+            sharding = NamedSharding(mesh, spec)
+            replicated = NamedSharding(mesh, P())
+            shardings = (sharding, replicated, replicated)
+            for p in (path, compressed_path):
+                loaded = eqx.tree_deserialise_leaves(p, like, shardings=shardings)
+                assert eqx.tree_equal(loaded, tree)
+                assert loaded[0].sharding == sharding
+                assert loaded[1].sharding == replicated
+                assert loaded[2] == "static"
+
+        # Replicated regions of compressed records are only decompressed once.
+        record_type = eqx._serialisation._CompressedRecord
+        read_block = record_type.read_block
+        calls = []
+
+        def _read_block(self, index, out_dtype):
+            calls.append(index)
+            return read_block(self, index, out_dtype)
+
+        record_type.read_block = _read_block
+        sharding = NamedSharding(mesh, P("a", None))
+        shardings = (sharding, replicated, replicated)
+        eqx.tree_deserialise_leaves(compressed_path, like, shardings=shardings)
+        assert len(calls) == 3
+        """,
+    )
+
+
+@pytest.mark.parametrize("sharded", (False, True))
+def test_dtype_policy(getkey, tmp_path, sharded, monkeypatch):
+    # Use a tiny chunk size, so that arrays are converted over multiple chunks.
+    monkeypatch.setattr(eqx._serialisation, "_CHUNK_BYTES", 12)
+    model = eqx.nn.MLP(3, 4, 5, 2, key=getkey())
+    tree = (model, jnp.arange(7), np.arange(3.0))
+    filter_spec = (
+        eqx.sharded_serialise_filter_spec
+        if sharded
+        else eqx.default_serialise_filter_spec
+    )
+    eqx.tree_serialise_leaves(tmp_path, tree, filter_spec=filter_spec)
+    like = eqx.filter_eval_shape(lambda: tree[:2]) + (np.zeros(3),)
+
+    loaded = eqx.tree_deserialise_leaves(tmp_path, like, dtype_policy=jnp.bfloat16)
+    loaded_model, loaded_int, loaded_numpy = loaded
+    assert loaded_model.layers[0].weight.dtype == jnp.bfloat16
+    assert loaded_model.layers[0].bias.dtype == jnp.bfloat16
+    assert loaded_int.dtype == jnp.int32
+    assert loaded_numpy.dtype == np.float64
+    expected = jtu.tree_map(
+        lambda x: x.astype(jnp.bfloat16) if eqx.is_array(x) else x, model
+    )
+    assert eqx.tree_equal(loaded_model, expected)
+    assert eqx.tree_equal(loaded_int, tree[1])
+
+    def dtype_policy(path, x):
+        if jtu.keystr(path).endswith(".weight"):
+            return jnp.float16
+        else:
+            return None
+
+    loaded = eqx.tree_deserialise_leaves(tmp_path, like, dtype_policy=dtype_policy)
+    loaded_model = loaded[0]
+    assert loaded_model.layers[0].weight.dtype == jnp.float16
+    assert loaded_model.layers[0].bias.dtype == jnp.float32
+    expected = eqx.tree_at(
+        lambda m: [l.weight for l in m.layers],
+        model,
+        [l.weight.astype(jnp.float16) for l in model.layers],
+    )
+    assert eqx.tree_equal(loaded_model, expected)
+
+    # Mapping from paths or filters to dtypes; the first match wins.
+    is_bias = lambda x: x.ndim == 1 and x.shape[0] in (5, 4)
+    dtype_policy = {
+        "[0].layers[0]": jnp.float16,
+        is_bias: jnp.bfloat16,
+        "[1]": jnp.int8,
+    }
+    loaded = eqx.tree_deserialise_leaves(tmp_path, like, dtype_policy=dtype_policy)
+    loaded_model, loaded_int, _ = loaded
+    assert loaded_model.layers[0].weight.dtype == jnp.float16
+    assert loaded_model.layers[0].bias.dtype == jnp.float16
+    assert loaded_model.layers[1].weight.dtype == jnp.float32
+    assert loaded_model.layers[1].bias.dtype == jnp.bfloat16
+    assert loaded_int.dtype == jnp.int8
+    assert eqx.tree_equal(loaded_int, tree[1].astype(jnp.int8))
+
+
+class _RecordReads:
+    def __init__(self, f):
+        self.f = f
+        self.max_read = 0
+
+    def read(self, size=-1):
+        out = self.f.read(size)
+        self.max_read = max(self.max_read, len(out))
+        return out
+
+    def __getattr__(self, name):
+        return getattr(self.f, name)
+
+
+def test_dtype_policy_chunked(tmp_path, monkeypatch):
+    monkeypatch.setattr(eqx._serialisation, "_CHUNK_BYTES", 1024)
+    [cpu] = jax.local_devices(backend="cpu")
+    replicated = jax.sharding.SingleDeviceSharding(cpu)
+    x = jnp.arange(64 * 64, dtype=jnp.float32).reshape(64, 64)
+    path = tmp_path / "x.eqx"
+    eqx.tree_serialise_leaves(path, x, filter_spec=eqx.sharded_serialise_filter_spec)
+    like = jax.ShapeDtypeStruct(x.shape, x.dtype)
+    with open(path, "rb") as f:
+        f = _RecordReads(f)
+        loaded = eqx.tree_deserialise_leaves(
+            f, like, shardings=replicated, dtype_policy=jnp.float16
+        )
+    assert eqx.tree_equal(loaded, x.astype(jnp.float16))
+    # Far less than the 16KiB shard; just the chunk size (or the header).
+    assert f.max_read <= 1024
+
+
+def test_lazy(getkey, tmp_path):
+    model = eqx.nn.MLP(2, 2, 2, 2, key=getkey())
+    tree = (model, np.arange(3.0), jnp.array([], dtype=bfloat16), 4)
+    path = tmp_path / "model.eqx"
+    eqx.tree_serialise_leaves(path, tree)
+
+    like_model, like_empty = eqx.filter_eval_shape(lambda: tree[::2])
+    is_struct = lambda x: isinstance(x, jax.ShapeDtypeStruct)
+    like_numpy_model = jtu.tree_map(
+        lambda x: np.zeros(x.shape, x.dtype) if is_struct(x) else x,
+        like_model,
+        is_leaf=is_struct,
+    )
+    like = (like_numpy_model, np.zeros(3), like_empty, 0)
+    loaded = eqx.tree_deserialise_leaves(path, like, lazy=True)
+    loaded_model, loaded_numpy, loaded_empty, loaded_int = loaded
+    assert type(loaded_model.layers[0].weight) is np.memmap
+    assert type(loaded_numpy) is np.memmap
+    assert isinstance(loaded_empty, jax.Array)
+    assert loaded_empty.shape == (0,)
+    assert loaded_empty.dtype == jnp.bfloat16
+    assert loaded_int == 4
+    to_jax = lambda x: jnp.asarray(x) if eqx.is_array(x) else x
+    assert eqx.tree_equal(jtu.tree_map(to_jax, loaded_model), model)
+    assert eqx.tree_equal(loaded_numpy, tree[1])
+
+    x = jnp.array([1.0, 2.0])
+    assert eqx.tree_equal(eqx.filter_jit(loaded_model)(x), model(x))
+
+    # JAX leaves are loaded onto the device as usual.
+    loaded = eqx.tree_deserialise_leaves(path, (like_model, *like[1:]), lazy=True)
+    assert isinstance(loaded[0].layers[0].weight, jax.Array)
+    assert eqx.tree_equal(loaded[0], model)
+    loaded = eqx.tree_deserialise_leaves(
+        path, (like_model, *like[1:]), lazy=True, dtype_policy=jnp.float16
+    )
+    assert isinstance(loaded[0].layers[0].weight, jax.Array)
+    assert loaded[0].layers[0].weight.dtype == jnp.float16
+    assert type(loaded[1]) is np.memmap
+
+
+@pytest.mark.parametrize("codec", ("zlib", "lzma"))
+def test_compressed(getkey, tmp_path, codec):
+    model = eqx.nn.MLP(3, 4, 50, 2, key=getkey())
+    tree = (
+        model,
+        np.arange(7.0),
+        jnp.arange(5, dtype=bfloat16),
+        jnp.array(3.0),
+        jnp.zeros((2, 0)),
+        1.5,
+    )
+    filter_spec = ft.partial(
+        eqx.compressed_serialise_filter_spec, codec=codec, chunk_bytes=16
+    )
+    eqx.tree_serialise_leaves(tmp_path, tree, filter_spec=filter_spec)
+
+    like = eqx.filter_eval_shape(lambda: tree)
+    like = (like[0], np.zeros(7)) + like[2:5] + (0.0,)
+    loaded = eqx.tree_deserialise_leaves(tmp_path, like)
+    assert eqx.tree_equal(loaded, tree, typematch=True)
+
+    [cpu] = jax.local_devices(backend="cpu")
+    sharding = jax.sharding.SingleDeviceSharding(cpu)
+    loaded = eqx.tree_deserialise_leaves(
+        tmp_path, like, shardings=sharding, dtype_policy=jnp.float16
+    )
+    expected = jtu.tree_map(
+        lambda x: (
+            x.astype(jnp.float16)
+            if isinstance(x, jax.Array) and jnp.issubdtype(x.dtype, jnp.floating)
+            else x
+        ),
+        tree,
+    )
+    assert eqx.tree_equal(loaded, expected, typematch=True)
+
+    filter_spec = ft.partial(eqx.compressed_serialise_filter_spec, codec="gzip")
+    with pytest.raises(RuntimeError, match="Error at leaf"):
+        eqx.tree_serialise_leaves(tmp_path, tree, filter_spec=filter_spec)
+
+
+def test_safetensors(getkey, tmp_path):
+    model = eqx.nn.MLP(2, 3, 4, 2, key=getkey())
+    tree = {"model": model, "numpy": np.arange(3.0), "half": jnp.ones(2, bfloat16)}
+    tree["scalar"] = 3
+    path = tmp_path / "model.safetensors"
+    eqx.tree_serialise_safetensors(path, tree, metadata={"format": "equinox"})
+
+    # Check the file against the specification.
+    data = path.read_bytes()
+    (length,) = struct.unpack("<Q", data[:8])
+    assert (8 + length) % 8 == 0
+    header = json.loads(data[8 : 8 + length])
+    assert header["__metadata__"] == {"format": "equinox"}
+    weight = header["['model'].layers[0].weight"]
+    assert weight["dtype"] == "F32"
+    assert weight["shape"] == [4, 2]
+    assert header["['half']"]["dtype"] == "BF16"
+    start, stop = weight["data_offsets"]
+    expected = np.frombuffer(data[8 + length + start : 8 + length + stop], np.float32)
+    assert np.array_equal(expected.reshape(4, 2), model.layers[0].weight)
+
+    like = eqx.filter_eval_shape(lambda: tree)
+    like["numpy"] = np.zeros(3)
+    like["scalar"] = 0
+    loaded = eqx.tree_deserialise_safetensors(path, like)
+    assert eqx.tree_equal(loaded, tree, typematch=True)
+    assert not loaded["numpy"].flags.writeable
+
+    # Custom names, e.g. for interoperability with other libraries.
+    def name_fn(path):
+        return ".".join(str(getattr(k, "name", getattr(k, "idx", None))) for k in path)
+
+    eqx.tree_serialise_safetensors(path, model, name_fn=name_fn)
+    loaded = eqx.tree_deserialise_safetensors(path, model, name_fn=name_fn)
+    assert eqx.tree_equal(loaded, model)
+    with pytest.raises(RuntimeError, match="No tensor named"):
+        eqx.tree_deserialise_safetensors(path, model)
+
+    bad_like = eqx.tree_at(lambda m: m.layers[0].bias, model, jnp.zeros(5))
+    with pytest.raises(RuntimeError, match="has shape"):
+        eqx.tree_deserialise_safetensors(path, bad_like, name_fn=name_fn)
@@ -1,9 +1,12 @@
 import equinox as eqx
 import jax
+import jax.numpy as jnp
 import jax.random as jr
 import jax.tree_util as jtu
 from jax.sharding import Mesh, PartitionSpec
 
+from .helpers import run_with_cpu_devices
+
 
 [cpu] = jax.local_devices(backend="cpu")
 sharding = jax.sharding.NamedSharding(Mesh([cpu], "x"), PartitionSpec("x"))
@@ -22,3 +25,164 @@ def test_sharding():
         return eqx.filter_shard(x, sharding)
 
     f(mlp)
+
+
+def test_filter_shard_map():
+    mlp = eqx.nn.MLP(2, 2, 2, 2, key=jr.PRNGKey(0))
+    mesh = Mesh([cpu], "x")
+    x = jr.normal(jr.PRNGKey(1), (4, 2))
+
+    @eqx.filter_shard_map(
+        mesh=mesh, in_specs=(None, PartitionSpec("x")), out_specs=(None, None)
+    )
+    def f(model, x):
+        return model, jax.lax.psum(jnp.sum(jax.vmap(model)(x)), "x")
+
+    out_mlp, out = f(mlp, x)
+    assert eqx.tree_equal(out_mlp, mlp)
+    assert jnp.allclose(out, jnp.sum(jax.vmap(mlp)(x)))
+
+
+def test_filter_shard_map_multiple_devices():
+    run_with_cpu_devices(
+        4,
+        """
+        import equinox as eqx
+        import jax
+        import jax.numpy as jnp
+        import jax.random as jr
+        from jax.sharding import Mesh, PartitionSpec as P
+
+        mesh = Mesh(jax.devices(), ("batch",))
+        mlp = eqx.nn.MLP(2, 2, 2, 2, key=jr.PRNGKey(0))
+        x = jr.normal(jr.PRNGKey(1), (8, 2))
+
+        def loss(model, x):
+            return jnp.mean((jax.vmap(model)(x) - 1) ** 2)
+
+        # Per-shard code: each device computes gradients on its own shard of the
+        # batch, and then these are averaged across devices.
+        @eqx.filter_shard_map(
+            mesh=mesh,
+            in_specs=(P(), P("batch")),
+            out_specs=(P(), P("batch"), None),
+        )
+        def step(model, x):
+            grads = eqx.filter_grad(loss)(model, x)
+            grads = jax.lax.pmean(grads, "batch")
+            return grads, jax.vmap(model)(x), "static"
+
+        grads, out, static = eqx.filter_jit(step)(mlp, x)
+        true_grads = eqx.filter_grad(loss)(mlp, x)
+        assert eqx.tree_equal(grads, true_grads, rtol=1e-5, atol=1e-5)
+        assert jnp.allclose(out, jax.vmap(mlp)(x), rtol=1e-5, atol=1e-5)
+        assert len(out.sharding.device_set) == 4
+        assert static == "static"
+        """,
+    )
+
+
+def test_shard_by_rules():
+    mlp = eqx.nn.MLP(2, 2, 2, 2, key=jr.PRNGKey(0))
+    mesh = Mesh([cpu], "x")
+    rules = [
+        (r"layers\.0\.weight", PartitionSpec(None, "x")),
+        ((eqx.nn.Linear, "weight"), PartitionSpec("x", None)),
+    ]
+    shardings = eqx.shard_by_rules(mlp, mesh, rules)
+    assert shardings.layers[0].weight.spec == PartitionSpec(None, "x")
+    assert shardings.layers[1].weight.spec == PartitionSpec("x", None)
+    assert shardings.layers[1].bias.spec == PartitionSpec()
+    assert shardings.activation is None
+    eqx.filter_shard(mlp, shardings)
+
+
+def test_shard_by_rules_multiple_devices():
+    run_with_cpu_devices(
+        4,
+        """
+        import equinox as eqx
+        import jax
+        import jax.numpy as jnp
+        import jax.random as jr
+        from jax.sharding import Mesh, PartitionSpec as P
+
+        mesh = Mesh(jax.devices(), ("model",))
+        attention = eqx.nn.MultiheadAttention(4, 8, key=jr.PRNGKey(0))
+        rules = [
+            (r"output_proj\\.weight", P(None, "model")),
+            ((eqx.nn.Linear, "weight"), P("model", None)),
+        ]
+        shardings = eqx.shard_by_rules(attention, mesh, rules)
+        sharded = eqx.filter_shard(attention, shardings)
+        assert sharded.query_proj.weight.sharding.spec == P("model", None)
+        assert sharded.output_proj.weight.sharding.spec == P(None, "model")
+        assert len(sharded.query_proj.weight.addressable_shards) == 4
+
+        x = jr.normal(jr.PRNGKey(1), (3, 8))
+        out = eqx.filter_jit(lambda a, x: a(x, x, x))(sharded, x)
+        assert jnp.allclose(out, attention(x, x, x), rtol=1e-5, atol=1e-5)
+        """,
+    )
+
+
+def test_tree_psum_bucketed():
+    mlp = eqx.nn.MLP(2, 2, 8, 2, key=jr.PRNGKey(0))
+    mesh = Mesh([cpu], "x")
+    for mean in (False, True):
+        for overlap in (False, True):
+
+            @eqx.filter_shard_map(mesh=mesh, in_specs=(None,), out_specs=None)
+            def f(model):
+                return eqx.tree_psum_bucketed(
+                    model, "x", bucket_bytes=64, mean=mean, overlap=overlap
+                )
+
+            assert eqx.tree_equal(f(mlp), mlp)
+
+
+def test_tree_psum_bucketed_multiple_devices():
+    run_with_cpu_devices(
+        4,
+        """
+        import equinox as eqx
+        import jax
+        import jax.numpy as jnp
+        import jax.random as jr
+
+        mlp = eqx.nn.MLP(2, 2, 8, 4, key=jr.PRNGKey(0))
+        x = jr.normal(jr.PRNGKey(1), (4, 3, 2))
+        num_arrays = len(jax.tree_util.tree_leaves(eqx.filter(mlp, eqx.is_array)))
+
+        def loss(model, x):
+            return jnp.mean(jax.vmap(model)(x) ** 2)
+
+        def make_step(reduce):
+            @eqx.filter_pmap(in_axes=(None, 0), out_axes=None, axis_name="device")
+            def step(model, x):
+                return reduce(eqx.filter_grad(loss)(model, x))
+
+            return step
+
+        leafwise = make_step(lambda g: jax.lax.pmean(g, "device"))
+        bucketed = make_step(
+            lambda g: eqx.tree_psum_bucketed(g, "device", mean=True)
+        )
+        small_buckets = make_step(
+            lambda g: eqx.tree_psum_bucketed(
+                g, "device", bucket_bytes=200, mean=True, overlap=True
+            )
+        )
+        true_grads = leafwise(mlp, x)
+        for step in (bucketed, small_buckets):
+            grads = step(mlp, x)
+            assert eqx.tree_equal(grads, true_grads, rtol=1e-5, atol=1e-5)
+
+        def num_collectives(step):
+            return step.lower(mlp, x).as_text().count("all_reduce")
+
+        assert num_collectives(leafwise) == num_arrays
+        assert num_collectives(bucketed) == 1
+        assert 1 < num_collectives(small_buckets) < num_arrays
+        """,
+    )
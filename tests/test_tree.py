@@ -245,6 +245,29 @@ def test_tree_equal_scalars():
     assert _typeequal(eqx.tree_equal(z, w), False)
 
 
+def test_tree_equal_many_leaves():
+    # Exercises the path in which all arrays are compared together.
+    x = [jnp.full(3, i, dtype=jnp.float32) for i in range(100)]
+    x = x + [jnp.arange(i) for i in range(100)] + [jrandom.key(0), np.array(1.0)]
+    y = [z.copy() for z in x]
+    assert _typeequal(eqx.tree_equal(x, y), jnp.array(True))
+    assert _typeequal(eqx.tree_equal(x, y, rtol=1e-5, atol=1e-5), jnp.array(True))
+    y[50] = y[50].at[1].set(5)
+    assert _typeequal(eqx.tree_equal(x, y), jnp.array(False))
+    y[50] = y[50].at[1].set(50.001)
+    assert _typeequal(eqx.tree_equal(x, y), jnp.array(False))
+    assert _typeequal(eqx.tree_equal(x, y, rtol=1e-3), jnp.array(True))
+    y[-2] = jrandom.key(1)
+    assert _typeequal(eqx.tree_equal(x, y, rtol=1e-3), jnp.array(False))
+
+    @jax.jit
+    def f(x, y):
+        return eqx.tree_equal(x, y)
+
+    assert _typeequal(f(x[:-2], x[:-2]), jnp.array(True))
+    assert _typeequal(f(x[:-2], y[:-2]), jnp.array(False))
+
+
 def test_tree_allclose():
     x = np.array(1.0, dtype=np.float32)
     y = np.array(1.00001, dtype=np.float32)
@@ -310,6 +333,21 @@ def test_tree_check():
         eqx.tree_check(x)
 
 
+def test_tree_check_message(getkey):
+    x = []
+    y = [x]
+    x.append(y)
+    with pytest.raises(ValueError, match="self-referential"):
+        eqx.tree_check([1, x])
+
+    linear = eqx.nn.Linear(2, 2, key=getkey())
+    with pytest.raises(ValueError, match="multiple times"):
+        eqx.tree_check({"a": [linear], "b": (3, linear)})
+
+    mlp = eqx.nn.MLP(2, 2, 2, 2, key=getkey())
+    eqx.tree_check([mlp, mlp.layers[0].weight, [], [], None, None, 1, 1])
+
+
 def test_tree_check_none():
     eqx.tree_check([None, None])
 
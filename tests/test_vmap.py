@@ -171,3 +171,33 @@ def test_out_axes_with_at_least_three_dimensions(out_axes):
     z = eqx.filter_vmap(foo, out_axes=out_axes)(x)
     assert y.shape == z.shape
     assert (y == z).all()
+
+
+@pytest.mark.parametrize("chunk_size", (1, 3, 5, 10, 20))
+def test_chunk_size(chunk_size, getkey):
+    keys = jr.split(getkey(), 10)
+    make = lambda k: eqx.nn.MLP(2, 3, 4, 1, key=k)
+    ensemble = eqx.filter_vmap(make)(keys)
+    chunked_ensemble = eqx.filter_vmap(make, chunk_size=chunk_size)(keys)
+    assert tree_allclose(ensemble, chunked_ensemble)
+
+    def f(model, x):
+        return model(x), jnp.array(2.0), "static"
+
+    x = jr.normal(getkey(), (2, 10))
+    in_axes = (eqx.if_array(0), 1)
+    out_axes = (1, None, None)
+    out = eqx.filter_vmap(f, in_axes=in_axes, out_axes=out_axes)(ensemble, x)
+    chunked = eqx.filter_vmap(
+        f, in_axes=in_axes, out_axes=out_axes, chunk_size=chunk_size
+    )
+    assert tree_allclose(chunked(ensemble, x), out)
+    assert tree_allclose(eqx.filter_jit(chunked)(ensemble, x), out)
+
+    sized = eqx.filter_vmap(lambda: jnp.array(1.0), axis_size=7, chunk_size=chunk_size)
+    assert tree_allclose(sized(), jnp.ones(7))
+
+
+def test_chunk_size_axis_name():
+    with pytest.raises(ValueError, match="axis_name"):
+        eqx.filter_vmap(lambda x: x, axis_name="i", chunk_size=2)
@@ -121,6 +121,14 @@ def test_forward(buffer, kind, getkey):
     assert tree_allclose(final_carry, true_final_carry, atol=1e-4, rtol=1e-4)
 
 
+# With `max_steps` and a trivial `cond_fun`, the number of steps is known in advance, so
+# the offline `revolve` schedule is used instead (when it beats the online one).
+_revolve_backward_order = {
+    (2, 8): "4,5,6,7,4,5,6,4,5,4,0,1,2,3,1,2,1,0",
+    (3, 11): "7,8,9,10,7,8,9,7,8,7,4,5,6,5,4,0,1,2,3,2,1,0",
+}
+
+
 @pytest.mark.parametrize(
     "checkpoints, num_steps, backward_order",
     [
@@ -156,6 +164,9 @@ def test_backward_checkpointed(
     if with_max_steps:
         max_steps = num_steps
         get_num_steps = None
+        backward_order = _revolve_backward_order.get(
+            (checkpoints, num_steps), backward_order
+        )
     else:
         max_steps = None
         get_num_steps = num_steps
@@ -978,3 +989,177 @@ def test_unperturbed_output():
 
     jax.linearize(run, init_carry)
     eqx.filter_grad(run)(init_carry)
+
+
+@pytest.mark.parametrize("max_steps", (None, 40))
+def test_compacted(max_steps):
+    num_steps = jnp.array([0, 1, 2, 3, 50, 7, 7, 100, 1])
+
+    def run(n, x):
+        def cond_fun(carry):
+            step, _ = carry
+            return step < n
+
+        def body_fun(carry):
+            step, val = carry
+            return step + 1, jnp.sin(val) * x
+
+        return eqxi.compacted_while_loop(
+            cond_fun, body_fun, (0, x), max_steps=max_steps, compact_every=4
+        )
+
+    def true_run(n, x):
+        def cond_fun(carry):
+            step, _ = carry
+            if max_steps is None:
+                return step < n
+            else:
+                return (step < n) & (step < max_steps)
+
+        def body_fun(carry):
+            step, val = carry
+            return step + 1, jnp.sin(val) * x
+
+        return lax.while_loop(cond_fun, body_fun, (0, x))
+
+    x = jnp.linspace(1, 2, 9)
+    (final_step, final_val), utilisation = jax.jit(jax.vmap(run))(num_steps, x)
+    true_final_step, true_final_val = jax.vmap(true_run)(num_steps, x)
+    assert tree_allclose(final_step, true_final_step)
+    assert tree_allclose(final_val, true_final_val)
+    # Without compaction, every lane would run for as long as the slowest lane.
+    naive_utilisation = jnp.sum(true_final_step) / (9 * jnp.max(true_final_step))
+    assert jnp.all(utilisation == utilisation[0])
+    assert utilisation[0] > 2 * naive_utilisation
+
+    # Batched closed-over value, forward-mode autodiff, and unbatched use.
+    def f(x):
+        return jax.vmap(run, in_axes=(0, None))(num_steps, x)[0][1]
+
+    def true_f(x):
+        return jax.vmap(true_run, in_axes=(0, None))(num_steps, x)[1]
+
+    out, tangent = jax.jvp(f, (jnp.array(0.9),), (jnp.array(1.0),))
+    true_out, true_tangent = jax.jvp(true_f, (jnp.array(0.9),), (jnp.array(1.0),))
+    assert tree_allclose(out, true_out)
+    assert tree_allclose(tangent, true_tangent, rtol=1e-5, atol=1e-5)
+    (_, val), utilisation = run(5, jnp.array(1.5))
+    assert tree_allclose(val, true_run(5, jnp.array(1.5))[1])
+    assert utilisation == 1
+
+    final_step, _ = eqxi.while_loop(
+        lambda c: c[0] < 5,
+        lambda c: (c[0] + 1, c[1]),
+        (0, 1.0),
+        max_steps=max_steps,
+        kind="compacted",
+    )
+    assert final_step == 5
+
+
+@pytest.mark.parametrize("buffer", (False, True))
+@pytest.mark.parametrize("checkpoints", (1, 4, 15))
+def test_host_checkpoints(buffer, checkpoints, getkey):
+    num_steps = 15
+    cond_fun, make_body_fun, init_val1, init_val2, mlp = _get_problem(
+        getkey(), num_steps=num_steps
+    )
+    stats = []
+
+    def run(arg, checkpoint_memory):
+        init_val1, init_val2, mlp = arg
+        if buffer:
+            buffer_fn = lambda i: i[2]
+        else:
+            buffer_fn = None
+        body_fun = make_body_fun(mlp)
+        _, final_val1, final_val2 = eqxi.while_loop(
+            cond_fun,
+            body_fun,
+            (0, init_val1, init_val2),
+            buffers=buffer_fn,
+            kind="checkpointed",
+            checkpoints=checkpoints,
+            checkpoint_memory=checkpoint_memory,
+            host_stats_callback=stats.append,
+        )
+        return jnp.sum(final_val1) + jnp.sum(final_val2)
+
+    arg = [init_val1, init_val2, mlp]
+    grad_fn = jax.jit(jax.value_and_grad(run), static_argnums=1)
+    true_value, true_grad = grad_fn(arg, "device")
+    assert len(stats) == 0
+    value, grad = grad_fn(arg, "host")
+    assert tree_allclose(value, true_value)
+    assert tree_allclose(grad, true_grad)
+    [stat] = stats
+    assert stat.num_steps == num_steps
+    assert stat.bytes_to_host > 0
+    assert stat.bytes_from_host > 0
+    if checkpoints == num_steps:
+        assert stat.recomputed_steps == 0
+    else:
+        assert stat.recomputed_steps > 0
+
+    # Batched checkpoints are transferred together.
+    stats.clear()
+    batch_arg = jtu.tree_map(lambda x: jnp.stack([x, 2 * x]), [init_val1, init_val2])
+    batch_grad_fn = jax.vmap(
+        lambda a, b, memory: grad_fn([a, b, mlp], memory),
+        in_axes=(0, 0, None),
+    )
+    true_value, true_grad = batch_grad_fn(*batch_arg, "device")
+    value, grad = batch_grad_fn(*batch_arg, "host")
+    assert tree_allclose(value, true_value)
+    assert tree_allclose(grad, true_grad)
+    assert len(stats) == 1
+
+
+@pytest.mark.parametrize("num_steps, checkpoints", ((30, 3), (100, 5), (50, 2)))
+def test_revolve(num_steps, checkpoints):
+    num_calls = 0
+
+    def _count():
+        nonlocal num_calls
+        num_calls += 1
+
+    def body_fun(carry):
+        step, val = carry
+        jax.debug.callback(_count)
+        return step + 1, jnp.sin(val) * 1.1
+
+    @ft.partial(jax.jit, static_argnums=0)
+    @ft.partial(jax.grad, argnums=1)
+    def run(cond_fun, x):
+        _, final_val = eqxi.while_loop(
+            cond_fun,
+            body_fun,
+            (0, x),
+            max_steps=num_steps,
+            kind="checkpointed",
+            checkpoints=checkpoints,
+        )
+        return jnp.sum(final_val)
+
+    @jax.grad
+    def true_run(x):
+        final_val = lax.fori_loop(0, num_steps, lambda _, y: jnp.sin(y) * 1.1, x)
+        return jnp.sum(final_val)
+
+    def recomputed_steps(cond_fun, x):
+        nonlocal num_calls
+        num_calls = 0
+        grad = run(cond_fun, x)
+        jax.effects_barrier()
+        # One call per step on the forward pass, and one per step for each vjp.
+        return grad, num_calls - 2 * num_steps
+
+    x = jnp.linspace(0, 1, 3)
+    true_grad = true_run(x)
+    # Known number of steps: uses `revolve`.
+    grad, revolve_steps = recomputed_steps(lambda _: True, x)
+    assert tree_allclose(grad, true_grad, rtol=1e-5, atol=1e-5)
+    # Unknown number of steps: uses the online schedule.
+    grad, online_steps = recomputed_steps(lambda carry: carry[0] < num_steps, x)
+    assert tree_allclose(grad, true_grad, rtol=1e-5, atol=1e-5)
+    assert revolve_steps < online_steps